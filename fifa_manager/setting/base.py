@@ -34,6 +34,16 @@ DEFAULT_INITIAL_PLAYER_NUMBER = 20
 DEFAULT_VALUE = DEFAULT_PLAYER_VALUE * DEFAULT_INITIAL_PLAYER_NUMBER
 DEFAULT_ATTRIBUTE_VALUE = 60
 DEFAULT_SALARY = 10000
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Tombstones of deleted rows are pruned after this many days, so sync feeds
+# cannot start from an earlier time.
+SYNC_RETENTION_DAYS = 30
+RATING_CHUNK_SIZE = 5000
+IMPORT_CHUNK_SIZE = 2000
+EXPORT_CHUNK_SIZE = 2000
+TEAM_CHUNK_SIZE = 5000
+VALUATION_CHUNK_SIZE = 5000
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
@@ -52,11 +62,9 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "rest_framework",
     "rest_framework.authtoken",
-    "debug_toolbar",
     "coreapi",
     "drf_yasg",
     # 'django_nose',
-    "silk",
     "manager",
 ]
 
@@ -69,6 +77,8 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = "manager.User"
 
 MIDDLEWARE = [
+    "manager.metrics.MetricsMiddleware",
+    "manager.profiling.SamplingProfilerMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -76,15 +86,52 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "silk.middleware.SilkyMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
+# Profile a fraction of requests, or the ones sending PROFILING_HEADER with
+# PROFILING_TOKEN, and aggregate the results per view in PROFILING_DIR. Every
+# worker writes its own files there; merge_profiles sums them per view.
+PROFILING_SAMPLE_RATE = float(environ.get("FOOTBALL_MANAGER_PROFILING_RATE", 0))
+PROFILING_HEADER = "X-Profile"
+PROFILING_TOKEN = environ.get("FOOTBALL_MANAGER_PROFILING_TOKEN")
+PROFILING_DIR = BASE_DIR / "profiles"
+PROFILING_INTERVAL = 0.005
+PROFILING_FLUSH_INTERVAL = 5
+
+# Request metrics served at /metrics. Every worker process writes its totals
+# to METRICS_DIR, so a scrape of any worker reports all of them; clear the
+# directory when the workers are restarted. Without it only the serving
+# process is reported. Scrapers send METRICS_TOKEN as a bearer token; without
+# a token the endpoint is closed.
+METRICS_DIR = environ.get("FOOTBALL_MANAGER_METRICS_DIR")
+METRICS_TOKEN = environ.get("FOOTBALL_MANAGER_METRICS_TOKEN")
+METRICS_FLUSH_INTERVAL = 5
+
+# Columnar snapshot of player attributes memory-mapped by compute engines.
+# Refreshes read changes again from SNAPSHOT_OVERLAP seconds before the last
+# one, so rows committed late by long transactions are not missed.
+SNAPSHOT_DIR = Path(
+    environ.get("FOOTBALL_MANAGER_SNAPSHOT_DIR", BASE_DIR / "snapshots")
+)
+SNAPSHOT_OVERLAP = 60
+SNAPSHOT_CHUNK_SIZE = 20000
+# Similar players are searched over the snapshot in blocks of rows that
+# fit in the CPU caches.
+SCOUTING_BLOCK_SIZE = 16384
+SCOUTING_MAX_RESULTS = 100
+# Nightly shortlists rank players of these statuses for every team.
+SHORTLIST_STATUSES = ["FOR SALE", "FREE AGENT"]
+SHORTLIST_LENGTH = 10
+SHORTLIST_WEAK_CATEGORIES = 2
+SHORTLIST_CHUNK_SIZE = 200
+# Seconds after which the shortlist job stops scouting the remaining teams.
+SHORTLIST_TIME_LIMIT = 3600
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "manager.authentication.TokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.BasicAuthentication",
+        "manager.authentication.BasicAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "rest_framework.schemas.coreapi.AutoSchema",
 }
@@ -121,8 +168,63 @@ ATTRIBUTES = [
     "morale",
 ]
 
+# Player stores a rating column for each category.
 CATEGORIES = ["physique", "playmaking", "shooting", "defending", "setpiece", "skill"]
 PLAYER_POSITIONS = ["GOALKEEPER", "DEFENDER", "MIDFIELDER", "ATTACKER"]
+# Relative weight of each category in the overall rating of a position.
+POSITION_CATEGORY_WEIGHTS = {
+    "GOALKEEPER": {"physique": 3, "defending": 4, "playmaking": 1, "skill": 2},
+    "DEFENDER": {"physique": 3, "defending": 5, "playmaking": 2, "skill": 1},
+    "MIDFIELDER": {
+        "physique": 2,
+        "playmaking": 5,
+        "shooting": 1,
+        "defending": 1,
+        "setpiece": 1,
+        "skill": 3,
+    },
+    "ATTACKER": {
+        "physique": 2,
+        "playmaking": 1,
+        "shooting": 5,
+        "setpiece": 1,
+        "skill": 3,
+    },
+}
+# Attributes averaged over a squad to get its strength in each unit.
+MATCH_STRENGTH_ATTRIBUTES = {
+    "attack": ["finishing", "longshot", "positioning", "dribbling", "pace"],
+    "midfield": ["shortpass", "longpass", "vision", "ballcontrol", "reaction"],
+    "defense": ["marking", "stand_tackle", "slide_tackle", "strength", "heading"],
+}
+MATCH_AVERAGE_GOALS = 1.35
+MATCH_HOME_ADVANTAGE = 1.15
+MATCH_STRENGTH_EXPONENT = 2.5
+MATCH_BATCH_SIZE = 5000
+STANDING_FORM_LENGTH = 5
+POINTS = {"win": 3, "draw": 1, "loss": 0}
+PREDICTION_CHUNK_SIZE = 500
+# A player rated DEFAULT_ATTRIBUTE_VALUE is worth DEFAULT_PLAYER_VALUE, and
+# the price grows with the rating to the power of VALUATION_EXPONENT.
+VALUATION_EXPONENT = 4
+VALUATION_POSITION_FACTORS = {
+    "GOALKEEPER": 0.8,
+    "DEFENDER": 0.9,
+    "MIDFIELDER": 1.0,
+    "ATTACKER": 1.15,
+}
+# Change of the price per point of form or morale above DEFAULT_ATTRIBUTE_VALUE.
+VALUATION_FORM_WEIGHT = 0.004
+VALUATION_MORALE_WEIGHT = 0.002
+# Fees of transfers closed in the last VALUATION_TRANSFER_DAYS scale the
+# prices of a position once there are VALUATION_MIN_TRANSFERS of them, within
+# VALUATION_MARKET_RANGE, and weigh VALUATION_TRANSFER_WEIGHT in the price of
+# the transferred player.
+VALUATION_TRANSFER_DAYS = 365
+VALUATION_MIN_TRANSFERS = 3
+VALUATION_MARKET_RANGE = (0.5, 2.0)
+VALUATION_TRANSFER_WEIGHT = 0.5
+VALUATION_ROUNDING = 1000
 CONTRACT_TYPES = ["BUY", "LOAN"]
 STATUS = {
     "offer": ["ACCEPTED", "REJECTED", "STALLED", "COUNTERED"],
@@ -157,6 +259,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "fifa_manager.wsgi.application"
+ASGI_APPLICATION = "fifa_manager.asgi.application"
 
 
 # Database
@@ -185,6 +288,30 @@ DATABASES = {
     },
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# Reference data is shared between workers through this cache. Without a
+# Redis URL every process keeps its own copy, which is still correct.
+CACHE_URL = environ.get("FOOTBALL_MANAGER_REDIS_URL")
+
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+        if CACHE_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    ),
+}
+REFERENCE_CACHE_SIZE = 256
+REFERENCE_CACHE_TIMEOUT = 3600
+AUTH_CACHE_SIZE = 10000
+AUTH_CACHE_TTL = 300
+# Credential versions only reach every worker through a shared cache, so
+# without one requests are authenticated without the credential cache.
+AUTH_CACHE_SHARED = bool(CACHE_URL)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -2,6 +2,15 @@ from fifa_manager.setting.base import *  # noqa: F403
 
 
 DEBUG = True
+# Development only: both tools record every request.
+INSTALLED_APPS = [*INSTALLED_APPS, "debug_toolbar", "silk"]  # noqa: F405
+MIDDLEWARE = [
+    *MIDDLEWARE,  # noqa: F405
+    "silk.middleware.SilkyMiddleware",
+    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    # Fail requests running more queries than the query_budget of their view.
+    "manager.query_budget.QueryBudgetMiddleware",
+]
 INTERNAL_IPS = [
     # ...
     "127.0.0.1",
@@ -1,9 +1,27 @@
 from fifa_manager.setting.dev import *  # noqa: F403
 
 
+# Recording every test request with silk slows the suite and adds queries.
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != "silk"]  # noqa: F405
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE  # noqa: F405
+    if not middleware.startswith("silk.")
+]
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",  # noqa: F405
+        # An in-memory database shares one cache between connections, whose
+        # table locks fail at once instead of waiting, so tests running
+        # transactions from several threads need a file.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},  # noqa: F405
     },
 }
+# Test transactions roll back without signals, so cached reference data
+# would leak from one test into the next.
+REFERENCE_CACHE_SIZE = 0
+REFERENCE_CACHE_TIMEOUT = 0
+# The test process is the only one using its local cache.
+AUTH_CACHE_SHARED = True
@@ -1,6 +1,7 @@
 """fifa_manager URL Configuration.
 """
 
+from django.apps import apps
 from django.contrib import admin
 from django.urls import include, path, re_path
 from drf_yasg import openapi
@@ -25,7 +26,6 @@ schema_view = get_schema_view(
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("__debug__/", include("debug_toolbar.urls")),
     path("", include("manager.urls")),
     path("api-auth/", include("rest_framework.urls", namespace="drf")),
     path("api/api-auth/", include("rest_framework.urls")),
@@ -43,3 +43,8 @@ urlpatterns = [
         r"^redoc/$", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"
     ),
 ]
+
+if apps.is_installed("debug_toolbar"):
+    urlpatterns.append(path("__debug__/", include("debug_toolbar.urls")))
+if apps.is_installed("silk"):
+    urlpatterns.append(path("silk/", include("silk.urls", namespace="silk")))
@@ -8,9 +8,13 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from manager.models import (
     AttributeCategory,
     Country,
+    Fixture,
     League,
     Manager,
+    Match,
     Player,
+    ShortlistEntry,
+    Standing,
     Team,
     User,
 )
@@ -65,7 +69,11 @@ class UserAdmin(BaseUserAdmin):
 admin.site.register(User, UserAdmin)
 admin.site.register(AttributeCategory)
 admin.site.register(Country)
+admin.site.register(Fixture)
 admin.site.register(League)
 admin.site.register(Manager)
+admin.site.register(Match)
 admin.site.register(Player)
+admin.site.register(ShortlistEntry)
+admin.site.register(Standing)
 admin.site.register(Team)
@@ -0,0 +1,128 @@
+"""Authenticate requests without hashing or querying on every request."""
+
+import copy
+import functools
+import hashlib
+import hmac
+
+from django import conf
+from django.contrib.auth import get_user_model
+from rest_framework import authentication
+
+from manager import cache
+
+
+UserModel = get_user_model()
+credential_cache = cache.TTLCache(cache.AUTH_CACHE_SIZE, cache.AUTH_CACHE_TTL)
+
+
+def user_namespace(user_id) -> str:
+    """Return the version namespace of a user's credentials."""
+
+    return f"credentials:{user_id}"
+
+
+def invalidate_credentials(user_id) -> None:
+    """Make every process verify a user's credentials again."""
+
+    cache.bump_version_on_commit(user_namespace(user_id))
+
+
+def credential_key(*parts: str) -> str:
+    """Derive a cache key from secrets without keeping the secrets."""
+
+    message = "\0".join(parts).encode("utf-8", "surrogateescape")
+    secret = conf.settings.SECRET_KEY.encode()
+
+    return hmac.new(secret, message, hashlib.sha256).hexdigest()
+
+
+def user_id_of_username(username):
+    """Return the pk of the user with a username, or None."""
+
+    # pylint: disable=protected-access
+    users = UserModel._default_manager.filter(**{UserModel.USERNAME_FIELD: username})
+
+    return users.values_list("pk", flat=True).first()
+
+
+def user_id_of_token(model, key):
+    """Return the pk of the user owning a token, or None."""
+
+    return model.objects.filter(key=key).values_list("user_id", flat=True).first()
+
+
+class CachedCredentialsMixin:
+    """
+    Remember successful authentications for a short time.
+
+    An entry keeps the user, the auth object and the version of the user's
+    credentials it was verified under. The version lives in the shared
+    cache and is bumped when the user is saved or deleted, logs out, or a
+    token is created or deleted, so such a change is seen by every process
+    on its next request. Entries also expire after AUTH_CACHE_TTL seconds.
+
+    On a miss the version is read before the credentials are verified, so a
+    change committed meanwhile leaves the entry under an older version.
+    """
+
+    def cached_authenticate(self, key: str, authenticate, user_id):
+        """
+        Return a cached ``(user, auth)`` or authenticate and cache it.
+
+        ``user_id`` returns the pk of the user the credentials name, or None.
+        """
+
+        entry = credential_cache.get(key)
+        if entry is not None:
+            user, auth, version = entry
+            if cache.get_version(user_namespace(user.pk)) == version:
+                return copy.copy(user), auth
+
+            credential_cache.discard(key)
+
+        pk = user_id()
+        version = None if pk is None else cache.get_version(user_namespace(pk))
+        user, auth = authenticate()
+        if version is not None and user.pk == pk:
+            credential_cache.set(key, (user, auth, version))
+
+        return copy.copy(user), auth
+
+
+class CachedBasicAuthentication(
+    CachedCredentialsMixin, authentication.BasicAuthentication
+):
+    """Basic authentication that runs the password hasher once per TTL."""
+
+    def authenticate_credentials(self, userid, password, request=None):
+        return self.cached_authenticate(
+            credential_key("basic", userid, password),
+            functools.partial(
+                super().authenticate_credentials, userid, password, request
+            ),
+            functools.partial(user_id_of_username, userid),
+        )
+
+
+class CachedTokenAuthentication(
+    CachedCredentialsMixin, authentication.TokenAuthentication
+):
+    """Token authentication that reads the token table once per TTL."""
+
+    def authenticate_credentials(self, key):
+        return self.cached_authenticate(
+            credential_key("token", key),
+            functools.partial(super().authenticate_credentials, key),
+            functools.partial(user_id_of_token, self.get_model(), key),
+        )
+
+
+# A process cannot see version bumps made in another process's local cache,
+# so the cached classes are only used with a shared cache.
+if cache.AUTH_CACHE_SHARED:
+    BasicAuthentication = CachedBasicAuthentication
+    TokenAuthentication = CachedTokenAuthentication
+else:
+    BasicAuthentication = authentication.BasicAuthentication
+    TokenAuthentication = authentication.TokenAuthentication
@@ -0,0 +1,218 @@
+"""Cache rarely changing data with versions shared between processes."""
+
+from collections import OrderedDict
+import threading
+import time
+
+from django import conf
+from django.core.cache import caches
+from django.db import transaction
+
+
+REFERENCE_CACHE_SIZE: int = conf.settings.REFERENCE_CACHE_SIZE
+REFERENCE_CACHE_TIMEOUT: int = conf.settings.REFERENCE_CACHE_TIMEOUT
+AUTH_CACHE_SIZE: int = conf.settings.AUTH_CACHE_SIZE
+AUTH_CACHE_TTL: int = conf.settings.AUTH_CACHE_TTL
+AUTH_CACHE_SHARED: bool = conf.settings.AUTH_CACHE_SHARED
+
+
+def version_key(namespace: str) -> str:
+    """Return the shared cache key of a namespace version."""
+
+    return f"version:{namespace}"
+
+
+def new_version(current=None) -> int:
+    """
+    Return a version number to move a namespace to.
+
+    Versions come from the clock, so a namespace whose version was evicted
+    from the shared cache starts again past every version it had before
+    and never serves the entries stored under those.
+    """
+
+    return max(time.time_ns(), (current or 0) + 1)
+
+
+def get_version(namespace: str, alias: str = "default") -> int:
+    """Return the current version of a namespace, starting it if missing."""
+
+    key = version_key(namespace)
+    version = caches[alias].get(key)
+    if version is None:
+        version = new_version()
+        caches[alias].add(key, version, timeout=None)
+        version = caches[alias].get(key, version)
+
+    return version
+
+
+def bump_version(namespace: str, alias: str = "default") -> None:
+    """Move a namespace to a new version in the shared cache."""
+
+    key = version_key(namespace)
+    caches[alias].set(key, new_version(caches[alias].get(key)), timeout=None)
+
+
+def bump_version_on_commit(namespace: str, alias: str = "default") -> None:
+    """
+    Move a namespace to a new version now and again when the transaction commits.
+
+    The second bump drops entries other processes loaded from the database
+    before the change was committed.
+    """
+
+    bump_version(namespace, alias)
+    transaction.on_commit(lambda: bump_version(namespace, alias))
+
+
+class TTLCache:
+    """Bounded, thread-safe LRU mapping whose entries expire after ttl seconds."""
+
+    def __init__(self, maxsize: int, ttl: float, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, key):
+        """Return the live value of a key or None."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.timer():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+
+            self._entries.pop(key, None)
+            self._stats["misses"] += 1
+
+        return None
+
+    def set(self, key, value) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+
+        with self._lock:
+            self._entries[key] = (self.timer() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key) -> None:
+        """Remove a key if present."""
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        """Return hit and miss counters of this process."""
+
+        with self._lock:
+            return dict(self._stats)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+
+        with self._lock:
+            self._entries.clear()
+            self._stats = dict.fromkeys(self._stats, 0)
+
+
+class ReferenceCache:
+    """
+    Serve reference data from a per-process LRU backed by the Django cache.
+
+    Every namespace has a version number kept in the shared cache and every
+    entry is stored under the version it was loaded with. Bumping the
+    version makes all processes miss on their next lookup, so a change in
+    one worker is seen by all of them without any message passing.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = REFERENCE_CACHE_SIZE,
+        timeout: int = REFERENCE_CACHE_TIMEOUT,
+        alias: str = "default",
+    ):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.alias = alias
+        self._local: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+    @property
+    def shared(self):
+        """Return the shared Django cache."""
+
+        return caches[self.alias]
+
+    def get_version(self, namespace: str) -> int:
+        """Return the current version of a namespace."""
+
+        return get_version(namespace, self.alias)
+
+    def bump(self, namespace: str) -> None:
+        """Invalidate every cached entry of a namespace in all processes."""
+
+        bump_version(namespace, self.alias)
+        with self._lock:
+            for local_key in [k for k in self._local if k[0] == namespace]:
+                del self._local[local_key]
+
+    def bump_on_commit(self, namespace: str) -> None:
+        """Invalidate a namespace now and again when the transaction commits."""
+
+        self.bump(namespace)
+        transaction.on_commit(lambda: self.bump(namespace))
+
+    def get_or_set(self, namespace: str, key: str, loader):
+        """Return a cached value, calling loader only if no tier has it."""
+
+        version = self.get_version(namespace)
+        local_key = (namespace, key, version)
+        with self._lock:
+            if local_key in self._local:
+                self._local.move_to_end(local_key)
+                self._stats["local_hits"] += 1
+                return self._local[local_key]
+
+        shared_key = f"reference:{namespace}:{key}"
+        value = self.shared.get(shared_key, version=version)
+        if value is None:
+            value = loader()
+            self.shared.set(shared_key, value, timeout=self.timeout, version=version)
+            stat = "misses"
+        else:
+            stat = "shared_hits"
+
+        with self._lock:
+            self._stats[stat] += 1
+            self._local[local_key] = value
+            self._local.move_to_end(local_key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+        return value
+
+    def stats(self) -> dict[str, int]:
+        """Return hit and miss counters of this process."""
+
+        with self._lock:
+            return dict(self._stats)
+
+    def clear(self) -> None:
+        """Drop the local tier and reset the counters."""
+
+        with self._lock:
+            self._local.clear()
+            self._stats = dict.fromkeys(self._stats, 0)
+
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,119 @@
+"""Answer conditional GET requests on list endpoints."""
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import cache, http
+from rest_framework import response
+
+from manager.cache import reference_cache
+
+
+class ConditionalListMixin:
+    """
+    Add ETag and Last-Modified validators to a list view.
+
+    The validators come from ``(count, max(updated_at))`` of the filtered
+    queryset, so an unchanged collection is answered with ``304 Not
+    Modified`` after one aggregate query, before any row is fetched or
+    serialized. Inserts and updates move ``max(updated_at)`` and deletions
+    change the count.
+    """
+
+    def get_etag_extra(self) -> str:
+        """Return anything besides the rows that changes the response."""
+
+        return ""
+
+    def get_validators(self, request, queryset):
+        """
+        Compute the validators of the collection a request selects.
+
+        :return: Quoted ETag and last modification time, None if empty.
+        :rtype: tuple
+        """
+
+        stats = queryset.order_by().aggregate(
+            count=Count("pk"), last_modified=Max("updated_at")
+        )
+        last_modified = stats["last_modified"]
+        fingerprint = "|".join(
+            [
+                request.get_full_path(),
+                str(request.user.pk),
+                str(stats["count"]),
+                last_modified.isoformat() if last_modified else "",
+                self.get_etag_extra(),
+            ]
+        )
+        etag = cache.quote_etag(hashlib.sha1(fingerprint.encode()).hexdigest())
+
+        return etag, last_modified
+
+    def get(self, request, *args, **kwargs):
+        """Return 304 when the client's copy is current, else the list."""
+
+        etag, last_modified = self.get_validators(
+            request, self.filter_queryset(self.get_queryset())
+        )
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        not_modified = cache.get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if not_modified is None:
+            response = super().get(request, *args, **kwargs)
+        else:
+            response = not_modified
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http.http_date(timestamp)
+
+        return response
+
+
+class ReferenceListMixin:
+    """
+    Serve a conditional list of reference data from the reference cache.
+
+    The validators and every page are cached per URL under the namespace of
+    the model, so repeated requests are answered without a query until a
+    change to the model bumps its version. Put it before
+    ConditionalListMixin.
+    """
+
+    def get_namespace(self) -> str:
+        """Return the reference cache namespace of the listed model."""
+
+        # pylint: disable=protected-access
+        return self.get_queryset().model._meta.model_name
+
+    def get_cache_key(self, request, *parts) -> str:
+        """Derive a cache key from the absolute URL of the request."""
+
+        key = "|".join([request.build_absolute_uri(), *map(str, parts)])
+
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def get_validators(self, request, queryset):
+        """Return the cached validators, computing them on a miss."""
+
+        parent = super()
+
+        return reference_cache.get_or_set(
+            self.get_namespace(),
+            "validators:" + self.get_cache_key(request, request.user.pk),
+            lambda: parent.get_validators(request, queryset),
+        )
+
+    def list(self, request, *args, **kwargs):
+        """Return the cached page selected by the request."""
+
+        parent = super()
+
+        return response.Response(
+            reference_cache.get_or_set(
+                self.get_namespace(),
+                "page:" + self.get_cache_key(request),
+                lambda: parent.list(request, *args, **kwargs).data,
+            )
+        )
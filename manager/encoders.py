@@ -0,0 +1,138 @@
+"""Serialize list endpoints from ``.values()`` rows instead of model instances."""
+
+import functools
+
+from rest_framework import ISO_8601, fields, relations, response
+from rest_framework.settings import api_settings
+
+
+# Fields whose representation of a database value is the value itself.
+PLAIN_FIELDS = (fields.BooleanField, fields.CharField, fields.IntegerField)
+# Added in DRF 3.15 and able to render as strings; older versions have none.
+BIG_INTEGER_FIELDS = getattr(fields, "BigIntegerField", ())
+# Fields whose to_representation accepts the database value as is.
+CONVERTED_FIELDS = (
+    fields.DateField,
+    fields.DateTimeField,
+    fields.DecimalField,
+    fields.FloatField,
+    fields.TimeField,
+    fields.UUIDField,
+)
+
+
+class RowEncoder:
+    """
+    Turn ``.values()`` rows into the representation of a serializer.
+
+    Only the columns whose representation differs from the database value,
+    such as datetimes, are converted, in place and column by column. The
+    resulting dicts hold plain strings, numbers and None, so the renderer
+    encodes a whole page in a single ``json.dumps`` call.
+    """
+
+    def __init__(self, names: list[str], converted: list[tuple]):
+        self.names = names
+        self.converted = converted
+
+    def encode(self, rows: list[dict]) -> list[dict]:
+        """Convert rows fetched with ``.values(*names)`` and return them."""
+
+        for name, field in self.converted:
+            convert = get_converter(field)
+            for row in rows:
+                value = row[name]
+                if value is not None:
+                    row[name] = convert(value)
+
+        return rows
+
+
+def get_converter(field):
+    """
+    Return a function with the output of ``field.to_representation``.
+
+    ISO 8601 datetimes resolve the time zone once, as it may be activated
+    per request, instead of once per value.
+    """
+
+    if not isinstance(field, fields.DateTimeField):
+        return field.to_representation
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    zone = getattr(field, "timezone", None) or field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or zone is None:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(zone).isoformat()
+
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    return convert
+
+
+def _is_plain(field) -> bool:
+    if isinstance(field, BIG_INTEGER_FIELDS) and field.to_representation(1) != 1:
+        return False
+    if isinstance(field, fields.ChoiceField):
+        return all(isinstance(key, str) for key in field.choices)
+    if isinstance(field, relations.PrimaryKeyRelatedField):
+        return field.pk_field is None
+
+    return isinstance(field, PLAIN_FIELDS)
+
+
+@functools.cache
+def get_row_encoder(serializer_class) -> RowEncoder | None:
+    """
+    Compile the row encoder of a model serializer, once per class.
+
+    :return: The encoder, or None when a readable field is not a plain model
+        column, like a nested serializer, a method field or a renamed source.
+    :rtype: RowEncoder
+    """
+
+    names = []
+    converted = []
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if field.source != name or "." in name:
+            return None
+        if _is_plain(field):
+            pass
+        elif isinstance(field, CONVERTED_FIELDS):
+            converted.append((name, field))
+        else:
+            return None
+        names.append(name)
+
+    return RowEncoder(names, converted)
+
+
+class ValuesListMixin:
+    """
+    List a model with ``.values()`` rows and a compiled row encoder.
+
+    Model instances and per-field serializer calls are skipped, while the
+    response stays byte for byte the one of the serializer. Serializers
+    the encoder cannot reproduce fall back to the regular list.
+    """
+
+    values_list = True
+
+    def list(self, request, *args, **kwargs):
+        """Return the page of encoded rows selected by the request."""
+
+        encoder = get_row_encoder(self.get_serializer_class())
+        if not self.values_list or encoder is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).values(*encoder.names)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(encoder.encode(page))
+
+        return response.Response(encoder.encode(list(queryset)))
@@ -0,0 +1,118 @@
+"""Benchmark endpoints and services on a generated world."""
+
+import json
+import pathlib
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from manager import services
+
+
+class Command(BaseCommand):
+    """Generate a world, time every endpoint and service, and report JSON."""
+
+    help = (
+        "Generate a world of countries, leagues, teams, players, transfers "
+        "and counter offers, then report p50/p95/p99 latency, queries and "
+        "peak memory of every endpoint and service. DEBUG and development "
+        "middleware are turned off while measuring, and everything is rolled "
+        "back afterwards. With --baseline, fail on regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--countries", type=int, default=2)
+        parser.add_argument("--leagues", type=int, default=2, help="Per country.")
+        parser.add_argument("--teams", type=int, default=10, help="Per league.")
+        parser.add_argument(
+            "--players",
+            type=int,
+            default=settings.DEFAULT_INITIAL_PLAYER_NUMBER,
+            help="Per team.",
+        )
+        parser.add_argument("--transfers", type=int, default=200)
+        parser.add_argument("--offers", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--only",
+            action="append",
+            help="Benchmark only this URL or service name; may be repeated.",
+        )
+        parser.add_argument("--output", type=pathlib.Path, default=None)
+        parser.add_argument(
+            "--baseline",
+            type=pathlib.Path,
+            default=None,
+            help="JSON of an earlier run to compare with.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed relative growth of p95 latency and peak memory.",
+        )
+        parser.add_argument(
+            "--min-delta-ms",
+            type=float,
+            default=services.MIN_DELTA_MS,
+            help="Latency growth below this is never a regression.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"] is not None:
+            try:
+                baseline = json.loads(options["baseline"].read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read the baseline: {exc}") from exc
+
+        with override_settings(**services.benchmark_settings()), transaction.atomic():
+            used_settings = services.describe_settings()
+            start = time.perf_counter()
+            world = services.generate_world(
+                countries=options["countries"],
+                leagues_per_country=options["leagues"],
+                teams_per_league=options["teams"],
+                players_per_team=options["players"],
+                transfers=options["transfers"],
+                counter_offers=options["offers"],
+                seed=options["seed"],
+            )
+            generate_seconds = time.perf_counter() - start
+            endpoints = services.benchmark_endpoints(
+                world, options["repeat"], options["only"]
+            )
+            service_calls = services.benchmark_service_calls(
+                world, options["repeat"], options["only"]
+            )
+            transaction.set_rollback(True)
+
+        result = {
+            "world": {
+                **world.counts(),
+                "seed": options["seed"],
+                "generate_seconds": generate_seconds,
+            },
+            "settings": used_settings,
+            "repeat": options["repeat"],
+            "endpoints": endpoints,
+            "services": service_calls,
+        }
+        if baseline is not None:
+            result["regressions"] = services.compare_results(
+                baseline, result, options["tolerance"], options["min_delta_ms"]
+            )
+
+        output = json.dumps(result, indent=2)
+        if options["output"] is not None:
+            options["output"].write_text(output + "\n")
+        self.stdout.write(output)
+        if result.get("regressions"):
+            raise CommandError(
+                f"{len(result['regressions'])} regressions against "
+                f"{options['baseline']}"
+            )
@@ -0,0 +1,93 @@
+"""Benchmark plain against cached authentication on the manager list."""
+
+import base64
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import crypto
+from rest_framework import authentication as rest_authentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from manager import authentication, views
+
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    """Call ManagerListView with each authentication and report requests/s."""
+
+    help = (
+        "Measure requests per second of the manager list with Basic and "
+        "Token authentication, with and without the credential cache. "
+        "The benchmark user is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+
+    @staticmethod
+    def measure(auth_class, header: str, requests: int) -> float:
+        """Return requests per second of the view with one authentication."""
+
+        view = views.ManagerListView.as_view(authentication_classes=[auth_class])
+        host = next(
+            (host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"),
+            "localhost",
+        )
+        factory = APIRequestFactory(SERVER_NAME=host)
+        authentication.credential_cache.clear()
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = view(factory.get("/", HTTP_AUTHORIZATION=header))
+            if response.status_code != 200:
+                raise CommandError(
+                    f"{auth_class.__name__} answered {response.status_code}"
+                )
+        seconds = time.perf_counter() - start
+
+        return requests / max(seconds, 1e-9)
+
+    def handle(self, *args, **options):
+        requests = options["requests"]
+        password = crypto.get_random_string(length=16)
+        results = []
+        with transaction.atomic():
+            user = UserModel.objects.create_user(
+                email=f"benchmark-{crypto.get_random_string(8)}@example.com",
+                password=password,
+            )
+            token = Token.objects.create(user=user)
+            basic = base64.b64encode(f"{user.email}:{password}".encode()).decode()
+            cases = [
+                ("basic", rest_authentication.BasicAuthentication, f"Basic {basic}"),
+                (
+                    "cached basic",
+                    authentication.CachedBasicAuthentication,
+                    f"Basic {basic}",
+                ),
+                ("token", rest_authentication.TokenAuthentication, f"Token {token}"),
+                (
+                    "cached token",
+                    authentication.CachedTokenAuthentication,
+                    f"Token {token}",
+                ),
+            ]
+            for name, auth_class, header in cases:
+                results.append(
+                    {
+                        "authentication": name,
+                        "requests": requests,
+                        "requests_per_second": self.measure(
+                            auth_class, header, requests
+                        ),
+                    }
+                )
+            transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps(results, indent=2))
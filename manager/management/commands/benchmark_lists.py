@@ -0,0 +1,45 @@
+"""Benchmark list serialization through serializers and row encoders."""
+
+import json
+import pathlib
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from manager import services
+
+
+class Command(BaseCommand):
+    """Render growing team lists both ways and report JSON."""
+
+    help = (
+        "Generate lists of 1k, 10k and 100k teams and time their rendering "
+        "through TeamSerializer and through the compiled row encoder. "
+        "Everything is rolled back afterwards. Fails when the two paths do "
+        "not produce the same bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, nargs="+", default=[1000, 10000, 100000]
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", type=pathlib.Path, default=None)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            results = services.benchmark_list_serialization(
+                options["rows"], options["repeat"], options["seed"]
+            )
+            transaction.set_rollback(True)
+
+        output = json.dumps({"repeat": options["repeat"], "lists": results}, indent=2)
+        if options["output"] is not None:
+            options["output"].write_text(output + "\n")
+        self.stdout.write(output)
+        different = [
+            size for size, result in results.items() if not result["identical"]
+        ]
+        if different:
+            raise CommandError(f"Row encoder output differs for {', '.join(different)}")
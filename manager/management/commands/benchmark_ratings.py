@@ -0,0 +1,21 @@
+"""Benchmark the vectorized rating engine against a per-object loop."""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from manager import services
+
+
+class Command(BaseCommand):
+    """Rate synthetic players both ways and report timings as JSON."""
+
+    help = "Benchmark the vectorized player rating engine."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=100000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        result = services.benchmark_ratings(options["players"], seed=options["seed"])
+        self.stdout.write(json.dumps(result, indent=2))
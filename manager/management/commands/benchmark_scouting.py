@@ -0,0 +1,28 @@
+"""Benchmark similar players searches over an in-memory snapshot."""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from manager import services
+
+
+class Command(BaseCommand):
+    """Search synthetic players and report latencies as JSON."""
+
+    help = "Benchmark the similar players search."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=500000)
+        parser.add_argument("--queries", type=int, default=20)
+        parser.add_argument("--k", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        result = services.benchmark_similar(
+            options["players"],
+            queries=options["queries"],
+            k=options["k"],
+            seed=options["seed"],
+        )
+        self.stdout.write(json.dumps(result, indent=2))
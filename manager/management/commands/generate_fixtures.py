@@ -0,0 +1,38 @@
+"""Generate a new season of round robin fixtures."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from manager import models, services
+
+
+class Command(BaseCommand):
+    """Schedule fixtures for leagues picked by id or by division."""
+
+    help = (
+        "Start a new season: replace the fixtures of the selected leagues "
+        "with a round robin schedule and reset their standings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--league", type=int, action="append", dest="leagues")
+        parser.add_argument("--country", type=int, default=None)
+        parser.add_argument("--division", type=int, default=None)
+        parser.add_argument(
+            "--single",
+            action="store_true",
+            help="Play every opponent once instead of home and away.",
+        )
+
+    def handle(self, *args, **options):
+        leagues = models.League.objects.all()
+        if options["leagues"] is not None:
+            leagues = leagues.filter(pk__in=options["leagues"])
+        if options["country"] is not None:
+            leagues = leagues.filter(country_id=options["country"])
+        if options["division"] is not None:
+            leagues = leagues.filter(division=options["division"])
+        if not leagues.exists():
+            raise CommandError("No league matches the given options.")
+
+        count = services.generate_fixtures(leagues, double=not options["single"])
+        self.stdout.write(self.style.SUCCESS(f"Created {count} fixtures."))
@@ -0,0 +1,62 @@
+"""Import players from a CSV or JSON lines dataset."""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from manager import services
+
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    """Stream a player dataset into the database in chunks."""
+
+    help = (
+        "Import players from a CSV or JSON lines file. Columns are Player "
+        "fields (first_name, last_name, position, status, price, salary, "
+        "join_date and every attribute) plus country, team, league, "
+        "league_country and division, which are created when missing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "jsonl"], default=None)
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.IMPORT_CHUNK_SIZE
+        )
+        parser.add_argument(
+            "--owner",
+            default=None,
+            help="Email of the owner of created teams, the first superuser by default.",
+        )
+
+    def handle(self, *args, **options):
+        owners = UserModel.objects.order_by("id")
+        if options["owner"] is not None:
+            owners = owners.filter(email=options["owner"])
+        else:
+            owners = owners.filter(is_superuser=True)
+        owner = owners.first()
+        if owner is None:
+            raise CommandError("No owner found for the imported teams.")
+
+        def progress(rows, seconds):
+            self.stdout.write(f"{rows} rows, {rows / max(seconds, 1e-9):.0f} rows/s")
+
+        try:
+            result = services.import_players(
+                services.read_rows(options["path"], options["format"]),
+                owner,
+                chunk_size=options["chunk_size"],
+                progress=progress,
+            )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result['rows']} players in {result['seconds']:.2f}s "
+                f"({result['rows_per_second']:.0f} rows/s)."
+            )
+        )
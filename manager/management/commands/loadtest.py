@@ -0,0 +1,110 @@
+"""Load test the WSGI and ASGI applications in-process."""
+
+import json
+import pathlib
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from manager import services
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Parse ``scenario=weight,...`` into a dict."""
+
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in services.SCENARIOS:
+            raise CommandError(
+                f"Unknown scenario {name}, expected one of {list(services.SCENARIOS)}"
+            )
+        mix[name] = float(weight or 1)
+
+    return mix
+
+
+class Command(BaseCommand):
+    """Run scenarios at increasing concurrency and report JSON per level."""
+
+    help = (
+        "Drive WSGI_APPLICATION from a thread pool and ASGI_APPLICATION from "
+        "asyncio tasks with a weighted mix of scenarios, at each concurrency "
+        "level, and report throughput, latency percentiles and error rates. "
+        "Requests commit, so it refuses to run unless the default database is "
+        "SQLite; point the settings at a scratch copy. The generated rows are "
+        "deleted afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interface", choices=[*services.INTERFACES, "both"], default="both"
+        )
+        parser.add_argument(
+            "--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16]
+        )
+        parser.add_argument(
+            "--duration", type=float, default=5.0, help="Seconds per level."
+        )
+        parser.add_argument(
+            "--mix",
+            default="register=1,list_teams=6,create_team=1,bid=2",
+            help="Weighted scenarios as name=weight,...",
+        )
+        parser.add_argument("--leagues", type=int, default=2)
+        parser.add_argument("--teams", type=int, default=10, help="Per league.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", type=pathlib.Path, default=None)
+        parser.add_argument("--keep", action="store_true")
+
+    def handle(self, *args, **options):
+        vendor = connections["default"].vendor
+        if vendor != "sqlite":
+            raise CommandError(
+                f"Requests commit to the default {vendor} database, "
+                "point the settings at a scratch SQLite database"
+            )
+        mix = parse_mix(options["mix"])
+        interfaces = (
+            services.INTERFACES
+            if options["interface"] == "both"
+            else [options["interface"]]
+        )
+        load = services.prepare_load(
+            max(options["concurrency"]),
+            seed=options["seed"],
+            countries=1,
+            leagues_per_country=options["leagues"],
+            teams_per_league=options["teams"],
+            transfers=0,
+            counter_offers=0,
+        )
+        try:
+            levels = []
+            for interface in interfaces:
+                for concurrency in options["concurrency"]:
+                    level = services.run_level(
+                        load,
+                        interface,
+                        concurrency,
+                        options["duration"],
+                        mix,
+                        seed=options["seed"],
+                    )
+                    levels.append(level)
+                    self.stderr.write(
+                        f"{interface} x{concurrency}: "
+                        f"{level['requests_per_second']:.1f} req/s, "
+                        f"{level['error_rate']:.1%} errors"
+                    )
+        finally:
+            if not options["keep"]:
+                services.cleanup_load(load)
+
+        output = json.dumps(
+            {"world": load.world.counts(), "mix": mix, "levels": levels},
+            indent=2,
+        )
+        if options["output"] is not None:
+            options["output"].write_text(output + "\n")
+        self.stdout.write(output)
@@ -0,0 +1,19 @@
+"""Merge the request profiles written by every worker."""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from manager import profiling
+
+
+class Command(BaseCommand):
+    """Sum the per-process profiles in PROFILING_DIR per view."""
+
+    help = (
+        "Write <view>.prof and <view>.collapsed in PROFILING_DIR from the "
+        "files every worker process writes to its own subdirectory."
+    )
+
+    def handle(self, *args, **options):
+        views = profiling.ProfileStore(settings.PROFILING_DIR).merge()
+        self.stdout.write(self.style.SUCCESS(f"Merged {len(views)} views."))
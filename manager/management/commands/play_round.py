@@ -0,0 +1,28 @@
+"""Play the next round of league fixtures."""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from manager import models, services
+
+
+class Command(BaseCommand):
+    """Simulate the next unplayed round and update standings."""
+
+    help = "Simulate the next unplayed round of every league, or the given leagues."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--league", type=int, action="append", dest="leagues")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        leagues = options["leagues"]
+        if leagues is not None:
+            leagues = models.League.objects.filter(pk__in=leagues)
+        start = time.perf_counter()
+        matches = services.play_round(leagues=leagues, seed=options["seed"])
+        seconds = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(f"Played {len(matches)} matches in {seconds:.2f}s.")
+        )
@@ -0,0 +1,51 @@
+"""Predict title odds and finishing positions of league teams."""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from manager import models, services
+
+
+class Command(BaseCommand):
+    """Run Monte Carlo seasons for a league, or benchmark the simulator."""
+
+    help = (
+        "Simulate many seasons of a league and report the probability of each "
+        "team finishing in each position. With --benchmark, report seasons/sec "
+        "for synthetic teams at each number of workers instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--league", type=int, default=None)
+        parser.add_argument("--seasons", type=int, default=10000)
+        parser.add_argument("--workers", type=int, action="append", default=None)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--benchmark", action="store_true")
+        parser.add_argument("--teams", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            result = services.benchmark_season_odds(
+                num_teams=options["teams"],
+                seasons=options["seasons"],
+                workers_list=options["workers"],
+                seed=options["seed"] or 0,
+            )
+        else:
+            if options["league"] is None:
+                raise CommandError("Pass --league or --benchmark.")
+            try:
+                league = models.League.objects.get(pk=options["league"])
+            except models.League.DoesNotExist as exc:
+                raise CommandError(
+                    f"League {options['league']} does not exist."
+                ) from exc
+            workers = options["workers"][0] if options["workers"] else None
+            result = services.season_odds(
+                league,
+                seasons=options["seasons"],
+                workers=workers,
+                seed=options["seed"],
+            ).as_dicts()
+        self.stdout.write(json.dumps(result, indent=2))
@@ -0,0 +1,22 @@
+"""Prune old tombstones of deleted rows."""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from manager import services
+
+
+class Command(BaseCommand):
+    """Delete tombstones older than the sync retention."""
+
+    help = (
+        "Delete the tombstones of rows deleted more than --days days ago. "
+        "Sync feeds reject a since older than SYNC_RETENTION_DAYS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.SYNC_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        deleted = services.prune_deletions(days=options["days"])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstones."))
@@ -0,0 +1,25 @@
+"""Rebuild league standings from match results."""
+
+from django.core.management.base import BaseCommand
+
+from manager import models, services
+
+
+class Command(BaseCommand):
+    """Recompute standings from scratch, one league at a time."""
+
+    help = "Recompute the standings of every league, or the given leagues."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--league", type=int, action="append", dest="leagues")
+
+    def handle(self, *args, **options):
+        leagues = models.League.objects.order_by("id")
+        if options["leagues"] is not None:
+            leagues = leagues.filter(pk__in=options["leagues"])
+        for league in leagues.iterator():
+            standings = services.rebuild_standings(league)
+            self.stdout.write(
+                f"Rebuilt {len(standings)} standings of league {league.pk}."
+            )
+        self.stdout.write(self.style.SUCCESS("Done."))
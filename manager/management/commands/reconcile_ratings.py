@@ -0,0 +1,33 @@
+"""Backfill and reconcile stored player ratings."""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from manager import services
+
+
+class Command(BaseCommand):
+    """Recompute stored ratings in chunks and fix the rows that drifted."""
+
+    help = (
+        "Backfill or reconcile the stored category and overall ratings of "
+        "every player. Run after changing attribute categories."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.RATING_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        def progress(checked, updated):
+            self.stdout.write(f"Checked {checked} players, updated {updated}.")
+
+        result = services.reconcile_ratings(
+            chunk_size=options["chunk_size"], progress=progress
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: checked {result['checked']}, updated {result['updated']}."
+            )
+        )
@@ -0,0 +1,31 @@
+"""Reconcile stored team totals with the players of each team."""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from manager import services
+
+
+class Command(BaseCommand):
+    """Recount team totals in chunks and fix the rows that drifted."""
+
+    help = (
+        "Recount the number of players and the value of every team from its "
+        "players and fix the teams whose stored totals drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=settings.TEAM_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        def progress(checked, updated):
+            self.stdout.write(f"Checked {checked} teams, updated {updated}.")
+
+        result = services.reconcile_teams(
+            chunk_size=options["chunk_size"], progress=progress
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: checked {result['checked']}, updated {result['updated']}."
+            )
+        )
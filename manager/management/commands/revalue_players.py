@@ -0,0 +1,50 @@
+"""Reprice every player and roll the changes up into team values."""
+
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from manager import services
+
+
+class Command(BaseCommand):
+    """Write the market price of every player, or benchmark the pricing."""
+
+    help = (
+        "Price every player from ratings, form, morale, position and recent "
+        "transfer fees, write the prices that changed and update team values. "
+        "Run it nightly. With --benchmark, time synthetic players instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.VALUATION_CHUNK_SIZE
+        )
+        parser.add_argument("--benchmark", action="store_true")
+        parser.add_argument("--players", type=int, default=500000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            result = services.benchmark_valuation(
+                options["players"], seed=options["seed"]
+            )
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        def progress(checked, updated):
+            self.stdout.write(f"Checked {checked} players, updated {updated}.")
+
+        try:
+            result = services.revalue_players(
+                chunk_size=options["chunk_size"], progress=progress
+            )
+        except services.ValuationError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: checked {result['checked']}, updated {result['updated']}, "
+                f"{result['teams']} team updates."
+            )
+        )
@@ -0,0 +1,68 @@
+"""Rebuild the scouting shortlists of every team."""
+
+import json
+import pathlib
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from manager import services
+
+
+class Command(BaseCommand):
+    """Rank the players who would improve each team, or benchmark it."""
+
+    help = (
+        "Rank the transfer-listed and free agent players who would most "
+        "improve the weakest categories of every team within its budget, and "
+        "save the shortlists. Run it nightly. With --benchmark, time synthetic "
+        "teams and players instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--length", type=int, default=settings.SHORTLIST_LENGTH)
+        parser.add_argument("--workers", type=int, default=None)
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.SHORTLIST_CHUNK_SIZE
+        )
+        parser.add_argument(
+            "--time-limit", type=float, default=settings.SHORTLIST_TIME_LIMIT
+        )
+        parser.add_argument("--directory", type=pathlib.Path, default=None)
+        parser.add_argument("--benchmark", action="store_true")
+        parser.add_argument("--teams", type=int, default=10000)
+        parser.add_argument("--players", type=int, default=500000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            result = services.benchmark_shortlists(
+                options["teams"],
+                options["players"],
+                k=options["length"],
+                workers=options["workers"],
+                chunk_size=options["chunk_size"],
+                seed=options["seed"],
+            )
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        def progress(scouted, teams):
+            self.stdout.write(f"Scouted {scouted} of {teams} teams.")
+
+        result = services.scout_teams(
+            k=options["length"],
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+            time_limit=options["time_limit"],
+            directory=options["directory"],
+            progress=progress,
+        )
+        message = (
+            f"Scouted {result['scouted']} of {result['teams']} teams in "
+            f"{result['seconds']:.1f}s: {result['entries']} entries."
+        )
+        if result["complete"]:
+            self.stdout.write(self.style.SUCCESS(message))
+        else:
+            self.stdout.write(self.style.WARNING(f"Time limit reached. {message}"))
@@ -0,0 +1,31 @@
+"""Simulate one matchday across every league."""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from manager import models, services
+
+
+class Command(BaseCommand):
+    """Pair the teams of each league and simulate their matches."""
+
+    help = "Simulate one matchday across every league, or the given leagues."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--league", type=int, action="append", dest="leagues")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        leagues = options["leagues"]
+        if leagues is not None:
+            leagues = models.League.objects.filter(pk__in=leagues)
+        start = time.perf_counter()
+        matches = services.simulate_matchday(leagues=leagues, seed=options["seed"])
+        seconds = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Simulated {len(matches)} matches in {seconds:.2f}s "
+                f"({len(matches) / max(seconds, 1e-9):.0f} matches/s)."
+            )
+        )
@@ -0,0 +1,42 @@
+"""Build or refresh the memory-mapped snapshot of player attributes."""
+
+import pathlib
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from manager import services
+
+
+class Command(BaseCommand):
+    """Apply player changes to the snapshot, or write a new generation."""
+
+    help = (
+        "Refresh the columnar snapshot of player ids, teams, positions and "
+        "attributes from the players updated or deleted since the last run. "
+        "Run it periodically; compute engines map the files read-only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Write a new generation from every player.",
+        )
+        parser.add_argument("--directory", type=pathlib.Path, default=None)
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.SNAPSHOT_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        update = (
+            services.build_snapshot if options["rebuild"] else services.refresh_snapshot
+        )
+        result = update(options["directory"], options["chunk_size"])
+        action = "Rebuilt" if result["rebuilt"] else "Refreshed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action} generation {result['generation']}: {result['rows']} rows, "
+                f"{result['upserted']} written, {result['deleted']} deleted."
+            )
+        )
@@ -0,0 +1,261 @@
+"""Record request metrics and render them in the Prometheus text format."""
+
+import bisect
+import hmac
+import json
+import os
+import pathlib
+import tempfile
+import threading
+import time
+
+from django import conf
+from django.db import connection
+
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+QUERY_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100, 200, 500]
+SIZE_BUCKETS = [100, 1000, 10000, 100000, 1000000, 10000000]
+COUNTERS = {
+    "http_requests_total": "Requests by view, method and status.",
+}
+HISTOGRAMS = {
+    "http_request_duration_seconds": ("Request latency.", LATENCY_BUCKETS),
+    "http_request_db_queries": ("Database queries per request.", QUERY_BUCKETS),
+    "http_request_db_duration_seconds": (
+        "Database time per request.",
+        LATENCY_BUCKETS,
+    ),
+    "http_response_size_bytes": ("Response body size.", SIZE_BUCKETS),
+}
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def is_scraper(request) -> bool:
+    """Tell whether a request carries the METRICS_TOKEN bearer token."""
+
+    token = conf.settings.METRICS_TOKEN
+    scheme, _, credentials = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+    if not token or scheme.lower() != "bearer":
+        return False
+
+    return hmac.compare_digest(credentials.encode(), token.encode())
+
+
+def format_labels(labels) -> str:
+    """Render ``(name, value)`` pairs as a Prometheus label set."""
+
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+
+    return "{" + ",".join(pairs) + "}"
+
+
+class Registry:
+    """
+    Counters and histograms shared by the threads of a process.
+
+    Every thread updates its own shard, so recording takes no lock. Shards
+    are summed when metrics are collected, and the shards of threads that
+    have ended are folded into a retired total then. With a directory every
+    process also writes its totals to ``<pid>.json`` there, at most every
+    ``flush_interval`` seconds, and collecting sums the files of all
+    processes, so any worker can answer a scrape for all of them.
+    """
+
+    def __init__(self, directory=None, flush_interval: float = 5, identity=None):
+        self.directory = pathlib.Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self.identity = identity
+        self._local = threading.local()
+        self._shards: list[tuple[threading.Thread, dict]] = []
+        self._retired: dict = {}
+        self._shards_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._shards_lock:
+                self._shards.append((threading.current_thread(), shard))
+            self._local.shard = shard
+
+        return shard
+
+    def inc(self, name: str, labels: tuple, value: float = 1) -> None:
+        """Add to a counter."""
+
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name: str, labels: tuple, value: float) -> None:
+        """Record one observation in a histogram."""
+
+        buckets = HISTOGRAMS[name][1]
+        shard = self._shard()
+        key = (name, labels)
+        entry = shard.get(key)
+        if entry is None:
+            # One slot per bucket, one for +Inf, then the sum.
+            entry = shard[key] = [0] * (len(buckets) + 1) + [0]
+        entry[bisect.bisect_left(buckets, value)] += 1
+        entry[-1] += value
+
+    @staticmethod
+    def merge(total: dict, key, value) -> None:
+        """Add a counter value or histogram entry into a snapshot."""
+
+        if isinstance(value, list):
+            current = total.setdefault(key, [0] * len(value))
+            for i, item in enumerate(value):
+                current[i] += item
+        else:
+            total[key] = total.get(key, 0) + value
+
+    def snapshot(self) -> dict:
+        """Sum the shards of all threads of this process."""
+
+        with self._shards_lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                    continue
+                for key, value in shard.items():
+                    self.merge(self._retired, key, value)
+            self._shards = live
+            total: dict = {}
+            for key, value in self._retired.items():
+                self.merge(total, key, value)
+        for _, shard in live:
+            for key, value in dict(shard).items():
+                self.merge(
+                    total, key, list(value) if isinstance(value, list) else value
+                )
+
+        return total
+
+    def flush(self, force: bool = False) -> None:
+        """Write this process's totals to the metrics directory."""
+
+        if self.directory is None:
+            return
+        if not force and time.monotonic() - self._flushed_at < self.flush_interval:
+            return
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._flushed_at = time.monotonic()
+            rows = [
+                [name, [list(pair) for pair in labels], value]
+                for (name, labels), value in self.snapshot().items()
+            ]
+            self.directory.mkdir(parents=True, exist_ok=True)
+            identity = self.identity or os.getpid()
+            with tempfile.NamedTemporaryFile(
+                "w", dir=self.directory, suffix=".tmp", delete=False
+            ) as file:
+                json.dump(rows, file)
+            os.replace(file.name, self.directory / f"{identity}.json")
+        finally:
+            self._flush_lock.release()
+
+    def collect(self) -> dict:
+        """Return the totals of every process sharing the directory."""
+
+        if self.directory is None:
+            return self.snapshot()
+
+        self.flush(force=True)
+        total: dict = {}
+        for path in self.directory.glob("*.json"):
+            try:
+                rows = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in rows:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                self.merge(total, key, value)
+
+        return total
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+
+        metrics = self.collect()
+        lines = []
+        for name, help_text in COUNTERS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (metric, labels), value in sorted(metrics.items()):
+                if metric == name:
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+        for name, (help_text, buckets) in HISTOGRAMS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (metric, labels), entry in sorted(metrics.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip([*buckets, "+Inf"], entry[:-1], strict=True):
+                    cumulative += count
+                    bucket_labels = format_labels([*labels, ("le", bound)])
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {entry[-1]}")
+                lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry(conf.settings.METRICS_DIR, conf.settings.METRICS_FLUSH_INTERVAL)
+
+
+class QueryRecorder:
+    """Execute wrapper counting the queries of a request and their time."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """Record latency, database work and response size of every request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        seconds = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = (match.url_name or match.route) if match else "unresolved"
+        labels = (("view", view),)
+        registry.inc(
+            "http_requests_total",
+            (*labels, ("method", request.method), ("status", response.status_code)),
+        )
+        registry.observe("http_request_duration_seconds", labels, seconds)
+        registry.observe("http_request_db_queries", labels, recorder.queries)
+        registry.observe("http_request_db_duration_seconds", labels, recorder.seconds)
+        if not response.streaming:
+            registry.observe("http_response_size_bytes", labels, len(response.content))
+        registry.flush()
+
+        return response
@@ -0,0 +1,183 @@
+"""Define pagination classes for list endpoints."""
+
+import base64
+import binascii
+from collections import OrderedDict
+import datetime
+
+from django import conf
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import exceptions, pagination, response
+from rest_framework.utils.urls import replace_query_param
+
+
+PAGE_SIZE: int = conf.settings.PAGE_SIZE
+MAX_PAGE_SIZE: int = conf.settings.MAX_PAGE_SIZE
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Paginate a queryset on the ``(updated_at, id)`` keyset of BaseModel.
+
+    Every page is fetched with a single range scan starting right after the
+    last row of the previous page, so fetching page 1000 costs the same as
+    fetching page 1. The cursor encodes the position of the last row served,
+    so rows inserted while a client is paging are never skipped or repeated.
+    """
+
+    ordering = ("updated_at", "id")
+    page_size = PAGE_SIZE
+    max_page_size = MAX_PAGE_SIZE
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        self.base_url = None
+        self.has_next = False
+        self.position = None
+
+    def get_page_size(self, request):
+        """Read the page size from the query, capped by max_page_size."""
+
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return the rows of the page selected by the request cursor."""
+
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            updated_at, pk = position
+            queryset = queryset.filter(
+                Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk)
+            )
+
+        rows = list(queryset[: page_size + 1])
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.position = self.get_position(rows[-1]) if rows else None
+
+        return rows
+
+    @staticmethod
+    def get_position(row):
+        """Return the ``(updated_at, id)`` key of a model or ``.values()`` row."""
+
+        if isinstance(row, dict):
+            return row["updated_at"], row["id"]
+
+        return row.updated_at, row.id
+
+    def decode_cursor(self, request):
+        """Turn the cursor query parameter back into a keyset position."""
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            decoded = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            updated_at, pk = decoded.split("|")
+            updated_at = datetime.datetime.fromisoformat(updated_at)
+            pk = int(pk)
+        except (binascii.Error, UnicodeError, ValueError) as exc:
+            raise exceptions.NotFound(self.invalid_cursor_message) from exc
+        if timezone.is_naive(updated_at) and conf.settings.USE_TZ:
+            updated_at = timezone.make_aware(updated_at, datetime.timezone.utc)
+
+        return updated_at, pk
+
+    @staticmethod
+    def encode_cursor(position):
+        """Turn a keyset position into an opaque cursor token."""
+
+        updated_at, pk = position
+        raw = f"{updated_at.isoformat()}|{pk}"
+
+        return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+    def get_next_link(self):
+        """Return the URL of the next page or None on the last page."""
+
+        if not self.has_next:
+            return None
+
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(self.position),
+        )
+
+    def get_paginated_response(self, data):
+        return response.Response(
+            OrderedDict([("next", self.get_next_link()), ("results", data)])
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class SyncPagination(KeysetPagination):
+    """
+    Page through a change feed on ``(time, operation rank, id)`` positions.
+
+    The feed is produced by a service, this class only decodes the
+    position to resume from and links to the next page.
+    """
+
+    def paginate_feed(self, feed, request):
+        """Return the changes of the page selected by the request cursor."""
+
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        changes = feed(self.decode_cursor(request), page_size)
+        self.has_next = len(changes) > page_size
+        changes = changes[:page_size]
+        self.position = changes[-1][0] if changes else None
+
+        return [change for _, change in changes]
+
+    def decode_cursor(self, request):
+        """Turn the cursor query parameter back into a feed position."""
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            decoded = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            timestamp, rank, pk = decoded.split("|")
+            timestamp = datetime.datetime.fromisoformat(timestamp)
+            rank, pk = int(rank), int(pk)
+        except (binascii.Error, UnicodeError, ValueError) as exc:
+            raise exceptions.NotFound(self.invalid_cursor_message) from exc
+        if timezone.is_naive(timestamp) and conf.settings.USE_TZ:
+            timestamp = timezone.make_aware(timestamp, datetime.timezone.utc)
+
+        return timestamp, rank, pk
+
+    @staticmethod
+    def encode_cursor(position):
+        """Turn a feed position into an opaque cursor token."""
+
+        timestamp, rank, pk = position
+        raw = f"{timestamp.isoformat()}|{rank}|{pk}"
+
+        return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
@@ -0,0 +1,229 @@
+"""Profile a sample of requests and aggregate the results per view."""
+
+from collections import Counter
+import cProfile
+import hmac
+import marshal
+import os
+import pathlib
+import pstats
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+
+from django import conf
+
+
+class StackSampler:
+    """Count the call stacks of one thread, sampled at a fixed interval."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def collapse(frame) -> str:
+        """Render a stack, root first, as ``module:function`` parts."""
+
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            module = frame.f_globals.get("__name__", code.co_filename)
+            parts.append(f"{module}:{code.co_name}")
+            frame = frame.f_back
+
+        return ";".join(reversed(parts))
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            # pylint: disable=protected-access
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self.collapse(frame)] += 1
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """Stop sampling and return the stack counts."""
+
+        self._stopped.set()
+        self._thread.join()
+
+        return self.stacks
+
+
+class ProfileStore:
+    """
+    Aggregate profiles per view and keep them on disk.
+
+    Every process writes its totals to ``<pid>/<view>.prof``, cumulative
+    cProfile stats, and ``<pid>/<view>.collapsed``, sampled stacks, at most
+    every ``flush_interval`` seconds, so workers never overwrite each other.
+    ``merge`` sums the files of all processes into ``<view>.prof``, readable
+    with ``pstats`` or snakeviz, and ``<view>.collapsed``, the format read
+    by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, directory, flush_interval: float = 5, identity=None):
+        self.directory = pathlib.Path(directory)
+        self.flush_interval = flush_interval
+        self.identity = identity
+        self.stats: dict[str, pstats.Stats] = {}
+        self.stacks: dict[str, Counter] = {}
+        self.requests: Counter = Counter()
+        self._changed: set[str] = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    @staticmethod
+    def file_name(view: str) -> str:
+        """Turn a view name into a safe file name."""
+
+        return re.sub(r"[^\w.-]", "_", view)
+
+    @staticmethod
+    def write(path: pathlib.Path, data: bytes) -> None:
+        """Replace a file at once, so readers never see it half written."""
+
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, suffix=".tmp", delete=False
+        ) as file:
+            file.write(data)
+        os.replace(file.name, path)
+
+    @staticmethod
+    def collapsed(stacks: Counter) -> bytes:
+        """Render stack counts in the collapsed format."""
+
+        return "".join(
+            f"{stack} {count}\n" for stack, count in stacks.most_common()
+        ).encode("utf-8")
+
+    def record(self, view: str, profiler: cProfile.Profile, stacks: Counter):
+        """Add one request's profile to its view."""
+
+        with self._lock:
+            if view in self.stats:
+                self.stats[view].add(profiler)
+            else:
+                self.stats[view] = pstats.Stats(profiler)
+            self.stacks.setdefault(view, Counter()).update(stacks)
+            self.requests[view] += 1
+            self._changed.add(view)
+        self.flush()
+
+    def flush(self, force: bool = False) -> None:
+        """Write the views profiled since the last flush to this process's files."""
+
+        if not force and time.monotonic() - self._flushed_at < self.flush_interval:
+            return
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._flushed_at = time.monotonic()
+            with self._lock:
+                changed = {
+                    view: (
+                        marshal.dumps(self.stats[view].stats),
+                        self.collapsed(self.stacks[view]),
+                    )
+                    for view in self._changed
+                }
+                self._changed.clear()
+            if not changed:
+                return
+            directory = self.directory / str(self.identity or os.getpid())
+            directory.mkdir(parents=True, exist_ok=True)
+            for view, (stats, stacks) in changed.items():
+                name = self.file_name(view)
+                self.write(directory / f"{name}.prof", stats)
+                self.write(directory / f"{name}.collapsed", stacks)
+        finally:
+            self._flush_lock.release()
+
+    def merge(self) -> list[str]:
+        """Sum the files of every process per view and return the file names."""
+
+        self.flush(force=True)
+        profiles: dict[str, list] = {}
+        for path in sorted(self.directory.glob("*/*.prof")):
+            profiles.setdefault(path.stem, []).append(path)
+        for name, paths in profiles.items():
+            stats = pstats.Stats(*map(str, paths))
+            stacks: Counter = Counter()
+            for path in paths:
+                try:
+                    lines = path.with_suffix(".collapsed").read_text("utf-8")
+                except OSError:
+                    continue
+                for line in lines.splitlines():
+                    stack, count = line.rsplit(" ", 1)
+                    stacks[stack] += int(count)
+            stats.dump_stats(self.directory / f"{name}.prof")
+            self.write(self.directory / f"{name}.collapsed", self.collapsed(stacks))
+
+        return sorted(profiles)
+
+
+class SamplingProfilerMiddleware:
+    """
+    Profile PROFILING_SAMPLE_RATE of requests with cProfile and a stack sampler.
+
+    A request is also profiled when its PROFILING_HEADER matches
+    PROFILING_TOKEN. Requests that are not sampled only pay for one random
+    draw, so a low rate can stay on in production.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        settings = conf.settings
+        self.sample_rate: float = settings.PROFILING_SAMPLE_RATE
+        self.header = "HTTP_" + settings.PROFILING_HEADER.upper().replace("-", "_")
+        self.token = settings.PROFILING_TOKEN
+        self.interval: float = settings.PROFILING_INTERVAL
+        self.store = ProfileStore(
+            settings.PROFILING_DIR, settings.PROFILING_FLUSH_INTERVAL
+        )
+        self.random = random.Random()
+
+    def should_profile(self, request) -> bool:
+        """Decide whether to profile a request."""
+
+        flag = request.META.get(self.header)
+        if flag is not None and self.token:
+            return hmac.compare_digest(flag.encode(), self.token.encode())
+
+        return self.sample_rate > 0 and self.random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler, such as silk's, already runs in this thread.
+            return self.get_response(request)
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+            stacks = sampler.stop()
+        match = request.resolver_match
+        view = (match.view_name or match.route) if match else "unresolved"
+        self.store.record(view, profiler, stacks)
+
+        return response
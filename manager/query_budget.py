@@ -0,0 +1,120 @@
+"""Fail requests that run more SQL queries than their view allows."""
+
+from collections import defaultdict
+import re
+import traceback
+
+from django import conf
+from django.db import connection
+
+
+class QueryBudgetError(AssertionError):
+    """A request ran more queries than the query_budget of its view."""
+
+
+def get_query_budget(view_class, method: str):
+    """
+    Return the budget of a view for one HTTP method.
+
+    ``query_budget`` is a class attribute holding either one number for
+    every method or a dict by method. Views without one have no budget.
+
+    :return: The maximum number of queries or None.
+    :rtype: int
+    """
+
+    budget = getattr(view_class, "query_budget", None)
+    if isinstance(budget, dict):
+        return budget.get(method)
+
+    return budget
+
+
+def normalize_sql(sql: str) -> str:
+    """Replace literals, so queries differing only in values compare equal."""
+
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+\b", "?", sql)
+
+    return re.sub(r"\(\?(?:, \?)*\)", "(...)", sql)
+
+
+class QueryLog:
+    """Execute wrapper keeping every query of a request with its call site."""
+
+    def __init__(self):
+        self.queries: list[tuple[str, traceback.StackSummary]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        stack = traceback.StackSummary.extract(
+            traceback.walk_stack(None), lookup_lines=False
+        )
+        self.queries.append((sql, stack))
+
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    @staticmethod
+    def project_frames(stack: traceback.StackSummary) -> list:
+        """Keep the frames of this project, innermost last."""
+
+        base_dir = str(conf.settings.BASE_DIR.parent)
+        frames = [
+            frame
+            for frame in reversed(stack)
+            if frame.filename.startswith(base_dir)
+            and "site-packages" not in frame.filename
+        ]
+
+        return traceback.StackSummary.from_list(frames).format()
+
+    def report(self) -> str:
+        """Describe the queries run more than once and where they came from."""
+
+        duplicates = defaultdict(list)
+        for sql, stack in self.queries:
+            duplicates[normalize_sql(sql)].append(stack)
+
+        lines = []
+        for sql, stacks in sorted(duplicates.items(), key=lambda item: -len(item[1])):
+            if len(stacks) < 2:
+                continue
+            lines.append(f"{len(stacks)}x {sql}")
+            lines.extend(
+                "    " + line
+                for frame in self.project_frames(stacks[0])
+                for line in frame.rstrip().splitlines()
+            )
+
+        return "\n".join(lines) or "No duplicate queries."
+
+
+class QueryBudgetMiddleware:
+    """
+    Raise QueryBudgetError when a request exceeds the query_budget of its view.
+
+    Meant for development and tests only: every query records its stack.
+    Queries run while a streaming response is consumed are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        log = QueryLog()
+        with connection.execute_wrapper(log):
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view_class = getattr(match.func, "view_class", None) if match else None
+        budget = get_query_budget(view_class, request.method)
+        if budget is not None and len(log) > budget:
+            raise QueryBudgetError(
+                f"{request.method} {request.path} ran {len(log)} queries, "
+                f"{view_class.__name__}.query_budget allows {budget}.\n"
+                f"{log.report()}"
+            )
+
+        return response
@@ -86,3 +86,155 @@ class TeamSerializer(serializers.ModelSerializer):
 
         model = models.Team
         fields = "__all__"
+
+
+class StandingSerializer(serializers.ModelSerializer):
+    """Serialize Standing fields."""
+
+    class Meta:
+        """Specify fields to serialize."""
+
+        model = models.Standing
+        fields = "__all__"
+
+
+class ShortlistEntrySerializer(serializers.ModelSerializer):
+    """Serialize ShortlistEntry fields."""
+
+    class Meta:
+        """Specify fields to serialize."""
+
+        model = models.ShortlistEntry
+        fields = "__all__"
+
+
+class TransferSerializer(serializers.ModelSerializer):
+    """Serialize Transfer fields, a bid names the player, buyer and price."""
+
+    class Meta:
+        """Specify fields to serialize."""
+
+        model = models.Transfer
+        fields = "__all__"
+        read_only_fields = ("seller", "asking_price", "status")
+
+
+class SquadPlayerSerializer(serializers.ModelSerializer):
+    """Serialize a player of a squad."""
+
+    class Meta:
+        """Specify fields to serialize."""
+
+        model = models.Player
+        fields = (
+            "id",
+            "first_name",
+            "last_name",
+            "country",
+            "position",
+            "status",
+            "price",
+            "salary",
+            "overall",
+        )
+
+
+class SquadManagerSerializer(serializers.ModelSerializer):
+    """Serialize the manager of a squad."""
+
+    class Meta:
+        """Specify fields to serialize."""
+
+        model = models.Manager
+        fields = ("id", "first_name", "last_name", "country")
+
+
+class SquadCountrySerializer(serializers.ModelSerializer):
+    """Serialize the country of a league."""
+
+    class Meta:
+        """Specify fields to serialize."""
+
+        model = models.Country
+        fields = ("id", "name")
+
+
+class SquadLeagueSerializer(serializers.ModelSerializer):
+    """Serialize a league with its country."""
+
+    country = SquadCountrySerializer(read_only=True)
+
+    class Meta:
+        """Specify fields to serialize."""
+
+        model = models.League
+        fields = ("id", "name", "division", "country")
+
+
+class SquadSerializer(serializers.ModelSerializer):
+    """Serialize a team with its manager, owner id and players."""
+
+    manager = SquadManagerSerializer(read_only=True)
+    owner = serializers.PrimaryKeyRelatedField(read_only=True)
+    players = SquadPlayerSerializer(many=True, read_only=True)
+
+    class Meta:
+        """Specify fields to serialize."""
+
+        model = models.Team
+        fields = (
+            "id",
+            "name",
+            "num_players",
+            "value",
+            "budget",
+            "has_manager",
+            "updated_at",
+            "manager",
+            "owner",
+            "players",
+        )
+
+
+class TeamSquadSerializer(SquadSerializer):
+    """Serialize a squad with its league."""
+
+    league = SquadLeagueSerializer(read_only=True)
+
+    class Meta(SquadSerializer.Meta):
+        """Specify fields to serialize."""
+
+        fields = SquadSerializer.Meta.fields + ("league",)
+
+
+class LeagueSquadsSerializer(SquadLeagueSerializer):
+    """Serialize a league with the squads of all its teams."""
+
+    teams = SquadSerializer(many=True, read_only=True, source="team_set")
+
+    class Meta(SquadLeagueSerializer.Meta):
+        """Specify fields to serialize."""
+
+        fields = SquadLeagueSerializer.Meta.fields + ("teams",)
+
+
+class PlayerRatingSerializer(serializers.Serializer):
+    """Serialize computed ratings of a player."""
+
+    # pylint: disable=abstract-method
+    player = serializers.IntegerField()
+    position = serializers.CharField()
+    overall = serializers.IntegerField()
+    categories = serializers.DictField(child=serializers.IntegerField())
+
+
+class SimilarPlayerSerializer(serializers.Serializer):
+    """Serialize a player found by a similarity search."""
+
+    # pylint: disable=abstract-method
+    player = serializers.IntegerField()
+    team = serializers.IntegerField(allow_null=True)
+    position = serializers.CharField()
+    status = serializers.CharField(allow_null=True)
+    price = serializers.IntegerField()
+    distance = serializers.FloatField()
@@ -7,6 +7,132 @@ This layer will call models.
 This helps implement the principle: make models as fat as necessary but not views.
 """
 
+from manager.subservices.benchmark_services import (
+    DEV_MIDDLEWARE,  # noqa: F401
+    MIN_DELTA_MS,  # noqa: F401
+    benchmark_endpoints,  # noqa: F401
+    benchmark_list_serialization,  # noqa: F401
+    benchmark_service_calls,  # noqa: F401
+    benchmark_settings,  # noqa: F401
+    compare_results,  # noqa: F401
+    describe_settings,  # noqa: F401
+    measure,  # noqa: F401
+    server_name,  # noqa: F401
+)
+from manager.subservices.export_services import (
+    EXPORT_FORMATS,  # noqa: F401
+    EXPORT_MODELS,  # noqa: F401
+    export_rows,  # noqa: F401
+)
+from manager.subservices.import_services import (
+    import_players,  # noqa: F401
+    read_rows,  # noqa: F401
+)
+from manager.subservices.load_services import (
+    INTERFACES,  # noqa: F401
+    SCENARIOS,  # noqa: F401
+    LoadWorld,  # noqa: F401
+    cleanup_load,  # noqa: F401
+    prepare_load,  # noqa: F401
+    run_level,  # noqa: F401
+)
+from manager.subservices.match_services import (
+    TeamStrengths,  # noqa: F401
+    get_team_strengths,  # noqa: F401
+    simulate_match,  # noqa: F401
+    simulate_matchday,  # noqa: F401
+    simulate_matches,  # noqa: F401
+)
+from manager.subservices.prediction_services import (
+    SeasonOdds,  # noqa: F401
+    benchmark_season_odds,  # noqa: F401
+    season_odds,  # noqa: F401
+    simulate_odds,  # noqa: F401
+)
+from manager.subservices.rating_services import (
+    RATING_FIELDS,  # noqa: F401
+    PlayerRatings,  # noqa: F401
+    apply_ratings,  # noqa: F401
+    benchmark_ratings,  # noqa: F401
+    rate_league,  # noqa: F401
+    rate_players,  # noqa: F401
+    rate_snapshot,  # noqa: F401
+    reconcile_ratings,  # noqa: F401
+    top_players,  # noqa: F401
+)
+from manager.subservices.reference_services import (
+    get_countries,  # noqa: F401
+    get_leagues,  # noqa: F401
+)
+from manager.subservices.scouting_services import (
+    ScoutingError,  # noqa: F401
+    attribute_weights,  # noqa: F401
+    benchmark_shortlists,  # noqa: F401
+    benchmark_similar,  # noqa: F401
+    find_similar,  # noqa: F401
+    get_shortlist,  # noqa: F401
+    nearest_rows,  # noqa: F401
+    save_shortlists,  # noqa: F401
+    scout_teams,  # noqa: F401
+    shortlist_candidates,  # noqa: F401
+    shortlist_rows,  # noqa: F401
+    team_levels,  # noqa: F401
+    team_needs,  # noqa: F401
+)
+from manager.subservices.season_services import (
+    generate_fixtures,  # noqa: F401
+    get_standings,  # noqa: F401
+    play_round,  # noqa: F401
+    rebuild_standings,  # noqa: F401
+    record_results,  # noqa: F401
+    round_robin,  # noqa: F401
+)
+from manager.subservices.snapshot_services import (
+    PlayerSnapshot,  # noqa: F401
+    SnapshotError,  # noqa: F401
+    build_snapshot,  # noqa: F401
+    open_snapshot,  # noqa: F401
+    read_manifest,  # noqa: F401
+    refresh_snapshot,  # noqa: F401
+)
+from manager.subservices.sync_services import (
+    SYNC_MODELS,  # noqa: F401
+    SyncExpired,  # noqa: F401
+    bulk_deletions,  # noqa: F401
+    log_deletion,  # noqa: F401
+    prune_deletions,  # noqa: F401
+    sync_feed,  # noqa: F401
+)
+from manager.subservices.team_services import (
+    adjust_team_totals,  # noqa: F401
+    deferred_team_totals,  # noqa: F401
+    get_league_squads,  # noqa: F401
+    get_team_squads,  # noqa: F401
+    reconcile_teams,  # noqa: F401
+    team_totals_delta,  # noqa: F401
+)
+from manager.subservices.transfer_services import (
+    TransferError,  # noqa: F401
+    complete_transfer,  # noqa: F401
+    lock_teams,  # noqa: F401
+    make_bid,  # noqa: F401
+)
+from manager.subservices.valuation_services import (
+    Valuation,  # noqa: F401
+    ValuationError,  # noqa: F401
+    benchmark_valuation,  # noqa: F401
+    load_valuation,  # noqa: F401
+    lock_chunk,  # noqa: F401
+    model_prices,  # noqa: F401
+    price_players,  # noqa: F401
+    revalue_players,  # noqa: F401
+    value_deltas,  # noqa: F401
+)
+from manager.subservices.world_services import (
+    World,  # noqa: F401
+    generate_world,  # noqa: F401
+)
+
 
 # def get_error(message, status_code):
 #     """Form error message"""
@@ -1,10 +1,14 @@
 """Signals to trigger on events."""
 
+import copy
+
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save, pre_save
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
 
-from manager import models
+from manager import authentication, cache, models, services
 
 
 UserModel = get_user_model()
@@ -24,8 +28,115 @@ def create_manager(sender, instance, created, **kwargs):
     )
 
 
+@receiver([post_save, post_delete], sender=UserModel)
+def invalidate_user_credentials(sender, instance, **kwargs):
+    """Verify a user's credentials again after any change to the user."""
+
+    authentication.invalidate_credentials(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Token)
+def invalidate_token_credentials(sender, instance, **kwargs):
+    """Verify tokens again after one is created, rotated or deleted."""
+
+    authentication.invalidate_credentials(instance.user_id)
+
+
+@receiver(user_logged_out)
+def invalidate_logged_out_credentials(sender, user, **kwargs):
+    """Forget cached credentials of a user who logs out."""
+
+    if user is not None:
+        authentication.invalidate_credentials(user.pk)
+
+
+@receiver([post_save, post_delete], sender=models.AttributeCategory)
+@receiver([post_save, post_delete], sender=models.Country)
+@receiver([post_save, post_delete], sender=models.League)
+def invalidate_reference_cache(sender, **kwargs):
+    """Make every process reload a reference model after it changes."""
+
+    # pylint: disable=protected-access
+    cache.reference_cache.bump_on_commit(sender._meta.model_name)
+
+
 @receiver(pre_save, sender=models.AttributeCategory)
 def check_attribute_category(sender, instance, *args, **kwargs):
     """Validate AttributeCategory data before creating new entry."""
 
     instance.full_clean()
+
+
+@receiver(pre_save, sender=models.Player)
+def update_player_ratings(sender, instance, update_fields=None, **kwargs):
+    """
+    Recompute stored ratings only if a saved attribute or the position changed.
+
+    With ``update_fields``, attributes changed but not saved keep their
+    stored values in the ratings and stay marked as changed; Player.save
+    adds the rating fields to the fields saved.
+    """
+
+    changed = instance.changed_attributes()
+    if update_fields is None:
+        if changed:
+            services.apply_ratings([instance])
+        return
+
+    saved = changed & set(update_fields)
+    if not saved:
+        return
+    unsaved = instance.saved_attributes(changed - saved)
+    rated = copy.copy(instance)
+    rated.__dict__.update(unsaved)
+    services.apply_ratings([rated])
+    for field in services.RATING_FIELDS:
+        setattr(instance, field, getattr(rated, field))
+    instance.remember_attributes(unsaved)
+
+
+@receiver(pre_save, sender=models.Player)
+def load_counted_team_totals(sender, instance, **kwargs):
+    """Read what team totals count for a player saved without being loaded."""
+
+    if instance.pk is None or instance.counted_team_totals() is not None:
+        return
+
+    counted = sender.objects.filter(pk=instance.pk).values_list("team_id", "price")
+    instance.remember_team_totals(counted.first() or (None, 0))
+
+
+@receiver(post_save, sender=models.Player)
+def update_team_totals(sender, instance, update_fields=None, **kwargs):
+    """Move the player's count and price between team totals as needed."""
+
+    old = instance.counted_team_totals()
+    team_id, price = instance.team_id, instance.price
+    if update_fields is not None and old is not None:
+        if not {"team", "team_id"} & set(update_fields):
+            team_id = old[0]
+        if "price" not in update_fields:
+            price = old[1]
+
+    services.adjust_team_totals(services.team_totals_delta([(old, (team_id, price))]))
+    instance.remember_team_totals((team_id, price))
+
+
+@receiver(post_delete, sender=models.Player)
+def remove_from_team_totals(sender, instance, **kwargs):
+    """Take a deleted player out of its team totals."""
+
+    old = instance.counted_team_totals() or (instance.team_id, instance.price)
+    services.adjust_team_totals(services.team_totals_delta([(old, None)]))
+
+
+def log_deletion(sender, instance, **kwargs):
+    """Leave a tombstone when a row of a synced model is deleted."""
+
+    services.log_deletion(sender, instance.pk)
+
+
+# Connected to synced models only, so deletes of other models stay fast
+# deletes that neither load their rows nor send signals.
+for _model in services.SYNC_MODELS.values():
+    post_delete.connect(log_deletion, sender=_model)
@@ -2,6 +2,7 @@
 
 from django import conf
 from django.db import models
+from django.utils import timezone
 
 
 MAX_LENGTH = conf.settings.MAX_LENGTH
@@ -11,7 +12,7 @@ class BaseModel(models.Model):
     """Abstract model for other models to inherit."""
 
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         """Abstract base class for models."""
@@ -19,6 +20,31 @@ class BaseModel(models.Model):
         abstract = True
 
 
+class DeletionLog(models.Model):
+    """
+    Tombstone of a deleted BaseModel row, for clients syncing changes.
+
+    Not a BaseModel itself so that deleting tombstones logs nothing.
+    """
+
+    model_name = models.CharField(max_length=MAX_LENGTH)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        """Index tombstones for per-model feeds in deletion order."""
+
+        indexes = [
+            models.Index(
+                fields=["model_name", "deleted_at", "id"],
+                name="deletion_log_feed",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.model_name} {self.object_id}"
+
+
 class Country(BaseModel):
     """
     Country model.
@@ -10,6 +10,11 @@ from manager.submodels import base_models, user_models
 UserModel = get_user_model()
 MAX_LENGTH = settings.MAX_LENGTH
 DEFAULT_ATTRIBUTE_VALUE = settings.DEFAULT_ATTRIBUTE_VALUE
+ATTRIBUTES: list[str] = list(dict.fromkeys(settings.ATTRIBUTES))
+# Fields the stored ratings of a player are computed from.
+RATED_FIELDS: list[str] = [*ATTRIBUTES, "position"]
+# Stored ratings of a player, one per category and the overall rating.
+RATING_FIELDS: list[str] = [*settings.CATEGORIES, "overall"]
 
 
 def generate_choices(choices):
@@ -47,10 +52,8 @@ class Team(base_models.BaseModel):
         null=True,
         on_delete=models.SET_NULL,
     )
-    num_players = models.PositiveSmallIntegerField(
-        default=settings.DEFAULT_INITIAL_PLAYER_NUMBER,
-        editable=False,
-    )
+    # Totals of the team's players, kept up to date as players change.
+    num_players = models.PositiveSmallIntegerField(default=0, editable=False)
     budget = models.PositiveBigIntegerField(
         default=settings.DEFAULT_BUDGET, editable=False
     )
@@ -59,9 +62,7 @@ class Team(base_models.BaseModel):
         null=False,
         on_delete=models.CASCADE,
     )
-    value = models.PositiveBigIntegerField(
-        default=settings.DEFAULT_VALUE, editable=False
-    )
+    value = models.PositiveBigIntegerField(default=0, editable=False)
     earning = models.PositiveBigIntegerField(default=0, editable=False)
     has_manager = models.BooleanField(default=False)
     starting_manager_salary = models.PositiveBigIntegerField(
@@ -121,6 +122,108 @@ class Player(base_models.BaseEmployee):
     form = models.PositiveSmallIntegerField(default=DEFAULT_ATTRIBUTE_VALUE)
     morale = models.PositiveBigIntegerField(default=DEFAULT_ATTRIBUTE_VALUE)
     join_date = models.DateField(null=False)
+    physique = models.PositiveSmallIntegerField(default=0, editable=False)
+    playmaking = models.PositiveSmallIntegerField(default=0, editable=False)
+    shooting = models.PositiveSmallIntegerField(default=0, editable=False)
+    defending = models.PositiveSmallIntegerField(default=0, editable=False)
+    setpiece = models.PositiveSmallIntegerField(default=0, editable=False)
+    skill = models.PositiveSmallIntegerField(default=0, editable=False)
+    overall = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    class Meta:
+        """Index stored ratings for top N queries."""
+
+        indexes = [
+            models.Index(
+                fields=["team", "position", "-overall"],
+                name="player_team_position_overall",
+            ),
+            models.Index(
+                fields=["position", "-overall"],
+                name="player_position_overall",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember loaded attributes to detect which ones change later."""
+
+        instance = super().from_db(db, field_names, values)
+        instance.remember_attributes()
+        if "team_id" in instance.__dict__ and "price" in instance.__dict__:
+            instance.remember_team_totals()
+
+        return instance
+
+    def save(self, *args, update_fields=None, **kwargs):
+        """Save the stored ratings with any rated field that is saved."""
+
+        if update_fields is not None and self.changed_attributes() & set(update_fields):
+            update_fields = [*update_fields, *RATING_FIELDS]
+
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+    def remember_attributes(self, unsaved=None):
+        """
+        Take the current attribute values and position as the saved ones.
+
+        ``unsaved`` maps attributes changed but not saved to their saved values.
+        """
+
+        self._saved_attributes = {
+            attribute: self.__dict__[attribute]
+            for attribute in RATED_FIELDS
+            if attribute in self.__dict__
+        }
+        self._saved_attributes.update(unsaved or {})
+
+    def remember_team_totals(self, counted=None):
+        """Remember the ``(team_id, price)`` counted in team totals, or current."""
+
+        self._counted_team_totals = counted or (self.team_id, self.price)
+
+    def counted_team_totals(self):
+        """
+        Return the ``(team_id, price)`` counted in team totals for this player.
+
+        :return: None for a player never saved, or not loaded from the database.
+        :rtype: tuple
+        """
+
+        return getattr(self, "_counted_team_totals", None)
+
+    def saved_attributes(self, attributes) -> dict:
+        """Return the saved values of attributes, read if they were not loaded."""
+
+        saved = getattr(self, "_saved_attributes", None) or {}
+        values = {name: saved[name] for name in attributes if name in saved}
+        missing = [name for name in attributes if name not in values]
+        if missing and self.pk is not None:
+            # pylint: disable=no-member
+            values.update(
+                type(self).objects.filter(pk=self.pk).values(*missing).first() or {}
+            )
+
+        return values
+
+    def changed_attributes(self) -> set[str]:
+        """
+        Return attributes that differ from the last loaded or saved values.
+
+        The position counts as an attribute here since the overall rating
+        depends on it. Every attribute of an unsaved player counts as changed.
+        """
+
+        saved = getattr(self, "_saved_attributes", None)
+        if saved is None:
+            return set(RATED_FIELDS)
+
+        return {
+            attribute
+            for attribute in RATED_FIELDS
+            if attribute in self.__dict__
+            and self.__dict__[attribute] != saved.get(attribute)
+        }
 
 
 class BaseOffer(base_models.BaseModel):
@@ -233,6 +336,144 @@ class ManagerNegotiation(BaseNegotiation):
     )
 
 
+class Fixture(base_models.BaseModel):
+    """Scheduled league match between two teams."""
+
+    league = models.ForeignKey(
+        to=League,
+        null=False,
+        on_delete=models.CASCADE,
+    )
+    round = models.PositiveSmallIntegerField()
+    home_team = models.ForeignKey(
+        to=Team,
+        null=False,
+        on_delete=models.CASCADE,
+        related_name="home_fixtures",
+    )
+    away_team = models.ForeignKey(
+        to=Team,
+        null=False,
+        on_delete=models.CASCADE,
+        related_name="away_fixtures",
+    )
+    played = models.BooleanField(default=False)
+
+    class Meta:
+        """Index fixtures by round within a league."""
+
+        indexes = [
+            models.Index(fields=["league", "played", "round"], name="fixture_round"),
+        ]
+
+    def __str__(self):
+        return f"{self.round}: {self.home_team_id} - {self.away_team_id}"
+
+
+class Match(base_models.BaseModel):
+    """Result of a simulated match between two teams."""
+
+    fixture = models.OneToOneField(
+        to=Fixture,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name="match",
+    )
+
+    league = models.ForeignKey(
+        to=League,
+        null=True,
+        on_delete=models.CASCADE,
+    )
+    home_team = models.ForeignKey(
+        to=Team,
+        null=False,
+        on_delete=models.CASCADE,
+        related_name="home_matches",
+    )
+    away_team = models.ForeignKey(
+        to=Team,
+        null=False,
+        on_delete=models.CASCADE,
+        related_name="away_matches",
+    )
+    home_goals = models.PositiveSmallIntegerField()
+    away_goals = models.PositiveSmallIntegerField()
+
+    def __str__(self):
+        return (
+            f"{self.home_team_id} {self.home_goals}-{self.away_goals} "
+            f"{self.away_team_id}"
+        )
+
+
+class Standing(base_models.BaseModel):
+    """Row of a league table, updated as each result comes in."""
+
+    league = models.ForeignKey(
+        to=League,
+        null=False,
+        on_delete=models.CASCADE,
+    )
+    team = models.ForeignKey(
+        to=Team,
+        null=False,
+        on_delete=models.CASCADE,
+    )
+    played = models.PositiveSmallIntegerField(default=0)
+    won = models.PositiveSmallIntegerField(default=0)
+    drawn = models.PositiveSmallIntegerField(default=0)
+    lost = models.PositiveSmallIntegerField(default=0)
+    goals_for = models.PositiveIntegerField(default=0)
+    goals_against = models.PositiveIntegerField(default=0)
+    goal_difference = models.IntegerField(default=0)
+    points = models.PositiveIntegerField(default=0)
+    form = models.CharField(max_length=settings.STANDING_FORM_LENGTH, default="")
+
+    class Meta:
+        """One row per team in a league, ordered as in the table."""
+
+        constraints = [
+            models.UniqueConstraint(fields=["league", "team"], name="standing_team"),
+        ]
+        indexes = [
+            models.Index(
+                fields=["league", "-points", "-goal_difference", "-goals_for"],
+                name="standing_table",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.team_id}: {self.points}"
+
+
+class ShortlistEntry(base_models.BaseModel):
+    """Player ranked on the scouting shortlist of a team, rebuilt nightly."""
+
+    team = models.ForeignKey(
+        to=Team,
+        null=False,
+        on_delete=models.CASCADE,
+    )
+    player = models.ForeignKey(
+        to=Player,
+        null=False,
+        on_delete=models.CASCADE,
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        """One player per rank of a team, read in rank order."""
+
+        constraints = [
+            models.UniqueConstraint(fields=["team", "rank"], name="shortlist_rank"),
+        ]
+
+    def __str__(self):
+        return f"{self.team_id} #{self.rank}: {self.player_id}"
+
+
 class AttributeCategory(base_models.BaseModel):
     """Model to map each attribute to a category."""
 
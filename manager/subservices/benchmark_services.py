@@ -0,0 +1,373 @@
+"""Time endpoints and services on a generated world and compare runs."""
+
+import itertools
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.urls import get_resolver, reverse
+import numpy as np
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from manager import encoders, serializers
+from manager.submodels import core_models
+from manager.subservices import (
+    export_services,
+    match_services,
+    rating_services,
+    reference_services,
+    season_services,
+    sync_services,
+    team_services,
+    transfer_services,
+    world_services,
+)
+
+
+UserModel = get_user_model()
+PERCENTILES = [50, 95, 99]
+# Differences below these are noise, whatever the tolerance.
+MIN_DELTA_MS = 1.0
+MIN_DELTA_KB = 64.0
+# Development middleware recording every request or query costs more than
+# most views, so benchmarks run without it.
+DEV_MIDDLEWARE = ("silk.", "debug_toolbar.", "manager.query_budget.")
+
+
+class QueryCounter:
+    """Execute wrapper counting queries."""
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+def measure(call, repeat: int, warmup: int = 1) -> dict:
+    """
+    Call ``call(i)`` with a new ``i`` each time and summarize the calls.
+
+    Calls are timed without tracing; one more call runs under tracemalloc to
+    find the peak of memory allocated by Python during a call.
+
+    :return: Latency percentiles and mean in milliseconds, the most queries
+        of a call and the peak memory in KiB.
+    :rtype: dict
+    """
+
+    index = itertools.count()
+    for _ in range(warmup):
+        call(next(index))
+    seconds = []
+    queries = 0
+    for _ in range(repeat):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            call(next(index))
+            seconds.append(time.perf_counter() - start)
+        queries = max(queries, counter.queries)
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    call(next(index))
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    if not tracing:
+        tracemalloc.stop()
+
+    milliseconds = np.array(seconds) * 1000
+    result = {
+        f"p{percentile}_ms": float(value)
+        for percentile, value in zip(
+            PERCENTILES, np.percentile(milliseconds, PERCENTILES), strict=True
+        )
+    }
+    result.update(
+        mean_ms=float(milliseconds.mean()),
+        queries=queries,
+        peak_memory_kb=max(peak, 0) / 1024,
+        calls=repeat,
+    )
+
+    return result
+
+
+def server_name() -> str:
+    """Return a host name accepted by ALLOWED_HOSTS."""
+
+    return next(
+        (host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"),
+        "localhost",
+    )
+
+
+def benchmark_settings() -> dict:
+    """
+    Return the settings to override while benchmarking.
+
+    DEBUG is turned off, so connections do not keep every query, and the
+    development middleware is removed.
+    """
+
+    return {
+        "DEBUG": False,
+        "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, server_name()],
+        "MIDDLEWARE": [
+            middleware
+            for middleware in settings.MIDDLEWARE
+            if not middleware.startswith(DEV_MIDDLEWARE)
+        ],
+    }
+
+
+def describe_settings() -> dict:
+    """Describe the settings a benchmark runs under, for its report."""
+
+    return {
+        "module": settings.SETTINGS_MODULE,
+        "debug": settings.DEBUG,
+        "middleware": list(settings.MIDDLEWARE),
+    }
+
+
+def measure_isolated(call, repeat: int) -> dict:
+    """Measure a call, rolling back each one so every call sees the same data."""
+
+    def isolated(i):
+        with transaction.atomic():
+            call(i)
+            transaction.set_rollback(True)
+
+    return measure(isolated, repeat)
+
+
+def _get(world, i):  # pylint: disable=unused-argument
+    return "get", {}, {}
+
+
+# Request of each named URL as ``(method, URL kwargs, data)`` for call i.
+# Other URLs without arguments are read with a plain GET.
+ENDPOINT_REQUESTS = {
+    "register": lambda world, i: (
+        "post",
+        {},
+        {
+            "email": f"{world.prefix.split()[1].lower()}-{i}@example.com",
+            "password": "x",
+        },
+    ),
+    "league-standings": lambda world, i: ("get", {"pk": world.league_ids[0]}, {}),
+    "league-squads": lambda world, i: ("get", {"pk": world.league_ids[0]}, {}),
+    "team-squad": lambda world, i: ("get", {"pk": int(world.team_ids[0])}, {}),
+    "team-shortlist": lambda world, i: ("get", {"pk": int(world.team_ids[0])}, {}),
+    "sync": lambda world, i: ("get", {"model": "player"}, {}),
+    "export": lambda world, i: ("get", {"model": "players"}, {}),
+    "transfer-complete": lambda world, i: (
+        "post",
+        {"pk": int(world.transfer_ids[i % len(world.transfer_ids)])}
+        if len(world.transfer_ids)
+        else {"pk": 0},
+        {},
+    ),
+    "player-ratings": lambda world, i: ("get", {}, {"league": world.league_ids[0]}),
+    "similar-players": lambda world, i: (
+        "get",
+        {},
+        {"player": int(world.player_ids[i % len(world.player_ids)])},
+    ),
+}
+
+
+def benchmark_endpoints(world, repeat: int, names=None) -> dict:
+    """
+    Measure every URL of the manager app, as the owner of the world.
+
+    Responses that are not 2xx or 3xx are counted under ``errors``. URLs
+    with arguments but no entry in ENDPOINT_REQUESTS are skipped. Every call
+    runs in its own rolled back savepoint, so the changes of
+    registrations or completed transfers do not reach the next call.
+    """
+
+    client = APIClient(SERVER_NAME=server_name())
+    client.force_authenticate(UserModel.objects.get(pk=world.owner_id))
+    results = {}
+    for pattern in get_resolver("manager.urls").url_patterns:
+        name = pattern.name
+        if names is not None and name not in names:
+            continue
+        build = ENDPOINT_REQUESTS.get(name)
+        if build is None:
+            if pattern.pattern.converters:
+                continue
+            build = _get
+        errors = []
+
+        def call(i, build=build, name=name, errors=errors):
+            method, kwargs, data = build(world, i)
+            response = getattr(client, method)(reverse(name, kwargs=kwargs), data)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+
+        results[name] = measure_isolated(call, repeat)
+        results[name]["errors"] = len(errors)
+
+    return results
+
+
+SERVICE_CALLS = {
+    "rate_league": lambda world, i: rating_services.rate_league(world.league_ids[0]),
+    "top_players": lambda world, i: list(
+        rating_services.top_players(league=world.league_ids[0])
+    ),
+    "get_countries": lambda world, i: reference_services.get_countries(),
+    "get_leagues": lambda world, i: reference_services.get_leagues(),
+    "get_standings": lambda world, i: list(
+        season_services.get_standings(world.league_ids[0])
+    ),
+    "get_team_strengths": lambda world, i: match_services.get_team_strengths(
+        world.team_ids.tolist()
+    ),
+    "simulate_matchday": lambda world, i: match_services.simulate_matchday(
+        world.league_ids[:1], seed=i
+    ),
+    "sync_feed": lambda world, i: sync_services.sync_feed("player"),
+    "export_rows": lambda world, i: list(
+        export_services.export_rows("players", "ndjson")[1]
+    ),
+    "make_bid": lambda world, i: transfer_services.make_bid(
+        core_models.Player.objects.get(id=world.player_ids[i % len(world.player_ids)]),
+        core_models.Team.objects.get(id=world.team_ids[-1 - i % 2]),
+        settings.DEFAULT_PLAYER_VALUE,
+    ),
+    "reconcile_teams": lambda world, i: team_services.reconcile_teams(),
+    "reconcile_ratings": lambda world, i: rating_services.reconcile_ratings(),
+}
+
+
+def benchmark_service_calls(world, repeat: int, names=None) -> dict:
+    """Measure the service functions of SERVICE_CALLS, each on the same world."""
+
+    results = {}
+    for name, service in SERVICE_CALLS.items():
+        if names is not None and name not in names:
+            continue
+
+        def call(i, service=service):
+            try:
+                service(world, i)
+            except transfer_services.TransferError:
+                pass
+
+        results[name] = measure_isolated(call, repeat)
+
+    return results
+
+
+def benchmark_list_serialization(sizes: list[int], repeat: int, seed: int = 0) -> dict:
+    """
+    Render lists of teams through TeamSerializer and through its row encoder.
+
+    A world of one league is generated for every size. Both paths fetch and
+    render the whole list as the team endpoint does, and their bytes are
+    compared once.
+
+    :return: Measurements of both paths and the p50 speedup, by size.
+    :rtype: dict
+    """
+
+    renderer = JSONRenderer()
+    encoder = encoders.get_row_encoder(serializers.TeamSerializer)
+    results = {}
+    for size in sizes:
+        world = world_services.generate_world(
+            countries=1,
+            leagues_per_country=1,
+            teams_per_league=size,
+            players_per_team=0,
+            transfers=0,
+            seed=seed,
+        )
+        # pylint: disable=no-member
+        queryset = core_models.Team.objects.filter(
+            name__startswith=world.prefix
+        ).order_by("updated_at", "id")
+
+        def serialize(i, queryset=queryset):  # pylint: disable=unused-argument
+            return renderer.render(serializers.TeamSerializer(queryset, many=True).data)
+
+        def encode(i, queryset=queryset):  # pylint: disable=unused-argument
+            return renderer.render(
+                encoder.encode(list(queryset.values(*encoder.names)))
+            )
+
+        identical = serialize(0) == encode(0)
+        serializer_path = measure(serialize, repeat)
+        values_path = measure(encode, repeat)
+        results[str(size)] = {
+            "rows": size,
+            "identical": identical,
+            "serializer": serializer_path,
+            "values": values_path,
+            "speedup": serializer_path["p50_ms"] / max(values_path["p50_ms"], 1e-9),
+        }
+
+    return results
+
+
+def compare_results(
+    baseline: dict,
+    current: dict,
+    tolerance: float = 0.2,
+    min_delta_ms: float = MIN_DELTA_MS,
+) -> list[dict]:
+    """
+    List the measurements of current that regressed from baseline.
+
+    A case regresses when its p95 latency or peak memory grew by more than
+    ``tolerance`` and by more than the noise floor, or when it runs more
+    queries than before. Cases missing from either run are ignored.
+    """
+
+    limits = {
+        "p95_ms": min_delta_ms,
+        "peak_memory_kb": MIN_DELTA_KB,
+    }
+    regressions = []
+    for section in ["endpoints", "services"]:
+        for name, now in current.get(section, {}).items():
+            before = baseline.get(section, {}).get(name)
+            if before is None:
+                continue
+            for metric, floor in limits.items():
+                delta = now[metric] - before[metric]
+                if delta > floor and now[metric] > before[metric] * (1 + tolerance):
+                    regressions.append(
+                        {
+                            "case": f"{section}.{name}",
+                            "metric": metric,
+                            "baseline": before[metric],
+                            "current": now[metric],
+                        }
+                    )
+            if now["queries"] > before["queries"]:
+                regressions.append(
+                    {
+                        "case": f"{section}.{name}",
+                        "metric": "queries",
+                        "baseline": before["queries"],
+                        "current": now["queries"],
+                    }
+                )
+
+    return regressions
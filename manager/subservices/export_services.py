@@ -0,0 +1,108 @@
+"""Stream full or incremental table snapshots as NDJSON or CSV."""
+
+import csv
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from manager.submodels import core_models
+
+
+EXPORT_CHUNK_SIZE: int = settings.EXPORT_CHUNK_SIZE
+EXPORT_MODELS = {
+    "players": core_models.Player,
+    "teams": core_models.Team,
+    "transfers": core_models.Transfer,
+}
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+class Echo:
+    """File-like object handing back what is written, for csv.writer."""
+
+    @staticmethod
+    def write(value: str) -> str:
+        """Return the written value instead of storing it."""
+
+        return value
+
+
+def get_export_fields(model) -> list[str]:
+    """Return the column names of a model, foreign keys as ``<name>_id``."""
+
+    # pylint: disable=protected-access
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def get_export_queryset(model, since=None, until=None):
+    """
+    Select the rows of a model updated in ``[since, until)`` as dicts.
+
+    Rows come in ``(updated_at, id)`` order, so the last ``updated_at`` of
+    an export is a safe ``since`` for the next incremental export.
+    """
+
+    queryset = model.objects.all()
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    if until is not None:
+        queryset = queryset.filter(updated_at__lt=until)
+
+    return queryset.order_by("updated_at", "id").values(*get_export_fields(model))
+
+
+def iter_ndjson(rows):
+    """Yield one JSON document per row."""
+
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(row) + "\n"
+
+
+def iter_csv(rows, fields: list[str]):
+    """Yield a CSV header line then one line per row."""
+
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(
+            [
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in (row[field] for field in fields)
+            ]
+        )
+
+
+def export_rows(
+    name: str,
+    data_format: str = "ndjson",
+    since=None,
+    until=None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+):
+    """
+    Lazily render the rows of an exportable model.
+
+    Rows are read with a server-side iterator, ``chunk_size`` at a time,
+    and rendered one by one, so memory does not grow with the table.
+
+    :return: Content type and an iterator of text lines.
+    :rtype: tuple
+    """
+
+    if name not in EXPORT_MODELS:
+        raise KeyError(f"Unknown export {name!r}")
+    if data_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format {data_format!r}, expected ndjson or csv")
+
+    model = EXPORT_MODELS[name]
+    rows = get_export_queryset(model, since, until).iterator(chunk_size=chunk_size)
+    if data_format == "csv":
+        lines = iter_csv(rows, get_export_fields(model))
+    else:
+        lines = iter_ndjson(rows)
+
+    return EXPORT_FORMATS[data_format], lines
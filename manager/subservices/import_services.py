@@ -0,0 +1,271 @@
+"""Stream large player datasets into the database."""
+
+import csv
+import datetime
+import itertools
+import json
+import pathlib
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from manager.cache import reference_cache
+from manager.submodels import base_models, core_models
+from manager.subservices import rating_services, team_services
+
+
+ATTRIBUTES: list[str] = rating_services.ATTRIBUTES
+IMPORT_CHUNK_SIZE: int = settings.IMPORT_CHUNK_SIZE
+INTEGER_FIELDS = ["price", "salary", "earning", *ATTRIBUTES]
+DEFAULT_STATUS = "NOT FOR SALE"
+DEFAULT_FREE_STATUS = "FREE AGENT"
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+def read_rows(path, data_format=None):
+    """
+    Yield the rows of a CSV or JSON lines file one at a time.
+
+    The format is taken from the file extension unless given.
+    """
+
+    path = pathlib.Path(path)
+    data_format = data_format or FORMATS.get(path.suffix.lower())
+    if data_format not in FORMATS.values():
+        raise ValueError(f"Unknown format of {path}, expected csv or jsonl")
+
+    with open(path, newline="", encoding="utf-8") as file:
+        if data_format == "csv":
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def chunked(rows, size: int):
+    """Yield lists of at most size rows without reading ahead further."""
+
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, size)):
+        yield chunk
+
+
+def _text(row: dict, key: str) -> str:
+    """Return a stripped text value, empty if missing."""
+
+    value = row.get(key)
+
+    return "" if value is None else str(value).strip()
+
+
+class ForeignKeyCache:
+    """
+    Resolve country, league and team names to ids, once per name.
+
+    Names unseen in a chunk are looked up and created in bulk, so the number
+    of queries grows with the number of distinct names, not with rows.
+    """
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.countries: dict[str, int] = {}
+        self.leagues: dict[tuple, int] = {}
+        self.teams: dict[tuple, int] = {}
+
+    def resolve_countries(self, names) -> None:
+        """Cache the ids of countries, creating missing ones."""
+
+        missing = {name for name in names if name and name not in self.countries}
+        if not missing:
+            return
+        # pylint: disable=no-member
+        queryset = base_models.Country.objects.filter(name__in=missing)
+        existing = set(queryset.values_list("name", flat=True))
+        if missing - existing:
+            base_models.Country.objects.bulk_create(
+                [base_models.Country(name=name) for name in missing - existing]
+            )
+            reference_cache.bump_on_commit("country")
+        self.countries.update(queryset.values_list("name", "id"))
+
+    def resolve_leagues(self, keys) -> None:
+        """Cache the ids of ``(country_id, name, division)`` leagues."""
+
+        missing = {key for key in keys if key not in self.leagues}
+        if not missing:
+            return
+        # pylint: disable=no-member
+        queryset = core_models.League.objects.filter(
+            country_id__in={key[0] for key in missing},
+            name__in={key[1] for key in missing},
+        )
+        fields = ("country_id", "name", "division")
+        existing = set(queryset.values_list(*fields))
+        if missing - existing:
+            core_models.League.objects.bulk_create(
+                [
+                    core_models.League(**dict(zip(fields, key, strict=True)))
+                    for key in missing - existing
+                ]
+            )
+            reference_cache.bump_on_commit("league")
+        for *key, league_id in queryset.values_list(*fields, "id"):
+            self.leagues.setdefault(tuple(key), league_id)
+
+    def resolve_teams(self, keys) -> None:
+        """Cache the ids of ``(league_id, name)`` teams."""
+
+        missing = {key for key in keys if key not in self.teams}
+        if not missing:
+            return
+        # pylint: disable=no-member
+        queryset = core_models.Team.objects.filter(
+            league_id__in={key[0] for key in missing},
+            name__in={key[1] for key in missing},
+        )
+        existing = set(queryset.values_list("league_id", "name"))
+        core_models.Team.objects.bulk_create(
+            [
+                core_models.Team(
+                    league_id=league_id,
+                    name=name,
+                    owner=self.owner,
+                    num_players=0,
+                    value=0,
+                )
+                for league_id, name in missing - existing
+            ]
+        )
+        for league_id, name, team_id in queryset.values_list("league_id", "name", "id"):
+            self.teams.setdefault((league_id, name), team_id)
+
+    def resolve(self, rows: list[dict]) -> list[tuple]:
+        """
+        Resolve the foreign keys of a chunk of rows.
+
+        :return: ``(country_id, team_id)`` of every row.
+        :rtype: list
+        """
+
+        self.resolve_countries(
+            {_text(row, "country") for row in rows}
+            | {_text(row, "league_country") for row in rows}
+        )
+        league_keys = []
+        for row in rows:
+            league_key = None
+            if _text(row, "team"):
+                country = _text(row, "league_country") or _text(row, "country")
+                if not _text(row, "league") or not country:
+                    raise ValueError(
+                        f"Team {_text(row, 'team')} needs a league and a country"
+                    )
+                league_key = (
+                    self.countries[country],
+                    _text(row, "league"),
+                    int(_text(row, "division") or 1),
+                )
+            league_keys.append(league_key)
+        self.resolve_leagues({key for key in league_keys if key is not None})
+        team_keys = [
+            None if key is None else (self.leagues[key], _text(row, "team"))
+            for row, key in zip(rows, league_keys, strict=True)
+        ]
+        self.resolve_teams({key for key in team_keys if key is not None})
+
+        return [
+            (
+                self.countries.get(_text(row, "country")),
+                None if key is None else self.teams[key],
+            )
+            for row, key in zip(rows, team_keys, strict=True)
+        ]
+
+
+def build_player(row: dict, country_id, team_id) -> core_models.Player:
+    """Build an unsaved Player from a dataset row."""
+
+    position = _text(row, "position").upper()
+    if position not in settings.PLAYER_POSITIONS:
+        raise ValueError(f"Unknown position {position!r}")
+    status = _text(row, "status").upper()
+    if not status:
+        status = DEFAULT_STATUS if team_id is not None else DEFAULT_FREE_STATUS
+    if status not in settings.STATUS["player"]:
+        raise ValueError(f"Unknown status {status!r}")
+    join_date = _text(row, "join_date")
+
+    return core_models.Player(
+        first_name=_text(row, "first_name") or None,
+        last_name=_text(row, "last_name") or None,
+        country_id=country_id,
+        team_id=team_id,
+        position=position,
+        status=status,
+        join_date=(
+            datetime.date.fromisoformat(join_date)
+            if join_date
+            else datetime.date.today()
+        ),
+        **{
+            "salary": settings.DEFAULT_SALARY,
+            **{
+                field: int(float(row[field]))
+                for field in INTEGER_FIELDS
+                if _text(row, field)
+            },
+        },
+    )
+
+
+def import_players(rows, owner, chunk_size: int = IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Insert players from an iterable of dataset rows in constant memory.
+
+    Every chunk resolves its foreign keys through a cache shared by the
+    whole import, computes stored ratings and is inserted with one
+    ``bulk_create`` in its own transaction, along with one totals update
+    per team it touches. Teams created by the import start empty. A failing
+    chunk is rolled back alone and the error names its first row.
+
+    :return: Number of rows, elapsed seconds and rows per second.
+    :rtype: dict
+    """
+
+    cache = ForeignKeyCache(owner)
+    attribute_categories = rating_services.get_attribute_categories()
+    imported = 0
+    start = time.perf_counter()
+    for chunk in chunked(rows, chunk_size):
+        try:
+            with transaction.atomic():
+                keys = cache.resolve(chunk)
+                players = [
+                    build_player(row, country_id, team_id)
+                    for row, (country_id, team_id) in zip(chunk, keys, strict=True)
+                ]
+                rating_services.apply_ratings(players, attribute_categories)
+                # pylint: disable=no-member
+                core_models.Player.objects.bulk_create(players, batch_size=chunk_size)
+                team_services.adjust_team_totals(
+                    team_services.team_totals_delta(
+                        (None, (player.team_id, player.price)) for player in players
+                    )
+                )
+        except (DatabaseError, KeyError, TypeError, ValueError) as exc:
+            raise ValueError(
+                f"Invalid data in the chunk starting at row {imported + 1}: {exc}"
+            ) from exc
+        imported += len(chunk)
+        if progress is not None:
+            progress(imported, time.perf_counter() - start)
+
+    seconds = time.perf_counter() - start
+
+    return {
+        "rows": imported,
+        "seconds": seconds,
+        "rows_per_second": imported / max(seconds, 1e-9),
+    }
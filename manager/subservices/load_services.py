@@ -0,0 +1,410 @@
+"""Drive the WSGI or ASGI application in-process with concurrent scenarios."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import io
+import itertools
+import json
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.urls import reverse
+from django.utils import crypto
+from django.utils.module_loading import import_string
+import numpy as np
+from rest_framework.authtoken.models import Token
+
+from manager.submodels import base_models, core_models
+from manager.subservices import (
+    benchmark_services,
+    sync_services,
+    team_services,
+    world_services,
+)
+
+
+UserModel = get_user_model()
+PERCENTILES = benchmark_services.PERCENTILES
+INTERFACES = ["wsgi", "asgi"]
+
+
+@dataclass
+class Request:
+    """One HTTP request of a scenario."""
+
+    method: str
+    path: str
+    data: dict | None = None
+
+
+@dataclass
+class VirtualUser:
+    """A user driving scenarios, with a token and a team of its own."""
+
+    prefix: str
+    email: str
+    token: str
+    team_id: int
+    counter: itertools.count = field(default_factory=itertools.count)
+
+
+@dataclass
+class LoadWorld:
+    """Rows a load test runs against."""
+
+    world: world_services.World
+    users: list[VirtualUser]
+
+
+def register(world: LoadWorld, user: VirtualUser, rng) -> list[Request]:
+    """Register a new account."""
+
+    # pylint: disable=unused-argument
+    email = f"{user.prefix}-new-{user.team_id}-{next(user.counter)}@example.com"
+    password = crypto.get_random_string(12)
+
+    return [
+        Request("POST", reverse("register"), {"email": email, "password": password})
+    ]
+
+
+def list_teams(world: LoadWorld, user: VirtualUser, rng) -> list[Request]:
+    """Read the first page of teams."""
+
+    # pylint: disable=unused-argument
+    return [Request("GET", reverse("team-list"))]
+
+
+def create_team(world: LoadWorld, user: VirtualUser, rng) -> list[Request]:
+    """Create a team in a random league."""
+
+    league = int(rng.choice(world.world.league_ids))
+    name = f"{user.prefix} team {next(user.counter)}"
+
+    return [Request("POST", reverse("team-list"), {"name": name, "league": league})]
+
+
+def bid(world: LoadWorld, user: VirtualUser, rng) -> list[Request]:
+    """Look at the transfer list, then bid for a random player."""
+
+    player = int(rng.choice(world.world.player_ids))
+    offer = {
+        "player": player,
+        "buyer": user.team_id,
+        "offered_price": settings.DEFAULT_PLAYER_VALUE,
+        "contract": "BUY",
+    }
+
+    return [
+        Request("GET", reverse("transfer-list")),
+        Request("POST", reverse("transfer-list"), offer),
+    ]
+
+
+SCENARIOS = {
+    "register": register,
+    "list_teams": list_teams,
+    "create_team": create_team,
+    "bid": bid,
+}
+
+
+def prepare_load(users: int, seed: int = 0, **world_options) -> LoadWorld:
+    """
+    Generate a world and virtual users, each with a token and an empty team.
+
+    Rows are committed, as requests run on connections of other threads.
+    """
+
+    world = world_services.generate_world(seed=seed, **world_options)
+    prefix = world.prefix.split()[1].lower()
+    accounts = []
+    for i in range(users):
+        account = UserModel(email=f"{prefix}-user-{i}@example.com")
+        account.set_unusable_password()
+        accounts.append(account)
+    UserModel.objects.bulk_create(accounts)
+    accounts = list(
+        UserModel.objects.filter(email__startswith=f"{prefix}-user-").order_by("id")
+    )
+    # pylint: disable=no-member
+    tokens = Token.objects.bulk_create(
+        [Token(user=account, key=Token.generate_key()) for account in accounts]
+    )
+    core_models.Team.objects.bulk_create(
+        [
+            core_models.Team(
+                name=f"{world.prefix} user {account.pk}",
+                owner=account,
+                league_id=world.league_ids[0],
+                num_players=0,
+                value=0,
+            )
+            for account in accounts
+        ]
+    )
+    teams = dict(
+        core_models.Team.objects.filter(owner__in=accounts).values_list("owner", "id")
+    )
+
+    return LoadWorld(
+        world=world,
+        users=[
+            VirtualUser(
+                prefix=prefix,
+                email=account.email,
+                token=token.key,
+                team_id=teams[account.pk],
+            )
+            for account, token in zip(accounts, tokens, strict=True)
+        ],
+    )
+
+
+def cleanup_load(load: LoadWorld) -> None:
+    """
+    Delete every row created by prepare_load and by the scenarios.
+
+    The deletes run as querysets, with team totals recounted once and the
+    tombstones written in bulk afterwards.
+    """
+
+    with team_services.deferred_team_totals(), sync_services.bulk_deletions():
+        # pylint: disable=no-member
+        core_models.Player.objects.filter(
+            team__name__startswith=load.world.prefix
+        ).delete()
+        UserModel.objects.filter(email__startswith=load.users[0].prefix).delete()
+        base_models.Country.objects.filter(name__startswith=load.world.prefix).delete()
+
+
+def _body(request: Request) -> bytes:
+    return b"" if request.data is None else json.dumps(request.data).encode()
+
+
+def call_wsgi(application, request: Request, token: str) -> int:
+    """Send a request through a WSGI application and return the status code."""
+
+    body = _body(request)
+    host = benchmark_services.server_name()
+    environ = {
+        "REQUEST_METHOD": request.method,
+        "SCRIPT_NAME": "",
+        "PATH_INFO": request.path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": host,
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": host,
+        "HTTP_AUTHORIZATION": f"Token {token}",
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    status = []
+    result = application(environ, lambda code, headers: status.append(code))
+    try:
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+
+    return int(status[0].split()[0])
+
+
+async def call_asgi(application, request: Request, token: str) -> int:
+    """Send a request through an ASGI application and return the status code."""
+
+    body = _body(request)
+    host = benchmark_services.server_name()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": request.method,
+        "scheme": "http",
+        "path": request.path,
+        "raw_path": request.path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", host.encode()),
+            (b"authorization", f"Token {token}".encode()),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": (host, 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    finished = asyncio.Event()
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client stays connected until the response is complete.
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+        elif not message.get("more_body", False):
+            finished.set()
+
+    await application(scope, receive, send)
+    finished.set()
+
+    return status[0]
+
+
+def _pick(rng, names: list[str], weights: np.ndarray) -> str:
+    return names[rng.choice(len(names), p=weights)]
+
+
+def _normalized(mix: dict[str, float]) -> tuple[list[str], np.ndarray]:
+    names = list(mix)
+    weights = np.array([mix[name] for name in names], dtype=np.float64)
+
+    return names, weights / weights.sum()
+
+
+def _worker_wsgi(application, load, user, mix, seed, deadline) -> list[tuple]:
+    """Run scenarios for one virtual user until the deadline."""
+
+    rng = np.random.default_rng(seed)
+    names, weights = _normalized(mix)
+    records = []
+    try:
+        while time.perf_counter() < deadline:
+            name = _pick(rng, names, weights)
+            for request in SCENARIOS[name](load, user, rng):
+                start = time.perf_counter()
+                try:
+                    status = call_wsgi(application, request, user.token)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    status = 0
+                records.append((name, time.perf_counter() - start, status))
+    finally:
+        connections.close_all()
+
+    return records
+
+
+async def _worker_asgi(application, load, user, mix, seed, deadline) -> list[tuple]:
+    """Run scenarios for one virtual user until the deadline."""
+
+    rng = np.random.default_rng(seed)
+    names, weights = _normalized(mix)
+    records = []
+    while time.perf_counter() < deadline:
+        name = _pick(rng, names, weights)
+        for request in SCENARIOS[name](load, user, rng):
+            start = time.perf_counter()
+            try:
+                status = await call_asgi(application, request, user.token)
+            except Exception:  # pylint: disable=broad-exception-caught
+                status = 0
+            records.append((name, time.perf_counter() - start, status))
+
+    return records
+
+
+def summarize(records: list[tuple], seconds: float) -> dict:
+    """
+    Summarize ``(scenario, seconds, status)`` records of one level.
+
+    Status 0 stands for an exception. Statuses of 400 and above are errors.
+    """
+
+    latencies = np.array([record[1] for record in records]) * 1000
+    errors = sum(1 for record in records if not 0 < record[2] < 400)
+    result = {
+        "requests": len(records),
+        "errors": errors,
+        "error_rate": errors / max(len(records), 1),
+        "requests_per_second": len(records) / max(seconds, 1e-9),
+    }
+    if len(records):
+        result.update(
+            {
+                f"p{percentile}_ms": float(value)
+                for percentile, value in zip(
+                    PERCENTILES, np.percentile(latencies, PERCENTILES), strict=True
+                )
+            }
+        )
+    statuses: dict[str, dict[str, int]] = {}
+    for name, _, status in records:
+        counts = statuses.setdefault(name, {})
+        counts[str(status)] = counts.get(str(status), 0) + 1
+    result["statuses"] = statuses
+
+    return result
+
+
+def run_level(
+    load: LoadWorld,
+    interface: str,
+    concurrency: int,
+    duration: float,
+    mix: dict[str, float],
+    seed: int = 0,
+) -> dict:
+    """
+    Run ``concurrency`` virtual users for ``duration`` seconds.
+
+    WSGI users are threads calling WSGI_APPLICATION, ASGI users are asyncio
+    tasks awaiting ASGI_APPLICATION, both in this process.
+    """
+
+    if interface not in INTERFACES:
+        raise ValueError(f"Unknown interface {interface}, expected one of {INTERFACES}")
+    if concurrency > len(load.users):
+        raise ValueError(f"Only {len(load.users)} virtual users are prepared")
+
+    users = load.users[:concurrency]
+    start = time.perf_counter()
+    deadline = start + duration
+    if interface == "wsgi":
+        application = import_string(settings.WSGI_APPLICATION)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [
+                pool.submit(
+                    _worker_wsgi, application, load, user, mix, seed + i, deadline
+                )
+                for i, user in enumerate(users)
+            ]
+            records = [record for future in futures for record in future.result()]
+    else:
+        application = import_string(settings.ASGI_APPLICATION)
+
+        async def run():
+            return await asyncio.gather(
+                *(
+                    _worker_asgi(application, load, user, mix, seed + i, deadline)
+                    for i, user in enumerate(users)
+                )
+            )
+
+        records = [record for batch in asyncio.run(run()) for record in batch]
+    seconds = time.perf_counter() - start
+
+    return {
+        "interface": interface,
+        "concurrency": concurrency,
+        "seconds": seconds,
+        **summarize(records, seconds),
+    }
@@ -0,0 +1,207 @@
+"""Simulate matches between teams in vectorized batches."""
+
+from dataclasses import dataclass
+import functools
+import operator
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, F
+import numpy as np
+
+from manager.submodels import core_models
+
+
+MATCH_STRENGTH_ATTRIBUTES: dict[str, list[str]] = settings.MATCH_STRENGTH_ATTRIBUTES
+UNITS: list[str] = list(MATCH_STRENGTH_ATTRIBUTES)
+MATCH_AVERAGE_GOALS: float = settings.MATCH_AVERAGE_GOALS
+MATCH_HOME_ADVANTAGE: float = settings.MATCH_HOME_ADVANTAGE
+MATCH_STRENGTH_EXPONENT: float = settings.MATCH_STRENGTH_EXPONENT
+MATCH_BATCH_SIZE: int = settings.MATCH_BATCH_SIZE
+DEFAULT_ATTRIBUTE_VALUE: int = settings.DEFAULT_ATTRIBUTE_VALUE
+# Number of team ids per IN clause when aggregating strengths.
+STRENGTH_CHUNK_SIZE = 5000
+# Weakest opposition a unit is measured against, so that a team whose
+# defense and midfield are 0 does not concede infinitely many goals.
+MIN_OPPOSITION_STRENGTH = 1.0
+
+
+@dataclass
+class TeamStrengths:
+    """Strength of each unit of a set of teams, one row per team."""
+
+    team_ids: np.ndarray
+    units: np.ndarray
+
+    def rows(self, team_ids) -> np.ndarray:
+        """Return the strength rows of the given team ids."""
+
+        return self.units[np.searchsorted(self.team_ids, team_ids)]
+
+
+def get_team_strengths(team_ids) -> TeamStrengths:
+    """
+    Average the squad attributes of every team into unit strengths.
+
+    All teams are aggregated with one grouped query per chunk of ids. Teams
+    without players get the default attribute value in every unit.
+    """
+
+    team_ids = np.unique(np.asarray(list(team_ids), dtype=np.int64))
+    units = np.full((len(team_ids), len(UNITS)), DEFAULT_ATTRIBUTE_VALUE, float)
+    annotations = {
+        unit: Avg(functools.reduce(operator.add, map(F, attributes)))
+        for unit, attributes in MATCH_STRENGTH_ATTRIBUTES.items()
+    }
+    sizes = np.array([len(MATCH_STRENGTH_ATTRIBUTES[unit]) for unit in UNITS])
+    for start in range(0, len(team_ids), STRENGTH_CHUNK_SIZE):
+        chunk = team_ids[start : start + STRENGTH_CHUNK_SIZE].tolist()
+        # pylint: disable=no-member
+        rows = (
+            core_models.Player.objects.filter(team_id__in=chunk)
+            .values("team_id")
+            .annotate(**annotations)
+            .values_list("team_id", *UNITS)
+        )
+        for team_id, *values in rows:
+            units[np.searchsorted(team_ids, team_id)] = np.array(values) / sizes
+
+    return TeamStrengths(team_ids=team_ids, units=units)
+
+
+def expected_goals(home: np.ndarray, away: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the expected goals of both sides from their unit strengths.
+
+    A side's chances grow with its attack and midfield against the opposing
+    defense and midfield. Equal teams score MATCH_AVERAGE_GOALS on neutral
+    ground.
+    """
+
+    attack, midfield, defense = (
+        UNITS.index(unit) for unit in ["attack", "midfield", "defense"]
+    )
+
+    def threat(side, opponent):
+        ratio = (0.7 * side[:, attack] + 0.3 * side[:, midfield]) / np.maximum(
+            0.7 * opponent[:, defense] + 0.3 * opponent[:, midfield],
+            MIN_OPPOSITION_STRENGTH,
+        )
+        return MATCH_AVERAGE_GOALS * np.power(ratio, MATCH_STRENGTH_EXPONENT)
+
+    return threat(home, away) * MATCH_HOME_ADVANTAGE, threat(away, home)
+
+
+def sample_scores(home_goals, away_goals, rng: np.random.Generator):
+    """Draw a score line for every match from Poisson distributions."""
+
+    return rng.poisson(home_goals), rng.poisson(away_goals)
+
+
+def simulate_matches(
+    fixtures,
+    seed=None,
+    batch_size: int = MATCH_BATCH_SIZE,
+    strengths: TeamStrengths | None = None,
+) -> list:
+    """
+    Simulate and save matches for ``(home_id, away_id, league_id)`` fixtures.
+
+    A fourth ``fixture_id`` column links each result to its scheduled
+    Fixture. Team strengths are loaded once for all teams involved. Each
+    batch of fixtures is simulated with array operations and written with a
+    single ``bulk_create``.
+
+    :return: The created Match objects.
+    :rtype: list
+    """
+
+    fixtures = list(fixtures)
+    if not fixtures:
+        return []
+    fixtures = np.asarray(fixtures, dtype=object)
+    if fixtures.shape[1] == 3:
+        fixtures = np.column_stack([fixtures, np.full(len(fixtures), None)])
+    home_ids = fixtures[:, 0].astype(np.int64)
+    away_ids = fixtures[:, 1].astype(np.int64)
+    if strengths is None:
+        strengths = get_team_strengths(np.concatenate([home_ids, away_ids]))
+    rng = np.random.default_rng(seed)
+    created = []
+    for start in range(0, len(fixtures), batch_size):
+        end = start + batch_size
+        home_goals, away_goals = sample_scores(
+            *expected_goals(
+                strengths.rows(home_ids[start:end]),
+                strengths.rows(away_ids[start:end]),
+            ),
+            rng,
+        )
+        matches = [
+            core_models.Match(
+                home_team_id=home,
+                away_team_id=away,
+                league_id=league,
+                fixture_id=fixture,
+                home_goals=home_score,
+                away_goals=away_score,
+            )
+            for home, away, league, fixture, home_score, away_score in zip(
+                home_ids[start:end].tolist(),
+                away_ids[start:end].tolist(),
+                fixtures[start:end, 2].tolist(),
+                fixtures[start:end, 3].tolist(),
+                home_goals.tolist(),
+                away_goals.tolist(),
+                strict=True,
+            )
+        ]
+        # pylint: disable=no-member
+        created.extend(
+            core_models.Match.objects.bulk_create(matches, batch_size=batch_size)
+        )
+
+    return created
+
+
+def simulate_match(home_team, away_team, seed=None):
+    """Simulate and save a single match between two teams."""
+
+    league_id = home_team.league_id
+    if league_id != away_team.league_id:
+        league_id = None
+
+    return simulate_matches([(home_team.pk, away_team.pk, league_id)], seed=seed)[0]
+
+
+def pair_teams(team_ids, rng: np.random.Generator) -> list[tuple[int, int]]:
+    """Pair teams at random, leaving the last one out if their number is odd."""
+
+    shuffled = rng.permutation(np.asarray(team_ids, dtype=np.int64)).tolist()
+
+    return list(zip(shuffled[0::2], shuffled[1::2], strict=False))
+
+
+def simulate_matchday(leagues=None, seed=None) -> list:
+    """
+    Play one round across every league, each team facing a random opponent.
+
+    :return: The created Match objects.
+    :rtype: list
+    """
+
+    # pylint: disable=no-member
+    teams = core_models.Team.objects.order_by("league_id", "id")
+    if leagues is not None:
+        teams = teams.filter(league__in=leagues)
+    by_league: dict[int, list[int]] = {}
+    for team_id, league_id in teams.values_list("id", "league_id"):
+        by_league.setdefault(league_id, []).append(team_id)
+    rng = np.random.default_rng(seed)
+    fixtures = [
+        (home, away, league_id)
+        for league_id, team_ids in by_league.items()
+        for home, away in pair_teams(team_ids, rng)
+    ]
+    with transaction.atomic():
+        return simulate_matches(fixtures, seed=rng)
@@ -0,0 +1,225 @@
+"""Predict final league positions with Monte Carlo season simulations."""
+
+from concurrent import futures
+from dataclasses import dataclass
+import multiprocessing
+import os
+import time
+
+from django.conf import settings
+import numpy as np
+
+from manager.submodels import core_models
+from manager.subservices import match_services, season_services
+
+
+POINTS: dict[str, int] = settings.POINTS
+PREDICTION_CHUNK_SIZE: int = settings.PREDICTION_CHUNK_SIZE
+
+# Read-only season snapshot, set before the worker processes are forked.
+_snapshot: dict = {}
+
+
+@dataclass
+class SeasonOdds:
+    """Probability of every team finishing in every position."""
+
+    team_ids: np.ndarray
+    probabilities: np.ndarray
+    seasons: int
+
+    def as_dicts(self) -> list[dict]:
+        """Represent odds as one dict per team, favourites first."""
+
+        order = np.lexsort((self.team_ids, -self.probabilities[:, 0]))
+
+        return [
+            {
+                "team": int(self.team_ids[i]),
+                "title": float(self.probabilities[i, 0]),
+                "positions": self.probabilities[i].tolist(),
+            }
+            for i in order
+        ]
+
+
+def build_snapshot(units: np.ndarray, double: bool = True) -> dict:
+    """
+    Precompute everything a season simulation needs from team strengths.
+
+    The snapshot holds the expected goals of every fixture of a round robin
+    season and the team index of both sides.
+    """
+
+    rounds = season_services.round_robin(range(len(units)), double)
+    pairs = np.array([pair for pairs in rounds for pair in pairs], dtype=np.intp)
+    pairs = pairs.reshape(-1, 2)
+    home_goals, away_goals = match_services.expected_goals(
+        units[pairs[:, 0]], units[pairs[:, 1]]
+    )
+
+    return {
+        "num_teams": len(units),
+        "home": pairs[:, 0],
+        "away": pairs[:, 1],
+        "home_goals": home_goals,
+        "away_goals": away_goals,
+    }
+
+
+def simulate_seasons(snapshot: dict, seasons: int, seed) -> np.ndarray:
+    """
+    Simulate whole seasons at once and count finishing positions.
+
+    Every fixture of every season is drawn in one call per side. Points,
+    goal difference and goals are summed per team with matrix products
+    over one-hot fixture incidence matrices, and teams level on all of them
+    are ordered at random.
+
+    :return: Counts of shape ``(teams, positions)``.
+    :rtype: numpy.ndarray
+    """
+
+    rng = np.random.default_rng(seed)
+    num_teams = snapshot["num_teams"]
+    size = (seasons, len(snapshot["home"]))
+    home_goals = rng.poisson(snapshot["home_goals"], size=size)
+    away_goals = rng.poisson(snapshot["away_goals"], size=size)
+    home_points = np.select(
+        [home_goals > away_goals, home_goals == away_goals],
+        [POINTS["win"], POINTS["draw"]],
+        POINTS["loss"],
+    )
+    away_points = np.select(
+        [away_goals > home_goals, away_goals == home_goals],
+        [POINTS["win"], POINTS["draw"]],
+        POINTS["loss"],
+    )
+    # Float incidence matrices let the sums run through BLAS, exactly.
+    home = np.eye(num_teams)[snapshot["home"]]
+    away = np.eye(num_teams)[snapshot["away"]]
+    points = (home_points @ home + away_points @ away).astype(np.int64)
+    goals_for = (home_goals @ home + away_goals @ away).astype(np.int64)
+    goals_against = (away_goals @ home + home_goals @ away).astype(np.int64)
+    difference = goals_for - goals_against + 10**4
+    key = ((points * 10**5 + difference) * 10**4 + goals_for) * 10**3
+    key += rng.integers(0, 10**3, size=key.shape)
+    order = np.argsort(-key, axis=1)
+    counts = np.zeros((num_teams, num_teams), dtype=np.int64)
+    np.add.at(counts, (order, np.arange(num_teams)), 1)
+
+    return counts
+
+
+def _simulate_chunk(seasons: int, seed) -> np.ndarray:
+    """Simulate a chunk of seasons from the snapshot inherited by the worker."""
+
+    return simulate_seasons(_snapshot, seasons, seed)
+
+
+def simulate_odds(
+    units: np.ndarray,
+    seasons: int,
+    workers=None,
+    seed=None,
+    chunk_size: int = PREDICTION_CHUNK_SIZE,
+) -> np.ndarray:
+    """
+    Estimate finishing position probabilities from team unit strengths.
+
+    Seasons are split in chunks with independent random streams, so results
+    depend on the seed but not on the number of workers. With more than
+    one worker the chunks run in a pool of forked processes, which read the
+    snapshot from the memory of this process instead of receiving a copy.
+    Where processes cannot be forked, as on Windows, the chunks run here.
+
+    :return: Probabilities of shape ``(teams, positions)``.
+    :rtype: numpy.ndarray
+    """
+
+    snapshot = build_snapshot(np.asarray(units, dtype=np.float64))
+    sizes = [
+        min(chunk_size, seasons - start) for start in range(0, seasons, chunk_size)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(sizes))
+    if "fork" not in multiprocessing.get_all_start_methods():
+        # Spawned workers import this module before Django is set up.
+        workers = 1
+    counts = np.zeros((snapshot["num_teams"],) * 2, dtype=np.int64)
+    if workers <= 1:
+        for size, chunk_seed in zip(sizes, seeds, strict=True):
+            counts += simulate_seasons(snapshot, size, chunk_seed)
+    else:
+        _snapshot.update(snapshot)
+        try:
+            with futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                for chunk in executor.map(_simulate_chunk, sizes, seeds):
+                    counts += chunk
+        finally:
+            _snapshot.clear()
+
+    return counts / max(seasons, 1)
+
+
+def season_odds(
+    league,
+    seasons: int = 10000,
+    workers=None,
+    seed=None,
+) -> SeasonOdds:
+    """Estimate the finishing position probabilities of a league's teams."""
+
+    # pylint: disable=no-member
+    team_ids = list(
+        core_models.Team.objects.filter(league=league)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    strengths = match_services.get_team_strengths(team_ids)
+
+    return SeasonOdds(
+        team_ids=strengths.team_ids,
+        probabilities=simulate_odds(
+            strengths.units, seasons, workers=workers, seed=seed
+        ),
+        seasons=seasons,
+    )
+
+
+def benchmark_season_odds(
+    num_teams: int = 20,
+    seasons: int = 10000,
+    workers_list=None,
+    seed: int = 0,
+) -> list[dict]:
+    """
+    Measure seasons per second for each number of workers.
+
+    Teams get random unit strengths so that no database time is measured.
+    """
+
+    if workers_list is None:
+        workers_list = sorted({1, os.cpu_count() or 1})
+    rng = np.random.default_rng(seed)
+    units = rng.uniform(40, 90, size=(num_teams, len(match_services.UNITS)))
+    results = []
+    for workers in workers_list:
+        start = time.perf_counter()
+        simulate_odds(units, seasons, workers=workers, seed=seed)
+        seconds = time.perf_counter() - start
+        results.append(
+            {
+                "teams": num_teams,
+                "seasons": seasons,
+                "workers": workers,
+                "seconds": seconds,
+                "seasons_per_second": seasons / max(seconds, 1e-9),
+            }
+        )
+
+    return results
@@ -0,0 +1,402 @@
+"""Compute category and overall ratings of players in bulk."""
+
+from dataclasses import dataclass
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+import numpy as np
+
+from manager.cache import reference_cache
+from manager.submodels import core_models
+
+
+ATTRIBUTES: list[str] = list(dict.fromkeys(settings.ATTRIBUTES))
+CATEGORIES: list[str] = settings.CATEGORIES
+PLAYER_POSITIONS: list[str] = settings.PLAYER_POSITIONS
+POSITION_CATEGORY_WEIGHTS: dict = settings.POSITION_CATEGORY_WEIGHTS
+RATING_FIELDS: list[str] = core_models.RATING_FIELDS
+RATING_CHUNK_SIZE: int = settings.RATING_CHUNK_SIZE
+
+
+@dataclass
+class PlayerRatings:
+    """Ratings of a batch of players, one row per player."""
+
+    player_ids: np.ndarray
+    positions: np.ndarray
+    categories: np.ndarray
+    overall: np.ndarray
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    @property
+    def own_overall(self) -> np.ndarray:
+        """Overall rating of every player at their own position."""
+
+        return self.overall[np.arange(len(self)), self.positions]
+
+    def stored_values(self) -> np.ndarray:
+        """Ratings rounded as stored in the Player RATING_FIELDS columns."""
+
+        values = np.column_stack([self.categories, self.own_overall])
+
+        return np.rint(values).astype(np.int64).reshape(len(self), len(RATING_FIELDS))
+
+    def as_dicts(self) -> list[dict]:
+        """Represent ratings as one dict per player."""
+
+        categories = np.rint(self.categories).astype(int).tolist()
+        overall = np.rint(self.own_overall).astype(int).tolist()
+
+        return [
+            {
+                "player": player_id,
+                "position": PLAYER_POSITIONS[position],
+                "overall": overall[i],
+                "categories": dict(zip(CATEGORIES, categories[i], strict=True)),
+            }
+            for i, (player_id, position) in enumerate(
+                zip(self.player_ids.tolist(), self.positions.tolist(), strict=True)
+            )
+        ]
+
+
+def get_attribute_categories() -> dict[str, str]:
+    """Map every categorized attribute to its category, cached until changed."""
+
+    # pylint: disable=no-member
+    return reference_cache.get_or_set(
+        "attributecategory",
+        "mapping",
+        lambda: dict(
+            core_models.AttributeCategory.objects.values_list("attribute", "category")
+        ),
+    )
+
+
+def get_category_weights(attribute_categories: dict[str, str]) -> np.ndarray:
+    """
+    Build the category by attribute weight matrix.
+
+    A category rating is the mean of the attributes mapped to it. Attributes
+    without a category do not count toward any rating.
+
+    :return: Matrix of shape ``(len(CATEGORIES), len(ATTRIBUTES))``.
+    :rtype: numpy.ndarray
+    """
+
+    weights = np.zeros((len(CATEGORIES), len(ATTRIBUTES)), dtype=np.float64)
+    for attribute, category in attribute_categories.items():
+        weights[CATEGORIES.index(category), ATTRIBUTES.index(attribute)] = 1
+    counts = weights.sum(axis=1, keepdims=True)
+
+    return np.divide(weights, counts, out=weights, where=counts > 0)
+
+
+def get_position_weights() -> np.ndarray:
+    """
+    Build the position by category weight matrix from settings.
+
+    :return: Matrix of shape ``(len(PLAYER_POSITIONS), len(CATEGORIES))``.
+    :rtype: numpy.ndarray
+    """
+
+    weights = np.zeros((len(PLAYER_POSITIONS), len(CATEGORIES)), dtype=np.float64)
+    for i, position in enumerate(PLAYER_POSITIONS):
+        for category, weight in POSITION_CATEGORY_WEIGHTS[position].items():
+            weights[i, CATEGORIES.index(category)] = weight
+
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def rows_to_arrays(rows: list[tuple]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split ``(id, position, *ATTRIBUTES)`` rows into NumPy arrays."""
+
+    position_index = {position: i for i, position in enumerate(PLAYER_POSITIONS)}
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    positions = np.fromiter(
+        (position_index[row[1]] for row in rows), dtype=np.intp, count=len(rows)
+    )
+    matrix = np.array(
+        [row[2 : 2 + len(ATTRIBUTES)] for row in rows], dtype=np.float64
+    )
+
+    return ids, positions, matrix.reshape(len(rows), len(ATTRIBUTES))
+
+
+def load_attributes(players) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Load player ids, position indexes and the attribute matrix.
+
+    ``players`` is either a Player queryset, which is read with a single
+    ``values_list`` query, or an iterable of Player objects. Unsaved players
+    get the id 0.
+    """
+
+    if isinstance(players, QuerySet):
+        rows = list(players.values_list("id", "position", *ATTRIBUTES))
+    else:
+        rows = [
+            (
+                player.id or 0,
+                player.position,
+                *(getattr(player, attribute) for attribute in ATTRIBUTES),
+            )
+            for player in players
+        ]
+
+    return rows_to_arrays(rows)
+
+
+def compute_ratings(
+    matrix: np.ndarray,
+    category_weights: np.ndarray,
+    position_weights: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Compute category ratings and overall ratings at every position.
+
+    :return: Category ratings ``(players, categories)`` and overall ratings
+        ``(players, positions)``.
+    :rtype: tuple
+    """
+
+    categories = matrix @ category_weights.T
+
+    return categories, categories @ position_weights.T
+
+
+def rate_players(players, attribute_categories=None) -> PlayerRatings:
+    """Rate a queryset or list of players in one batched pass."""
+
+    if attribute_categories is None:
+        attribute_categories = get_attribute_categories()
+    ids, positions, matrix = load_attributes(players)
+    categories, overall = compute_ratings(
+        matrix,
+        get_category_weights(attribute_categories),
+        get_position_weights(),
+    )
+
+    return PlayerRatings(
+        player_ids=ids,
+        positions=positions,
+        categories=categories,
+        overall=overall,
+    )
+
+
+def rate_snapshot(snapshot, attribute_categories=None) -> PlayerRatings:
+    """Rate the live players of a memory-mapped snapshot without any query."""
+
+    if attribute_categories is None:
+        attribute_categories = get_attribute_categories()
+    live = snapshot.live()
+    categories, overall = compute_ratings(
+        snapshot.attributes[live].astype(np.float64),
+        get_category_weights(attribute_categories),
+        get_position_weights(),
+    )
+
+    return PlayerRatings(
+        player_ids=np.asarray(snapshot.ids[live]),
+        positions=snapshot.positions[live].astype(np.intp),
+        categories=categories,
+        overall=overall,
+    )
+
+
+def rate_league(league=None) -> PlayerRatings:
+    """Rate every player of a league, or of the whole database if None."""
+
+    # pylint: disable=no-member
+    players = core_models.Player.objects.all()
+    if league is not None:
+        players = players.filter(team__league=league)
+
+    return rate_players(players.order_by("id"))
+
+
+def apply_ratings(players: list, attribute_categories=None) -> list:
+    """Compute the stored rating fields of Player objects without saving them."""
+
+    if not players:
+        return players
+    ratings = rate_players(players, attribute_categories)
+    for player, values in zip(players, ratings.stored_values().tolist(), strict=True):
+        for field, value in zip(RATING_FIELDS, values, strict=True):
+            setattr(player, field, value)
+        player.remember_attributes()
+
+    return players
+
+
+def reconcile_ratings(chunk_size: int = RATING_CHUNK_SIZE, progress=None) -> dict:
+    """
+    Recompute stored ratings of all players and fix the ones that drifted.
+
+    Players are walked in primary key chunks. Each chunk costs one read and,
+    only if some rows changed, one ``bulk_update`` in its own transaction.
+    Run this after changing AttributeCategory or POSITION_CATEGORY_WEIGHTS.
+
+    :return: Number of players checked and updated.
+    :rtype: dict
+    """
+
+    category_weights = get_category_weights(get_attribute_categories())
+    position_weights = get_position_weights()
+    # pylint: disable=no-member
+    players = core_models.Player.objects.order_by("id")
+    checked = updated = 0
+    last_id = 0
+    while True:
+        rows = list(
+            players.filter(id__gt=last_id).values_list(
+                "id", "position", *ATTRIBUTES, *RATING_FIELDS
+            )[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        ids, positions, matrix = rows_to_arrays(rows)
+        categories, overall = compute_ratings(
+            matrix, category_weights, position_weights
+        )
+        fresh = PlayerRatings(ids, positions, categories, overall).stored_values()
+        stored = np.array([row[2 + len(ATTRIBUTES) :] for row in rows], dtype=np.int64)
+        changed = np.flatnonzero((fresh != stored).any(axis=1))
+        if len(changed):
+            now = timezone.now()
+            objs = [
+                core_models.Player(
+                    id=int(ids[i]),
+                    updated_at=now,
+                    **dict(zip(RATING_FIELDS, fresh[i].tolist(), strict=True)),
+                )
+                for i in changed
+            ]
+            with transaction.atomic():
+                core_models.Player.objects.bulk_update(
+                    objs, [*RATING_FIELDS, "updated_at"]
+                )
+        checked += len(rows)
+        updated += len(changed)
+        if progress is not None:
+            progress(checked, updated)
+
+    return {"checked": checked, "updated": updated}
+
+
+def top_players(
+    limit: int = 10,
+    rating: str = "overall",
+    position=None,
+    league=None,
+    team=None,
+) -> QuerySet:
+    """Return the best players by a stored rating, served from its index."""
+
+    if rating not in RATING_FIELDS:
+        raise ValueError(f"Unknown rating {rating}, expected one of {RATING_FIELDS}")
+    # pylint: disable=no-member
+    players = core_models.Player.objects.all()
+    if position is not None:
+        players = players.filter(position=position)
+    if league is not None:
+        players = players.filter(team__league=league)
+    if team is not None:
+        players = players.filter(team=team)
+
+    return players.order_by(f"-{rating}", "id")[:limit]
+
+
+def rate_players_loop(players, attribute_categories: dict[str, str]) -> list[dict]:
+    """
+    Rate players one object at a time in plain Python.
+
+    This is the reference implementation the vectorized engine is
+    benchmarked and tested against.
+    """
+
+    attributes = {category: [] for category in CATEGORIES}
+    for attribute, category in attribute_categories.items():
+        attributes[category].append(attribute)
+    ratings = []
+    for player in players:
+        categories = {}
+        for category, names in attributes.items():
+            total = sum(getattr(player, name) for name in names)
+            categories[category] = total / len(names) if names else 0.0
+        overall = {}
+        for position, weights in POSITION_CATEGORY_WEIGHTS.items():
+            total = sum(weights.values())
+            overall[position] = sum(
+                categories[category] * weight / total
+                for category, weight in weights.items()
+            )
+        ratings.append({"categories": categories, "overall": overall})
+
+    return ratings
+
+
+def benchmark_ratings(num_players: int, seed: int = 0) -> dict:
+    """
+    Time the vectorized engine against the per-object loop.
+
+    Players are built in memory with random attributes so that no database
+    time is measured. The vectorized time is split into reading attributes
+    off the objects and the matrix computation itself.
+    """
+
+    rng = np.random.default_rng(seed)
+    matrix = rng.integers(1, 100, size=(num_players, len(ATTRIBUTES)))
+    positions = rng.integers(0, len(PLAYER_POSITIONS), size=num_players)
+    attribute_categories = {
+        attribute: CATEGORIES[i % len(CATEGORIES)]
+        for i, attribute in enumerate(ATTRIBUTES)
+    }
+    players = [
+        core_models.Player(
+            id=i + 1,
+            position=PLAYER_POSITIONS[position],
+            **dict(zip(ATTRIBUTES, row, strict=True)),
+        )
+        for i, (row, position) in enumerate(
+            zip(matrix.tolist(), positions.tolist(), strict=True)
+        )
+    ]
+
+    start = time.perf_counter()
+    expected = rate_players_loop(players, attribute_categories)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ids, position_indexes, attributes = load_attributes(players)
+    load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    categories, overall = compute_ratings(
+        attributes,
+        get_category_weights(attribute_categories),
+        get_position_weights(),
+    )
+    compute_seconds = time.perf_counter() - start
+    ratings = PlayerRatings(ids, position_indexes, categories, overall)
+    vectorized_seconds = load_seconds + compute_seconds
+
+    loop_overall = np.array(
+        [[rating["overall"][p] for p in PLAYER_POSITIONS] for rating in expected]
+    ).reshape(ratings.overall.shape)
+
+    return {
+        "players": num_players,
+        "loop_seconds": loop_seconds,
+        "vectorized_seconds": vectorized_seconds,
+        "vectorized_load_seconds": load_seconds,
+        "vectorized_compute_seconds": compute_seconds,
+        "speedup": loop_seconds / max(vectorized_seconds, 1e-9),
+        "matches": bool(np.allclose(loop_overall, ratings.overall)),
+    }
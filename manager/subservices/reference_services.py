@@ -0,0 +1,30 @@
+"""Read countries and leagues through the versioned reference cache."""
+
+from manager.cache import reference_cache
+from manager.submodels import base_models, core_models
+
+
+def get_countries() -> dict[int, str]:
+    """Map every country id to its name."""
+
+    # pylint: disable=no-member
+    return reference_cache.get_or_set(
+        "country",
+        "names",
+        lambda: dict(base_models.Country.objects.values_list("id", "name")),
+    )
+
+
+def get_leagues() -> dict[int, dict]:
+    """Map every league id to its name, country id and division."""
+
+    def load():
+        # pylint: disable=no-member
+        return {
+            row["id"]: row
+            for row in core_models.League.objects.values(
+                "id", "name", "country_id", "division"
+            )
+        }
+
+    return reference_cache.get_or_set("league", "rows", load)
@@ -0,0 +1,642 @@
+"""Find similar players and shortlist the players who would improve teams."""
+
+from concurrent import futures
+import contextlib
+import multiprocessing
+import os
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+import numpy as np
+
+from manager.submodels import core_models
+from manager.subservices import rating_services, snapshot_services
+
+
+ATTRIBUTES: list[str] = rating_services.ATTRIBUTES
+CATEGORIES: list[str] = rating_services.CATEGORIES
+PLAYER_POSITIONS: list[str] = settings.PLAYER_POSITIONS
+PLAYER_STATUSES: list[str] = snapshot_services.PLAYER_STATUSES
+SCOUTING_BLOCK_SIZE: int = settings.SCOUTING_BLOCK_SIZE
+SCOUTING_MAX_RESULTS: int = settings.SCOUTING_MAX_RESULTS
+SHORTLIST_CHUNK_SIZE: int = settings.SHORTLIST_CHUNK_SIZE
+SHORTLIST_LENGTH: int = settings.SHORTLIST_LENGTH
+SHORTLIST_STATUSES: list[str] = settings.SHORTLIST_STATUSES
+SHORTLIST_TIME_LIMIT: float = settings.SHORTLIST_TIME_LIMIT
+SHORTLIST_WEAK_CATEGORIES: int = settings.SHORTLIST_WEAK_CATEGORIES
+
+# Read-only candidates, set before the worker processes are forked.
+_candidates: dict = {}
+
+
+class ScoutingError(Exception):
+    """A similarity search cannot be answered."""
+
+
+def attribute_weights(position=None, attribute_categories=None) -> np.ndarray:
+    """
+    Weigh ATTRIBUTES for distances between players.
+
+    At a position, an attribute weighs its share of the overall rating
+    there, so a striker is compared on shooting more than on tackling.
+    Without a position, or before attributes are categorized, all
+    attributes weigh the same.
+
+    :return: Weights summing to 1, one per attribute.
+    :rtype: numpy.ndarray
+    """
+
+    uniform = np.full(len(ATTRIBUTES), 1 / len(ATTRIBUTES))
+    if position is None:
+        return uniform
+    if attribute_categories is None:
+        attribute_categories = rating_services.get_attribute_categories()
+    weights = rating_services.get_position_weights()[
+        PLAYER_POSITIONS.index(position)
+    ] @ rating_services.get_category_weights(attribute_categories)
+    if not weights.sum():
+        return uniform
+
+    return weights / weights.sum()
+
+
+def _block_mask(snapshot, start, end, position, status, max_price, exclude):
+    mask = snapshot.alive[start:end] == 1
+    if position is not None:
+        mask &= snapshot.positions[start:end] == PLAYER_POSITIONS.index(position)
+    if status is not None:
+        mask &= snapshot.statuses[start:end] == PLAYER_STATUSES.index(status)
+    if max_price is not None:
+        mask &= snapshot.prices[start:end] <= max_price
+    if exclude is not None:
+        mask &= snapshot.ids[start:end] != exclude
+
+    return mask
+
+
+def nearest_rows(
+    snapshot,
+    vector: np.ndarray,
+    weights: np.ndarray,
+    k: int,
+    position=None,
+    status=None,
+    max_price=None,
+    exclude=None,
+    block_size: int = SCOUTING_BLOCK_SIZE,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the snapshot rows closest to a vector, closest first.
+
+    The distance is the weighted Euclidean distance between scaled
+    attribute vectors. Rows are scanned in blocks small enough for the
+    CPU caches: each block is filtered, its distances computed with one
+    matrix-vector product and its k best rows kept, so memory stays bounded
+    whatever the number of players. Ties go to the lowest player id.
+
+    :return: Row indexes and distances.
+    :rtype: tuple
+    """
+
+    vector = np.asarray(vector, dtype=np.float32)
+    weights = np.asarray(weights, dtype=np.float32)
+    rows, distances = [], []
+    for start in range(0, len(snapshot), block_size):
+        end = min(start + block_size, len(snapshot))
+        index = np.flatnonzero(
+            _block_mask(snapshot, start, end, position, status, max_price, exclude)
+        )
+        if not len(index):
+            continue
+        vectors = snapshot.vectors[start:end]
+        if len(index) < end - start:
+            vectors = vectors[index]
+        difference = vectors - vector
+        block = np.square(difference, out=difference) @ weights
+        if len(block) > k:
+            best = np.argpartition(block, k)[:k]
+            index, block = index[best], block[best]
+        rows.append(index + start)
+        distances.append(block)
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    rows = np.concatenate(rows)
+    distances = np.concatenate(distances)
+    order = np.lexsort((snapshot.ids[rows], distances))[:k]
+
+    return rows[order], np.sqrt(np.maximum(distances[order], 0))
+
+
+def _player_vector(snapshot, player_id: int) -> tuple[np.ndarray, str]:
+    """Read the scaled attributes and position of a player."""
+
+    row = np.searchsorted(snapshot.ids, player_id)
+    if row < len(snapshot) and snapshot.ids[row] == player_id and snapshot.alive[row]:
+        return snapshot.vectors[row], PLAYER_POSITIONS[snapshot.positions[row]]
+
+    # Players created since the last refresh are read from the database.
+    # pylint: disable=no-member
+    values = (
+        core_models.Player.objects.filter(id=player_id)
+        .values_list("position", *ATTRIBUTES)
+        .first()
+    )
+    if values is None:
+        raise ScoutingError(f"Unknown player {player_id}")
+
+    return (
+        np.array(values[1:], dtype=np.float32) / snapshot_services.ATTRIBUTE_SCALE,
+        values[0],
+    )
+
+
+def find_similar(
+    player=None,
+    profile: dict | None = None,
+    k: int = 10,
+    position=None,
+    status=None,
+    max_price=None,
+    snapshot=None,
+    attribute_categories=None,
+) -> list[dict]:
+    """
+    Find the k players most similar to a player or an attribute profile.
+
+    A player is compared with the attribute weights of its position and is
+    left out of its own results. A profile maps some ATTRIBUTES to values,
+    the others are ignored. Candidates can be restricted to a position, a
+    status and a maximum price. Players are read from the snapshot, which
+    is opened when not given.
+
+    :return: The players, closest first, with their distance.
+    :rtype: list
+    """
+
+    if (player is None) == (profile is None):
+        raise ScoutingError("Give either a player or an attribute profile")
+    if not 0 < k <= SCOUTING_MAX_RESULTS:
+        raise ScoutingError(f"k must be between 1 and {SCOUTING_MAX_RESULTS}")
+    if position is not None and position not in PLAYER_POSITIONS:
+        raise ScoutingError(f"Unknown position {position}")
+    if status is not None and status not in PLAYER_STATUSES:
+        raise ScoutingError(f"Unknown status {status}")
+    if snapshot is None:
+        snapshot = snapshot_services.open_snapshot()
+
+    if player is not None:
+        vector, own_position = _player_vector(snapshot, player)
+        weights = attribute_weights(own_position, attribute_categories)
+    else:
+        unknown = set(profile) - set(ATTRIBUTES)
+        if unknown or not profile:
+            raise ScoutingError(f"Unknown attributes {sorted(unknown)}")
+        vector = np.array(
+            [profile.get(attribute, 0) for attribute in ATTRIBUTES], dtype=np.float32
+        )
+        vector /= snapshot_services.ATTRIBUTE_SCALE
+        weights = np.isin(ATTRIBUTES, list(profile)) / len(profile)
+
+    rows, distances = nearest_rows(
+        snapshot, vector, weights, k, position, status, max_price, exclude=player
+    )
+
+    return [
+        {
+            "player": int(snapshot.ids[row]),
+            "team": int(snapshot.team_ids[row]) or None,
+            "position": PLAYER_POSITIONS[snapshot.positions[row]],
+            "status": (
+                PLAYER_STATUSES[snapshot.statuses[row]]
+                if snapshot.statuses[row] < len(PLAYER_STATUSES)
+                else None
+            ),
+            "price": int(snapshot.prices[row]),
+            "distance": float(distance) * snapshot_services.ATTRIBUTE_SCALE,
+        }
+        for row, distance in zip(rows.tolist(), distances.tolist(), strict=True)
+    ]
+
+
+def _synthetic_snapshot(num_players: int, rng) -> tuple:
+    """Build an in-memory snapshot of random players and attribute categories."""
+
+    attributes = rng.integers(30, 95, size=(num_players, len(ATTRIBUTES)))
+    snapshot = snapshot_services.PlayerSnapshot(
+        generation=0,
+        synced_at=timezone.now(),
+        ids=np.arange(1, num_players + 1, dtype=np.int64),
+        team_ids=rng.integers(1, 1000, size=num_players),
+        positions=rng.integers(0, len(PLAYER_POSITIONS), size=num_players).astype(
+            np.uint8
+        ),
+        statuses=rng.integers(0, len(PLAYER_STATUSES), size=num_players).astype(
+            np.uint8
+        ),
+        prices=rng.integers(10**5, 10**8, size=num_players),
+        alive=np.ones(num_players, dtype=np.uint8),
+        attributes=attributes.astype(np.uint16),
+        vectors=(attributes / snapshot_services.ATTRIBUTE_SCALE).astype(np.float32),
+    )
+    attribute_categories = {
+        attribute: CATEGORIES[i % len(CATEGORIES)]
+        for i, attribute in enumerate(ATTRIBUTES)
+    }
+
+    return snapshot, attribute_categories
+
+
+def benchmark_similar(
+    num_players: int, queries: int = 20, k: int = 10, seed: int = 0
+) -> dict:
+    """
+    Time similarity searches over an in-memory snapshot of random players.
+
+    No database time is measured. One search is checked against a full
+    sort of all distances.
+    """
+
+    rng = np.random.default_rng(seed)
+    snapshot, attribute_categories = _synthetic_snapshot(num_players, rng)
+    weights = attribute_weights()
+    targets = rng.integers(1, num_players + 1, size=queries)
+
+    seconds = []
+    for player in targets.tolist():
+        start = time.perf_counter()
+        find_similar(
+            player,
+            k=k,
+            snapshot=snapshot,
+            attribute_categories=attribute_categories,
+        )
+        seconds.append(time.perf_counter() - start)
+
+    rows, _ = nearest_rows(snapshot, snapshot.vectors[0], weights, k, exclude=1)
+    full = ((snapshot.vectors[1:] - snapshot.vectors[0]) ** 2) @ weights
+    expected = np.lexsort((snapshot.ids[1:], full))[:k] + 1
+
+    milliseconds = np.array(seconds) * 1000
+    return {
+        "players": num_players,
+        "queries": queries,
+        "k": k,
+        "p50_ms": float(np.percentile(milliseconds, 50)),
+        "p95_ms": float(np.percentile(milliseconds, 95)),
+        "max_ms": float(milliseconds.max()),
+        "matches": bool(np.array_equal(rows, expected)),
+    }
+
+
+def team_levels(
+    categories: np.ndarray, player_teams: np.ndarray, team_ids: np.ndarray
+) -> np.ndarray:
+    """
+    Average the category ratings of the players of every team.
+
+    ``team_ids`` must be sorted. Teams without players are rated 0.
+
+    :return: Levels of shape ``(teams, categories)``.
+    :rtype: numpy.ndarray
+    """
+
+    index = np.searchsorted(team_ids, player_teams)
+    member = index < len(team_ids)
+    member[member] = team_ids[index[member]] == player_teams[member]
+    index = index[member]
+    counts = np.bincount(index, minlength=len(team_ids))
+    sums = np.column_stack(
+        [
+            np.bincount(index, weights=column, minlength=len(team_ids))
+            for column in categories[member].T
+        ]
+    ).reshape(len(team_ids), len(CATEGORIES))
+
+    return sums / np.maximum(counts, 1)[:, None]
+
+
+def team_needs(
+    levels: np.ndarray, weak_categories: int = SHORTLIST_WEAK_CATEGORIES
+) -> np.ndarray:
+    """
+    Weigh the weakest categories of every team.
+
+    Only the ``weak_categories`` lowest categories of a team count, each
+    by how far it falls below the team's best category. Teams as good in
+    all of them weigh them the same.
+
+    :return: Need vectors of shape ``(teams, categories)``, summing to 1.
+    :rtype: numpy.ndarray
+    """
+
+    rows = np.arange(len(levels))[:, None]
+    weakest = np.argsort(levels, axis=1, kind="stable")[:, :weak_categories]
+    deficits = (levels.max(axis=1, keepdims=True) - levels)[rows, weakest]
+    totals = deficits.sum(axis=1, keepdims=True)
+    needs = np.zeros(levels.shape)
+    needs[rows, weakest] = np.divide(
+        deficits,
+        totals,
+        out=np.full(deficits.shape, 1 / weak_categories),
+        where=totals > 0,
+    )
+
+    return needs
+
+
+def shortlist_candidates(snapshot, ratings) -> dict:
+    """
+    Collect the players of SHORTLIST_STATUSES, cheapest first.
+
+    ``ratings`` are the ratings of the live rows of the snapshot. The
+    players are also indexed by team, so that a team skips its own.
+
+    :return: Ids, teams, prices and float32 category ratings of the players.
+    :rtype: dict
+    """
+
+    live = snapshot.live()
+    statuses = [PLAYER_STATUSES.index(status) for status in SHORTLIST_STATUSES]
+    keep = np.flatnonzero(np.isin(snapshot.statuses[live], statuses))
+    rows = live[keep]
+    order = np.lexsort((snapshot.ids[rows], snapshot.prices[rows]))
+    keep, rows = keep[order], rows[order]
+    teams = np.asarray(snapshot.team_ids[rows])
+    by_team = np.argsort(teams, kind="stable")
+
+    return {
+        "ids": np.asarray(snapshot.ids[rows]),
+        "prices": np.asarray(snapshot.prices[rows]),
+        "categories": ratings.categories[keep].astype(np.float32),
+        "teams": teams[by_team],
+        "by_team": by_team,
+    }
+
+
+def shortlist_rows(
+    candidates: dict,
+    team_ids: np.ndarray,
+    needs: np.ndarray,
+    levels: np.ndarray,
+    budgets: np.ndarray,
+    k: int = SHORTLIST_LENGTH,
+) -> dict:
+    """
+    Rank the candidates who would most improve each team.
+
+    The score of a player is the gain of the team's need-weighted level if
+    the player's category ratings replaced the team's average ones. Only
+    players of other teams, priced within the team's budget and with a
+    positive score are ranked. Ties go to the lowest player id.
+
+    :return: Team ids, ranks from 1, player ids and scores.
+    :rtype: dict
+    """
+
+    limits = np.searchsorted(candidates["prices"], budgets, side="right")
+    baselines = (needs * levels).sum(axis=1)
+    columns = {"teams": [], "ranks": [], "players": [], "scores": []}
+    for team_id, need, baseline, limit in zip(
+        team_ids.tolist(),
+        needs.astype(np.float32),
+        baselines.tolist(),
+        limits.tolist(),
+        strict=True,
+    ):
+        scores = candidates["categories"][:limit] @ need - baseline
+        start, end = np.searchsorted(candidates["teams"], [team_id, team_id + 1])
+        own = candidates["by_team"][start:end]
+        scores[own[own < limit]] = -np.inf
+        best = (
+            np.argpartition(scores, limit - k)[limit - k :]
+            if limit > k
+            else np.arange(limit)
+        )
+        best = best[scores[best] > 0]
+        best = best[np.lexsort((candidates["ids"][best], -scores[best]))]
+        columns["teams"].append(np.full(len(best), team_id, dtype=np.int64))
+        columns["ranks"].append(np.arange(1, len(best) + 1))
+        columns["players"].append(candidates["ids"][best])
+        columns["scores"].append(scores[best].astype(np.float64))
+
+    return {
+        name: np.concatenate(values) if values else np.zeros(0)
+        for name, values in columns.items()
+    }
+
+
+def _shortlist_chunk(team_ids, needs, levels, budgets, k) -> dict:
+    """Rank the candidates of the worker for a chunk of teams."""
+
+    return shortlist_rows(_candidates, team_ids, needs, levels, budgets, k)
+
+
+def _map_chunks(candidates: dict, chunks: list, workers: int):
+    """
+    Yield the shortlists of every chunk of teams in order.
+
+    With more than one worker the chunks run in a pool of forked processes,
+    which read the candidates from the memory of this process instead of
+    receiving a copy. Where processes cannot be forked, as on Windows, the
+    chunks run here. Closing the generator cancels the chunks not started
+    yet.
+    """
+
+    if "fork" not in multiprocessing.get_all_start_methods():
+        # Spawned workers import this module before Django is set up.
+        workers = 1
+    if workers <= 1:
+        for chunk in chunks:
+            yield shortlist_rows(candidates, *chunk)
+        return
+
+    _candidates.update(candidates)
+    try:
+        with futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            try:
+                yield from executor.map(_shortlist_chunk, *zip(*chunks, strict=True))
+            finally:
+                executor.shutdown(cancel_futures=True)
+    finally:
+        _candidates.clear()
+
+
+def save_shortlists(team_ids, rows: dict) -> int:
+    """
+    Replace the shortlists of some teams in one transaction.
+
+    :return: Number of entries written.
+    :rtype: int
+    """
+
+    entries = [
+        core_models.ShortlistEntry(
+            team_id=team_id, rank=rank, player_id=player_id, score=score
+        )
+        for team_id, rank, player_id, score in zip(
+            rows["teams"].tolist(),
+            rows["ranks"].tolist(),
+            rows["players"].tolist(),
+            rows["scores"].tolist(),
+            strict=True,
+        )
+    ]
+    # pylint: disable=no-member
+    with transaction.atomic():
+        core_models.ShortlistEntry.objects.filter(team_id__in=list(team_ids)).delete()
+        core_models.ShortlistEntry.objects.bulk_create(entries)
+
+    return len(entries)
+
+
+def scout_teams(
+    k: int = SHORTLIST_LENGTH,
+    workers=None,
+    chunk_size: int = SHORTLIST_CHUNK_SIZE,
+    time_limit: float = SHORTLIST_TIME_LIMIT,
+    directory=None,
+    progress=None,
+) -> dict:
+    """
+    Rebuild the scouting shortlist of every team.
+
+    The snapshot is refreshed and rated once. The need vector of every
+    team is computed up front from the average ratings of its players,
+    then teams are ranked in chunks, in a process pool when there are
+    several workers, and each chunk of shortlists is saved as soon as it
+    is ready. Teams left when ``time_limit`` seconds have passed keep
+    their previous shortlist.
+
+    :return: Number of teams, teams scouted, entries written, seconds and
+        whether every team was scouted.
+    :rtype: dict
+    """
+
+    start = time.perf_counter()
+    snapshot_services.refresh_snapshot(directory)
+    snapshot = snapshot_services.open_snapshot(directory)
+    ratings = rating_services.rate_snapshot(snapshot)
+    # pylint: disable=no-member
+    teams = np.array(
+        core_models.Team.objects.order_by("id").values_list("id", "budget"),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    team_ids, budgets = teams[:, 0], teams[:, 1]
+    levels = team_levels(
+        ratings.categories, np.asarray(snapshot.team_ids[snapshot.live()]), team_ids
+    )
+    needs = team_needs(levels)
+    candidates = shortlist_candidates(snapshot, ratings)
+    chunks = [
+        (
+            team_ids[i : i + chunk_size],
+            needs[i : i + chunk_size],
+            levels[i : i + chunk_size],
+            budgets[i : i + chunk_size],
+            k,
+        )
+        for i in range(0, len(team_ids), chunk_size)
+    ]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(chunks))
+
+    scouted = entries = 0
+    with contextlib.closing(_map_chunks(candidates, chunks, workers)) as results:
+        for chunk, rows in zip(chunks, results, strict=True):
+            entries += save_shortlists(chunk[0].tolist(), rows)
+            scouted += len(chunk[0])
+            if progress is not None:
+                progress(scouted, len(team_ids))
+            if time.perf_counter() - start > time_limit:
+                break
+
+    return {
+        "teams": len(team_ids),
+        "scouted": scouted,
+        "entries": entries,
+        "seconds": time.perf_counter() - start,
+        "complete": scouted == len(team_ids),
+    }
+
+
+def get_shortlist(team):
+    """Return the shortlist of a team in rank order, from one index range."""
+
+    # pylint: disable=no-member
+    return core_models.ShortlistEntry.objects.filter(team=team).order_by("rank")
+
+
+def benchmark_shortlists(
+    num_teams: int,
+    num_players: int,
+    k: int = SHORTLIST_LENGTH,
+    workers=None,
+    chunk_size: int = SHORTLIST_CHUNK_SIZE,
+    seed: int = 0,
+) -> dict:
+    """
+    Time the shortlists of random teams over an in-memory snapshot.
+
+    No database time is measured. The shortlist of the first team is
+    checked against a full sort of its candidates.
+    """
+
+    rng = np.random.default_rng(seed)
+    snapshot, attribute_categories = _synthetic_snapshot(num_players, rng)
+    snapshot.team_ids = rng.integers(1, num_teams + 1, size=num_players)
+    team_ids = np.arange(1, num_teams + 1, dtype=np.int64)
+    budgets = rng.integers(10**6, 10**8, size=num_teams)
+
+    start = time.perf_counter()
+    ratings = rating_services.rate_snapshot(snapshot, attribute_categories)
+    levels = team_levels(ratings.categories, snapshot.team_ids, team_ids)
+    needs = team_needs(levels)
+    candidates = shortlist_candidates(snapshot, ratings)
+    prepared = time.perf_counter()
+    chunks = [
+        (
+            team_ids[i : i + chunk_size],
+            needs[i : i + chunk_size],
+            levels[i : i + chunk_size],
+            budgets[i : i + chunk_size],
+            k,
+        )
+        for i in range(0, num_teams, chunk_size)
+    ]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(chunks))
+    shortlists = list(_map_chunks(candidates, chunks, workers))
+    end = time.perf_counter()
+
+    first = shortlists[0]
+    affordable = candidates["prices"] <= budgets[0]
+    affordable &= candidates["teams"][np.argsort(candidates["by_team"])] != 1
+    scores = candidates["categories"] @ needs[0].astype(np.float32) - (
+        needs[0] @ levels[0]
+    )
+    expected = np.flatnonzero(affordable & (scores > 0))
+    expected = expected[np.lexsort((candidates["ids"][expected], -scores[expected]))]
+
+    return {
+        "teams": num_teams,
+        "players": num_players,
+        "candidates": len(candidates["ids"]),
+        "workers": workers,
+        "prepare_seconds": prepared - start,
+        "shortlist_seconds": end - prepared,
+        "teams_per_second": num_teams / (end - prepared),
+        "entries": int(sum(len(rows["players"]) for rows in shortlists)),
+        "matches": bool(
+            np.array_equal(
+                first["players"][first["teams"] == 1],
+                candidates["ids"][expected[:k]],
+            )
+        ),
+    }
@@ -0,0 +1,304 @@
+"""Schedule league fixtures and keep league standings up to date."""
+
+import functools
+import operator
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Min, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Concat, Right
+from django.utils import timezone
+import numpy as np
+
+from manager.submodels import core_models
+from manager.subservices import match_services, sync_services
+
+
+POINTS: dict[str, int] = settings.POINTS
+STANDING_FORM_LENGTH: int = settings.STANDING_FORM_LENGTH
+# Number of fixture ids per IN clause when marking fixtures as played.
+FIXTURE_CHUNK_SIZE = 5000
+# Number of standings changed by one UPDATE when recording results.
+STANDING_CHUNK_SIZE = 200
+# Standing columns that results add up.
+COUNTS = [
+    "played",
+    "won",
+    "drawn",
+    "lost",
+    "goals_for",
+    "goals_against",
+    "goal_difference",
+    "points",
+]
+
+
+def round_robin(team_ids, double: bool = True) -> list[list[tuple[int, int]]]:
+    """
+    Schedule every team against every other team with the circle method.
+
+    With an odd number of teams one team rests each round. A double round
+    robin repeats the first half with home and away swapped.
+
+    :return: One list of ``(home_id, away_id)`` pairs per round.
+    :rtype: list
+    """
+
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    rounds = []
+    for number in range(len(teams) - 1):
+        pairs = []
+        for i in range(len(teams) // 2):
+            home, away = teams[i], teams[-1 - i]
+            if (number + i) % 2:
+                home, away = away, home
+            if home is not None and away is not None:
+                pairs.append((home, away))
+        rounds.append(pairs)
+        teams = [teams[0], teams[-1], *teams[1:-1]]
+    if double:
+        rounds.extend([[(away, home) for home, away in pairs] for pairs in rounds])
+
+    return rounds
+
+
+def generate_fixtures(leagues, double: bool = True) -> int:
+    """
+    Start a new season for the given leagues.
+
+    Existing fixtures of the leagues are replaced, their past matches are
+    kept without a fixture, and every team starts with an empty standing.
+
+    :return: Number of fixtures created.
+    :rtype: int
+    """
+
+    # pylint: disable=no-member
+    teams = core_models.Team.objects.filter(league__in=leagues).order_by(
+        "league_id", "id"
+    )
+    by_league: dict[int, list[int]] = {}
+    for team_id, league_id in teams.values_list("id", "league_id"):
+        by_league.setdefault(league_id, []).append(team_id)
+    fixtures = [
+        core_models.Fixture(
+            league_id=league_id,
+            round=number,
+            home_team_id=home,
+            away_team_id=away,
+        )
+        for league_id, team_ids in by_league.items()
+        for number, pairs in enumerate(round_robin(team_ids, double), start=1)
+        for home, away in pairs
+    ]
+    standings = [
+        core_models.Standing(league_id=league_id, team_id=team_id)
+        for league_id, team_ids in by_league.items()
+        for team_id in team_ids
+    ]
+    with transaction.atomic():
+        with sync_services.bulk_deletions():
+            core_models.Fixture.objects.filter(league__in=leagues).delete()
+            core_models.Standing.objects.filter(league__in=leagues).delete()
+        core_models.Fixture.objects.bulk_create(fixtures)
+        core_models.Standing.objects.bulk_create(standings)
+
+    return len(fixtures)
+
+
+def result_of(goals_for: int, goals_against: int) -> str:
+    """Return W, D or L for a score line seen from one side."""
+
+    if goals_for > goals_against:
+        return "W"
+    if goals_for < goals_against:
+        return "L"
+
+    return "D"
+
+
+def record_results(matches, chunk_size: int = STANDING_CHUNK_SIZE) -> None:
+    """
+    Apply match results to the standings of both teams.
+
+    Results are summed per standing and each chunk of standings is changed
+    by one ``UPDATE`` adding ``CASE`` deltas to the stored values with
+    ``F()`` expressions, so concurrent results never overwrite each other
+    and no match history is read.
+    """
+
+    matches = [match for match in matches if match.league_id is not None]
+    # pylint: disable=no-member
+    core_models.Standing.objects.bulk_create(
+        [
+            core_models.Standing(league_id=match.league_id, team_id=team_id)
+            for match in matches
+            for team_id in (match.home_team_id, match.away_team_id)
+        ],
+        ignore_conflicts=True,
+    )
+    points = {"W": POINTS["win"], "D": POINTS["draw"], "L": POINTS["loss"]}
+    deltas: dict[tuple[int, int], dict] = {}
+    for match in matches:
+        sides = [
+            (match.home_team_id, match.home_goals, match.away_goals),
+            (match.away_team_id, match.away_goals, match.home_goals),
+        ]
+        for team_id, goals_for, goals_against in sides:
+            result = result_of(goals_for, goals_against)
+            delta = deltas.setdefault(
+                (match.league_id, team_id), {**dict.fromkeys(COUNTS, 0), "form": ""}
+            )
+            delta["played"] += 1
+            delta["won"] += int(result == "W")
+            delta["drawn"] += int(result == "D")
+            delta["lost"] += int(result == "L")
+            delta["goals_for"] += goals_for
+            delta["goals_against"] += goals_against
+            delta["goal_difference"] += goals_for - goals_against
+            delta["points"] += points[result]
+            delta["form"] += result
+
+    def case(conditions, field, default):
+        return Case(
+            *[
+                When(condition, then=Value(deltas[key][field]))
+                for key, condition in conditions.items()
+            ],
+            default=Value(default),
+        )
+
+    keys = list(deltas)
+    now = timezone.now()
+    for start in range(0, len(keys), chunk_size):
+        conditions = {
+            key: Q(league_id=key[0], team_id=key[1])
+            for key in keys[start : start + chunk_size]
+        }
+        core_models.Standing.objects.filter(
+            functools.reduce(operator.or_, conditions.values())
+        ).update(
+            **{field: F(field) + case(conditions, field, 0) for field in COUNTS},
+            form=Right(
+                Concat(F("form"), case(conditions, "form", "")), STANDING_FORM_LENGTH
+            ),
+            updated_at=now,
+        )
+
+
+def play_round(leagues=None, seed=None) -> list:
+    """
+    Simulate the next unplayed round of every league and record the results.
+
+    :return: The created Match objects.
+    :rtype: list
+    """
+
+    # pylint: disable=no-member
+    unplayed = core_models.Fixture.objects.filter(played=False)
+    if leagues is not None:
+        unplayed = unplayed.filter(league__in=leagues)
+    next_round = (
+        core_models.Fixture.objects.filter(league=OuterRef("league"), played=False)
+        .values("league")
+        .annotate(next_round=Min("round"))
+        .values("next_round")
+    )
+    fixtures = [
+        (home, away, league, fixture)
+        for fixture, home, away, league in unplayed.filter(
+            round=Subquery(next_round)
+        ).values_list("id", "home_team_id", "away_team_id", "league_id")
+    ]
+    with transaction.atomic():
+        matches = match_services.simulate_matches(fixtures, seed=seed)
+        fixture_ids = [fixture[3] for fixture in fixtures]
+        for start in range(0, len(fixture_ids), FIXTURE_CHUNK_SIZE):
+            core_models.Fixture.objects.filter(
+                id__in=fixture_ids[start : start + FIXTURE_CHUNK_SIZE]
+            ).update(played=True, updated_at=timezone.now())
+        record_results(matches)
+
+    return matches
+
+
+def get_standings(league):
+    """Return the precomputed table of a league, best team first."""
+
+    # pylint: disable=no-member
+    return core_models.Standing.objects.filter(league=league).order_by(
+        "-points", "-goal_difference", "-goals_for", "team_id"
+    )
+
+
+def rebuild_standings(league) -> list:
+    """
+    Recompute the table of a league from scratch.
+
+    All results of the current season are read with one query and tallied
+    with array operations, then the standings are replaced in a single
+    transaction.
+
+    :return: The created Standing objects.
+    :rtype: list
+    """
+
+    # pylint: disable=no-member
+    team_ids = list(
+        core_models.Team.objects.filter(league=league).values_list("id", flat=True)
+    )
+    results = list(
+        core_models.Match.objects.filter(league=league, fixture__isnull=False)
+        .order_by("id")
+        .values_list("home_team_id", "away_team_id", "home_goals", "away_goals")
+    )
+    scores = np.array(results, dtype=np.int64).reshape(-1, 4)
+    team_ids = np.union1d(np.array(team_ids, dtype=np.int64), scores[:, :2].ravel())
+    home = np.searchsorted(team_ids, scores[:, 0])
+    away = np.searchsorted(team_ids, scores[:, 1])
+    home_goals, away_goals = scores[:, 2], scores[:, 3]
+    totals = {
+        name: np.zeros(len(team_ids), dtype=np.int64)
+        for name in ["played", "won", "drawn", "lost", "goals_for", "goals_against"]
+    }
+    for side, goals_for, goals_against in [
+        (home, home_goals, away_goals),
+        (away, away_goals, home_goals),
+    ]:
+        np.add.at(totals["played"], side, 1)
+        np.add.at(totals["won"], side, goals_for > goals_against)
+        np.add.at(totals["drawn"], side, goals_for == goals_against)
+        np.add.at(totals["lost"], side, goals_for < goals_against)
+        np.add.at(totals["goals_for"], side, goals_for)
+        np.add.at(totals["goals_against"], side, goals_against)
+
+    form = {team_id: "" for team_id in team_ids.tolist()}
+    for home_id, away_id, home_score, away_score in reversed(results):
+        for team_id, goals_for, goals_against in [
+            (home_id, home_score, away_score),
+            (away_id, away_score, home_score),
+        ]:
+            if len(form[team_id]) < STANDING_FORM_LENGTH:
+                form[team_id] = result_of(goals_for, goals_against) + form[team_id]
+
+    standings = [
+        core_models.Standing(
+            league=league,
+            team_id=team_id,
+            **{name: int(values[i]) for name, values in totals.items()},
+            goal_difference=int(totals["goals_for"][i] - totals["goals_against"][i]),
+            points=int(
+                totals["won"][i] * POINTS["win"]
+                + totals["drawn"][i] * POINTS["draw"]
+                + totals["lost"][i] * POINTS["loss"]
+            ),
+            form=form[team_id],
+        )
+        for i, team_id in enumerate(team_ids.tolist())
+    ]
+    with transaction.atomic():
+        with sync_services.bulk_deletions():
+            core_models.Standing.objects.filter(league=league).delete()
+        return core_models.Standing.objects.bulk_create(standings)
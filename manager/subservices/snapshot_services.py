@@ -0,0 +1,416 @@
+"""Keep a memory-mapped columnar snapshot of player attributes on disk."""
+
+import contextlib
+from dataclasses import dataclass
+import datetime
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.utils import timezone
+import numpy as np
+
+from manager.submodels import base_models, core_models
+from manager.subservices import rating_services
+
+
+ATTRIBUTES: list[str] = rating_services.ATTRIBUTES
+PLAYER_POSITIONS: list[str] = settings.PLAYER_POSITIONS
+PLAYER_STATUSES: list[str] = settings.STATUS["player"]
+SNAPSHOT_CHUNK_SIZE: int = settings.SNAPSHOT_CHUNK_SIZE
+SNAPSHOT_OVERLAP = datetime.timedelta(seconds=settings.SNAPSHOT_OVERLAP)
+MANIFEST = "players.json"
+# Held while a generation is written, so builds and refreshes run one at a time.
+LOCK = "players.lock"
+# One .npy file per column. Attributes and vectors hold one row of
+# ATTRIBUTES per player, vectors scaled by ATTRIBUTE_SCALE for distances.
+COLUMNS = {
+    "ids": np.int64,
+    "team_ids": np.int64,
+    "positions": np.uint8,
+    "statuses": np.uint8,
+    "prices": np.int64,
+    "alive": np.uint8,
+    "attributes": np.uint16,
+    "vectors": np.float32,
+}
+MATRIX_COLUMNS = ["attributes", "vectors"]
+ATTRIBUTE_MAX = np.iinfo(COLUMNS["attributes"]).max
+ATTRIBUTE_SCALE = 100.0
+# Status of players whose status is blank or not in PLAYER_STATUSES.
+NO_STATUS = np.iinfo(COLUMNS["statuses"]).max
+# Free rows reserved at the end of a new generation for appended players.
+GROWTH = 0.25
+# Share of deleted rows above which a refresh compacts the snapshot.
+MAX_DEAD_SHARE = 0.25
+
+
+class SnapshotError(Exception):
+    """The snapshot is missing or does not match the Player model."""
+
+
+@dataclass
+class PlayerSnapshot:
+    """
+    Read-only columns of a snapshot, one row per player in id order.
+
+    Columns are memory maps, so every process opening the snapshot shares
+    the same pages of the OS cache. ``team_ids`` is 0 for players without a
+    team, positions and statuses index PLAYER_POSITIONS and PLAYER_STATUSES
+    (or are NO_STATUS), and ``alive`` is 0 for deleted players not compacted
+    yet.
+    """
+
+    generation: int
+    synced_at: datetime.datetime
+    ids: np.ndarray
+    team_ids: np.ndarray
+    positions: np.ndarray
+    statuses: np.ndarray
+    prices: np.ndarray
+    alive: np.ndarray
+    attributes: np.ndarray
+    vectors: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+    def live(self) -> np.ndarray:
+        """Return the row indexes of players that still exist."""
+
+        return np.flatnonzero(self.alive)
+
+
+def _directory(directory) -> pathlib.Path:
+    return pathlib.Path(settings.SNAPSHOT_DIR if directory is None else directory)
+
+
+def _generation_path(directory: pathlib.Path, generation: int) -> pathlib.Path:
+    return directory / f"players-{generation}"
+
+
+def read_manifest(directory=None) -> dict | None:
+    """Return the manifest of the current generation, None without snapshot."""
+
+    try:
+        return json.loads((_directory(directory) / MANIFEST).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _write_manifest(directory: pathlib.Path, manifest: dict) -> None:
+    """Replace the manifest atomically, readers see the old or the new one."""
+
+    with tempfile.NamedTemporaryFile(
+        "w", dir=directory, suffix=".tmp", delete=False
+    ) as file:
+        json.dump(manifest, file)
+    os.replace(file.name, directory / MANIFEST)
+
+
+@contextlib.contextmanager
+def _locked(file):
+    """Hold an exclusive lock on an open file, with flock or on Windows msvcrt."""
+
+    # pylint: disable=import-outside-toplevel
+    if os.name == "nt":
+        import msvcrt
+
+        file.seek(0)
+        while True:
+            try:
+                # Gives up with OSError after ten seconds of retries.
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                continue
+        try:
+            yield
+        finally:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+        return
+
+    import fcntl
+
+    fcntl.flock(file, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(file, fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def snapshot_lock(directory):
+    """Hold the lock of a snapshot directory, waiting for other writers."""
+
+    directory = _directory(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / LOCK, "a+", encoding="utf-8") as file, _locked(file):
+        yield
+
+
+def _remove_stale(directory: pathlib.Path, generation: int) -> None:
+    """Remove generations older than the one before ``generation``."""
+
+    for stale in directory.glob("players-*"):
+        if int(stale.name.split("-")[1]) < generation - 1:
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+def _open_columns(directory: pathlib.Path, generation: int, mode: str) -> dict:
+    path = _generation_path(directory, generation)
+
+    return {name: np.load(path / f"{name}.npy", mmap_mode=mode) for name in COLUMNS}
+
+
+def _player_rows(players, chunk_size: int):
+    """Yield the columns of players by id chunks, as a dict of arrays."""
+
+    position_index = {position: i for i, position in enumerate(PLAYER_POSITIONS)}
+    status_index = {status: i for i, status in enumerate(PLAYER_STATUSES)}
+    players = players.order_by("id")
+    last_id = 0
+    while True:
+        rows = list(
+            players.filter(id__gt=last_id).values_list(
+                "id", "team_id", "position", "status", "price", *ATTRIBUTES
+            )[:chunk_size]
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield {
+            "ids": np.array([row[0] for row in rows], dtype=np.int64),
+            "team_ids": np.array([row[1] or 0 for row in rows], dtype=np.int64),
+            "positions": np.array(
+                [position_index[row[2]] for row in rows], dtype=np.uint8
+            ),
+            "statuses": np.array(
+                [status_index.get(row[3], NO_STATUS) for row in rows], dtype=np.uint8
+            ),
+            "prices": np.array([row[4] for row in rows], dtype=np.int64),
+            "attributes": np.clip(
+                np.array([row[5:] for row in rows], dtype=np.int64), 0, ATTRIBUTE_MAX
+            ).reshape(len(rows), len(ATTRIBUTES)),
+        }
+
+
+def _write_rows(columns: dict, index, chunk: dict) -> None:
+    """Write a chunk of players to rows ``index`` of the columns."""
+
+    for name, values in chunk.items():
+        columns[name][index] = values
+    columns["alive"][index] = 1
+    columns["vectors"][index] = chunk["attributes"] / ATTRIBUTE_SCALE
+
+
+def _manifest(generation, rows, capacity, dead, synced_at) -> dict:
+    return {
+        "generation": generation,
+        "rows": rows,
+        "capacity": capacity,
+        "dead": dead,
+        "synced_at": synced_at.isoformat(),
+        "columns": list(COLUMNS),
+        "attributes": ATTRIBUTES,
+        "positions": PLAYER_POSITIONS,
+        "statuses": PLAYER_STATUSES,
+    }
+
+
+def _compatible(manifest: dict) -> bool:
+    """Tell whether a snapshot has the columns and choices of this code."""
+
+    return (
+        manifest.get("columns") == list(COLUMNS)
+        and manifest["attributes"] == ATTRIBUTES
+        and manifest["positions"] == PLAYER_POSITIONS
+        and manifest.get("statuses") == PLAYER_STATUSES
+    )
+
+
+def build_snapshot(directory=None, chunk_size: int = SNAPSHOT_CHUNK_SIZE) -> dict:
+    """
+    Write every player to a new generation of the snapshot.
+
+    Columns are filled chunk by chunk, so memory stays bounded by the chunk
+    size. The manifest is switched to the new generation once it is
+    complete, and generations older than the previous one are removed;
+    processes still mapping them keep reading their files.
+
+    :return: The generation, its rows, the rows written and whether it was
+        rebuilt.
+    :rtype: dict
+    """
+
+    with snapshot_lock(directory):
+        return _build_snapshot(_directory(directory), chunk_size)
+
+
+def _build_snapshot(directory: pathlib.Path, chunk_size: int) -> dict:
+    previous = read_manifest(directory)
+    generation = 1 if previous is None else previous["generation"] + 1
+    path = _generation_path(directory, generation)
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir()
+
+    # Changes made while the players are read are caught by the next refresh.
+    synced_at = timezone.now()
+    # pylint: disable=no-member
+    players = core_models.Player.objects.all()
+    capacity = int(players.count() * (1 + GROWTH)) + chunk_size
+    columns = {
+        name: np.lib.format.open_memmap(
+            path / f"{name}.npy",
+            mode="w+",
+            dtype=dtype,
+            shape=(
+                (capacity, len(ATTRIBUTES)) if name in MATRIX_COLUMNS else (capacity,)
+            ),
+        )
+        for name, dtype in COLUMNS.items()
+    }
+    rows = 0
+    for chunk in _player_rows(players, chunk_size):
+        end = rows + len(chunk["ids"])
+        if end > capacity:
+            # Players inserted meanwhile are appended by the next refresh.
+            break
+        _write_rows(columns, slice(rows, end), chunk)
+        rows = end
+    for column in columns.values():
+        column.flush()
+
+    _write_manifest(directory, _manifest(generation, rows, capacity, 0, synced_at))
+    _remove_stale(directory, generation)
+
+    return {
+        "generation": generation,
+        "rows": rows,
+        "upserted": rows,
+        "deleted": 0,
+        "rebuilt": True,
+    }
+
+
+def refresh_snapshot(directory=None, chunk_size: int = SNAPSHOT_CHUNK_SIZE) -> dict:
+    """
+    Apply players updated or deleted since the last refresh to the snapshot.
+
+    Changes are read from ``updated_at`` and the DeletionLog tombstones,
+    starting SNAPSHOT_OVERLAP before the previous refresh, and written to a
+    copy of the current generation: updated rows are overwritten, new
+    players are appended in id order and deleted ones are marked dead;
+    players of deleted teams become free agents. The manifest is then
+    switched to the copy, as after a build, so readers never see a
+    generation change under them. A generation is built from scratch
+    instead when there is no snapshot, when its columns, attributes,
+    positions or statuses changed, when appended rows do not fit or would
+    break the id order, or when too many rows are dead.
+
+    :return: The generation, its rows, the rows upserted and deleted, and
+        whether it was rebuilt.
+    :rtype: dict
+    """
+
+    with snapshot_lock(directory):
+        return _refresh_snapshot(_directory(directory), chunk_size)
+
+
+def _refresh_snapshot(directory: pathlib.Path, chunk_size: int) -> dict:
+    manifest = read_manifest(directory)
+    if manifest is None or not _compatible(manifest):
+        return _build_snapshot(directory, chunk_size)
+
+    synced_at = timezone.now()
+    since = datetime.datetime.fromisoformat(manifest["synced_at"]) - SNAPSHOT_OVERLAP
+    generation = manifest["generation"] + 1
+    path = _generation_path(directory, generation)
+    shutil.rmtree(path, ignore_errors=True)
+    shutil.copytree(_generation_path(directory, manifest["generation"]), path)
+    columns = _open_columns(directory, generation, "r+")
+    rows = manifest["rows"]
+    upserted = 0
+    # pylint: disable=no-member
+    changed = core_models.Player.objects.filter(updated_at__gte=since)
+    for chunk in _player_rows(changed, chunk_size):
+        ids = chunk["ids"]
+        known = columns["ids"][:rows]
+        index = np.searchsorted(known, ids)
+        found = index < rows
+        found[found] = known[index[found]] == ids[found]
+        new = np.flatnonzero(~found)
+        if len(new) and (
+            (rows and ids[new[0]] < known[-1]) or rows + len(new) > manifest["capacity"]
+        ):
+            return _build_snapshot(directory, chunk_size)
+        index[new] = np.arange(rows, rows + len(new))
+        _write_rows(columns, index, chunk)
+        rows += len(new)
+        upserted += len(ids)
+
+    tombstones = base_models.DeletionLog.objects.filter(deleted_at__gte=since)
+    # Deleting a team sets the team of its players to null without saving them.
+    deleted_teams = list(
+        tombstones.filter(model_name="team").values_list("object_id", flat=True)
+    )
+    if deleted_teams:
+        team_ids = columns["team_ids"][:rows]
+        team_ids[np.isin(team_ids, deleted_teams)] = 0
+    deleted_ids = np.fromiter(
+        tombstones.filter(model_name="player").values_list("object_id", flat=True),
+        dtype=np.int64,
+    )
+    known = columns["ids"][:rows]
+    index = np.searchsorted(known, deleted_ids)
+    index = index[index < rows]
+    index = index[np.isin(known[index], deleted_ids)]
+    index = index[columns["alive"][index] == 1]
+    columns["alive"][index] = 0
+    for column in columns.values():
+        column.flush()
+
+    dead = rows - int(np.count_nonzero(columns["alive"][:rows]))
+    if dead > rows * MAX_DEAD_SHARE:
+        return _build_snapshot(directory, chunk_size)
+    _write_manifest(
+        directory,
+        _manifest(generation, rows, manifest["capacity"], dead, synced_at),
+    )
+    _remove_stale(directory, generation)
+
+    return {
+        "generation": generation,
+        "rows": rows,
+        "upserted": upserted,
+        "deleted": len(index),
+        "rebuilt": False,
+    }
+
+
+def open_snapshot(directory=None) -> PlayerSnapshot:
+    """
+    Map the current generation of the snapshot read-only.
+
+    Nothing is copied: the columns are sliced memory maps of the files.
+    """
+
+    directory = _directory(directory)
+    manifest = read_manifest(directory)
+    if manifest is None:
+        raise SnapshotError(f"No player snapshot in {directory}")
+    if not _compatible(manifest):
+        raise SnapshotError("The snapshot was built with other columns or choices")
+
+    rows = manifest["rows"]
+    columns = _open_columns(directory, manifest["generation"], "r")
+
+    return PlayerSnapshot(
+        generation=manifest["generation"],
+        synced_at=datetime.datetime.fromisoformat(manifest["synced_at"]),
+        **{name: column[:rows] for name, column in columns.items()},
+    )
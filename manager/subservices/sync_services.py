@@ -0,0 +1,166 @@
+"""Feed changes of BaseModel tables to clients keeping a local copy."""
+
+import contextlib
+import datetime
+import threading
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from manager.submodels import base_models, core_models
+
+
+PAGE_SIZE: int = settings.PAGE_SIZE
+SYNC_RETENTION_DAYS: int = settings.SYNC_RETENTION_DAYS
+UPSERT, DELETE = "upsert", "delete"
+# Upserts sort before deletions logged at the same instant.
+OPERATIONS = [UPSERT, DELETE]
+SYNC_MODELS = {
+    model._meta.model_name: model  # pylint: disable=protected-access
+    for model in [
+        base_models.Country,
+        core_models.League,
+        core_models.Team,
+        core_models.Player,
+        core_models.Transfer,
+        core_models.CounterOffer,
+        core_models.PlayerNegotiation,
+        core_models.ManagerNegotiation,
+        core_models.Fixture,
+        core_models.Match,
+        core_models.Standing,
+        core_models.AttributeCategory,
+    ]
+}
+
+
+# Tombstones held back by bulk_deletions in the current thread.
+_pending = threading.local()
+
+
+class SyncExpired(ValueError):
+    """The tombstones a feed needs may already be pruned."""
+
+
+def log_deletion(model, object_id) -> None:
+    """Leave a tombstone for a deleted row of a synced model."""
+
+    # pylint: disable=protected-access
+    model_name = model._meta.model_name
+    if SYNC_MODELS.get(model_name) is not model:
+        return
+    tombstone = base_models.DeletionLog(model_name=model_name, object_id=object_id)
+    pending = getattr(_pending, "tombstones", None)
+    if pending is not None:
+        pending.append(tombstone)
+    else:
+        tombstone.save()
+
+
+@contextlib.contextmanager
+def bulk_deletions():
+    """
+    Write the tombstones of the deletes made in the block with one bulk_create.
+
+    Wrap queryset deletes of many synced rows in it, cascades included;
+    single deletes outside it log their tombstone at once.
+    """
+
+    if getattr(_pending, "tombstones", None) is not None:
+        yield
+        return
+
+    tombstones = _pending.tombstones = []
+    try:
+        yield
+    finally:
+        _pending.tombstones = None
+    # pylint: disable=no-member
+    base_models.DeletionLog.objects.bulk_create(tombstones)
+
+
+def prune_deletions(days: int = SYNC_RETENTION_DAYS) -> int:
+    """
+    Delete the tombstones of rows deleted more than ``days`` days ago.
+
+    :return: Number of tombstones deleted.
+    :rtype: int
+    """
+
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    # pylint: disable=no-member
+    deleted, _ = base_models.DeletionLog.objects.filter(deleted_at__lt=cutoff).delete()
+
+    return deleted
+
+
+def _after(position, time_field: str, rank: int):
+    """Filter rows of one operation strictly after a feed position."""
+
+    timestamp, position_rank, pk = position
+    later = Q(**{f"{time_field}__gt": timestamp})
+    if rank > position_rank:
+        return later | Q(**{time_field: timestamp})
+
+    if rank == position_rank:
+        return later | Q(**{time_field: timestamp, "id__gt": pk})
+
+    return later
+
+
+def sync_feed(model_name: str, since=None, after=None, limit: int = PAGE_SIZE):
+    """
+    Return the next changes of a model, oldest first.
+
+    Changes are rows updated after ``since`` and tombstones of rows deleted
+    after it, merged on time. Each change comes with its feed position
+    ``(time, operation rank, id)``, so a client can resume right after the
+    last change it applied. Both sources are read with one index range scan
+    each, so the cost grows with the changes, not with the table. A
+    ``since`` older than SYNC_RETENTION_DAYS raises SyncExpired, since
+    tombstones of that time may be pruned.
+
+    :return: Up to ``limit + 1`` ``(position, change)`` pairs.
+    :rtype: list
+    """
+
+    model = SYNC_MODELS[model_name]
+    retention = datetime.timedelta(days=SYNC_RETENTION_DAYS)
+    if since is not None and since < timezone.now() - retention:
+        raise SyncExpired(f"Changes are kept for {SYNC_RETENTION_DAYS} days")
+    # pylint: disable=no-member
+    rows = model.objects.order_by("updated_at", "id")
+    tombstones = base_models.DeletionLog.objects.filter(model_name=model_name).order_by(
+        "deleted_at", "id"
+    )
+    if since is not None:
+        rows = rows.filter(updated_at__gt=since)
+        tombstones = tombstones.filter(deleted_at__gt=since)
+    if after is not None:
+        rows = rows.filter(_after(after, "updated_at", OPERATIONS.index(UPSERT)))
+        tombstones = tombstones.filter(
+            _after(after, "deleted_at", OPERATIONS.index(DELETE))
+        )
+
+    # pylint: disable=protected-access
+    fields = [field.attname for field in model._meta.concrete_fields]
+    changes = [
+        (
+            (row["updated_at"], OPERATIONS.index(UPSERT), row["id"]),
+            {"operation": UPSERT, "id": row["id"], "row": row},
+        )
+        for row in rows.values(*fields)[: limit + 1]
+    ]
+    changes.extend(
+        (
+            (deleted_at, OPERATIONS.index(DELETE), pk),
+            {"operation": DELETE, "id": object_id},
+        )
+        for pk, object_id, deleted_at in tombstones.values_list(
+            "id", "object_id", "deleted_at"
+        )[: limit + 1]
+    )
+    changes.sort(key=lambda change: change[0])
+
+    return changes[: limit + 1]
@@ -0,0 +1,230 @@
+"""Keep team totals consistent with the players of each team and read squads."""
+
+import contextlib
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Prefetch, Sum
+from django.utils import timezone
+
+from manager.submodels import core_models
+from manager.subservices import transfer_services
+
+
+TEAM_CHUNK_SIZE: int = settings.TEAM_CHUNK_SIZE
+TOTAL_FIELDS = ["num_players", "value"]
+_deferred = threading.local()
+# Columns read for squads, the fields of the squad serializers.
+SQUAD_PLAYER_FIELDS = [
+    "id",
+    "team",
+    "first_name",
+    "last_name",
+    "country",
+    "position",
+    "status",
+    "price",
+    "salary",
+    "overall",
+]
+SQUAD_TEAM_FIELDS = [
+    "id",
+    "name",
+    "num_players",
+    "value",
+    "budget",
+    "has_manager",
+    "updated_at",
+    "league",
+    "manager",
+    "manager__id",
+    "manager__first_name",
+    "manager__last_name",
+    "manager__country",
+    "owner",
+]
+SQUAD_LEAGUE_FIELDS = [
+    "id",
+    "name",
+    "division",
+    "country",
+    "country__id",
+    "country__name",
+]
+
+
+def team_totals_delta(changes) -> dict[int, tuple[int, int]]:
+    """
+    Sum the changes of team totals caused by players moving or being repriced.
+
+    Every change is an ``(old, new)`` pair of ``(team_id, price)`` tuples,
+    either of which is None for a created or deleted player.
+
+    :return: ``(num_players, value)`` delta of every affected team.
+    :rtype: dict
+    """
+
+    deltas: dict[int, list[int]] = {}
+    for old, new in changes:
+        for counted, sign in [(old, -1), (new, 1)]:
+            if counted is None or counted[0] is None:
+                continue
+            team_id, price = counted
+            delta = deltas.setdefault(team_id, [0, 0])
+            delta[0] += sign
+            delta[1] += sign * price
+
+    return {
+        team_id: (players, value)
+        for team_id, (players, value) in deltas.items()
+        if players or value
+    }
+
+
+def adjust_team_totals(deltas: dict[int, tuple[int, int]]) -> None:
+    """
+    Apply ``(num_players, value)`` deltas to teams.
+
+    Each team is one ``UPDATE`` with ``F()`` expressions, so concurrent
+    changes never overwrite each other. Teams are updated in id order to
+    keep lock order stable. Inside deferred_team_totals the teams are only
+    remembered, to be recounted after the block.
+    """
+
+    touched = getattr(_deferred, "team_ids", None)
+    if touched is not None:
+        touched.update(deltas)
+        return
+
+    now = timezone.now()
+    for team_id, (players, value) in sorted(deltas.items()):
+        # pylint: disable=no-member
+        core_models.Team.objects.filter(pk=team_id).update(
+            num_players=F("num_players") + players,
+            value=F("value") + value,
+            updated_at=now,
+        )
+
+
+@contextlib.contextmanager
+def deferred_team_totals():
+    """
+    Recount the teams whose totals the block changes once, after it.
+
+    Wrap queryset deletes of many players in it, cascades included, so they
+    cost one reconcile instead of an ``UPDATE`` per player.
+    """
+
+    if getattr(_deferred, "team_ids", None) is not None:
+        yield
+        return
+
+    team_ids = _deferred.team_ids = set()
+    try:
+        yield
+    finally:
+        _deferred.team_ids = None
+    reconcile_teams(team_ids=sorted(team_ids))
+
+
+def reconcile_teams(
+    chunk_size: int = TEAM_CHUNK_SIZE, progress=None, team_ids=None
+) -> dict:
+    """
+    Recount the totals of all teams and fix the ones that drifted.
+
+    Only the teams of ``team_ids`` are checked when it is given. Teams are
+    walked in primary key chunks. Each chunk is locked, then costs one read
+    of the teams, one grouped aggregate over their players and, only if some
+    rows changed, one ``bulk_update``, all in its own transaction. ``F()`` deltas of concurrent saves wait for the lock, so
+    they apply on top of the recounted totals instead of being overwritten.
+
+    :return: Number of teams checked and updated.
+    :rtype: dict
+    """
+
+    # pylint: disable=no-member
+    teams = core_models.Team.objects.order_by("id")
+    if team_ids is not None:
+        teams = teams.filter(id__in=list(team_ids))
+    checked = updated = 0
+    last_id = 0
+    while True:
+        ids = list(
+            teams.filter(id__gt=last_id).values_list("id", flat=True)[:chunk_size]
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+        with transaction.atomic():
+            transfer_services.lock_teams(ids)
+            rows = list(teams.filter(id__in=ids).values_list("id", *TOTAL_FIELDS))
+            actual = {
+                team_id: (players, value)
+                for team_id, players, value in core_models.Player.objects.filter(
+                    team_id__in=ids
+                )
+                .values("team_id")
+                .annotate(players=Count("id"), value=Sum("price"))
+                .values_list("team_id", "players", "value")
+                .order_by()
+            }
+            now = timezone.now()
+            objs = [
+                core_models.Team(
+                    id=team_id,
+                    updated_at=now,
+                    **dict(zip(TOTAL_FIELDS, actual.get(team_id, (0, 0)), strict=True)),
+                )
+                for team_id, *stored in rows
+                if tuple(stored) != actual.get(team_id, (0, 0))
+            ]
+            if objs:
+                core_models.Team.objects.bulk_update(
+                    objs, [*TOTAL_FIELDS, "updated_at"]
+                )
+        checked += len(rows)
+        updated += len(objs)
+        if progress is not None:
+            progress(checked, updated)
+
+    return {"checked": checked, "updated": updated}
+
+
+def get_team_squads():
+    """
+    Return teams with their league, manager, owner id and players.
+
+    Foreign keys are joined and players are prefetched with only the
+    columns the squad serializers read, so any number of teams loads in
+    two queries.
+    """
+
+    # pylint: disable=no-member
+    players = core_models.Player.objects.only(*SQUAD_PLAYER_FIELDS).order_by("id")
+
+    return (
+        core_models.Team.objects.select_related("league__country", "manager")
+        .only(*SQUAD_TEAM_FIELDS, *(f"league__{name}" for name in SQUAD_LEAGUE_FIELDS))
+        .prefetch_related(Prefetch("players", queryset=players))
+    )
+
+
+def get_league_squads():
+    """Return leagues with their country and the squads of their teams."""
+
+    # pylint: disable=no-member
+    players = core_models.Player.objects.only(*SQUAD_PLAYER_FIELDS).order_by("id")
+    teams = (
+        core_models.Team.objects.select_related("manager")
+        .only(*SQUAD_TEAM_FIELDS)
+        .prefetch_related(Prefetch("players", queryset=players))
+        .order_by("id")
+    )
+
+    return (
+        core_models.League.objects.select_related("country")
+        .only(*SQUAD_LEAGUE_FIELDS)
+        .prefetch_related(Prefetch("team_set", queryset=teams))
+    )
@@ -0,0 +1,125 @@
+"""Bid for players and complete transfers between teams."""
+
+import datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from manager.submodels import core_models
+
+
+OPEN, CLOSED = settings.STATUS["transfer"]
+BUY, LOAN = settings.CONTRACT_TYPES
+ACCEPTED, REJECTED = settings.STATUS["offer"][:2]
+SOLD_STATUS = "NOT FOR SALE"
+
+
+class TransferError(ValueError):
+    """A transfer cannot be made or completed."""
+
+
+def make_bid(player, buyer, offered_price: int, contract: str = "BUY"):
+    """Open a transfer of a player from its current team to the buyer."""
+
+    if player.team_id is None:
+        raise TransferError("Free agents are signed, not transferred")
+    if player.team_id == buyer.id:
+        raise TransferError("A team cannot bid for its own player")
+    if contract not in settings.CONTRACT_TYPES:
+        raise TransferError(f"Unknown contract {contract!r}")
+    if contract == LOAN:
+        # Players have no loan end date to go back to their team on yet.
+        raise TransferError("Loans are not supported yet")
+
+    # pylint: disable=no-member
+    return core_models.Transfer.objects.create(
+        player=player,
+        buyer=buyer,
+        seller_id=player.team_id,
+        asking_price=player.price,
+        offered_price=offered_price,
+        status=OPEN,
+        contract=contract,
+    )
+
+
+def lock_teams(team_ids) -> None:
+    """
+    Lock teams by id until the end of the transaction.
+
+    SQLite has no row locks, so there the transaction takes the database
+    write lock first with an update that changes nothing. Two transactions
+    that had both read before writing could not both get it.
+    """
+
+    # pylint: disable=no-member
+    teams = core_models.Team.objects.filter(pk__in=team_ids)
+    if connection.features.has_select_for_update:
+        list(teams.select_for_update().order_by("id").values_list("id", flat=True))
+    else:
+        teams.update(budget=F("budget"))
+
+
+def complete_transfer(transfer_id: int):
+    """
+    Move a player and its fee from the seller to the buyer in one transaction.
+
+    Rows are locked in one global order, both teams by id, then the player,
+    then the transfer, so concurrent completions wait for each other instead
+    of deadlocking. The buyer pays with a conditional ``F()`` update, so a
+    budget can never go negative, and every other open bid for the player is
+    closed in bulk. Only BUY contracts are completed.
+
+    :return: The completed Transfer.
+    :rtype: Transfer
+    """
+
+    # pylint: disable=no-member
+    keys = core_models.Transfer.objects.filter(pk=transfer_id).values_list(
+        "buyer_id", "seller_id", "player_id"
+    )
+    try:
+        buyer_id, seller_id, player_id = keys.get()
+    except core_models.Transfer.DoesNotExist as exc:
+        raise TransferError(f"Transfer {transfer_id} does not exist") from exc
+
+    with transaction.atomic():
+        lock_teams([buyer_id, seller_id])
+        player = core_models.Player.objects.select_for_update().get(pk=player_id)
+        transfer = core_models.Transfer.objects.select_for_update().get(pk=transfer_id)
+        if transfer.status != OPEN:
+            raise TransferError(f"Transfer {transfer_id} is closed")
+        if transfer.contract != BUY:
+            raise TransferError(f"Transfer {transfer_id} is a {transfer.contract}")
+        if player.team_id != seller_id:
+            raise TransferError(f"Player {player_id} left the selling team")
+
+        price = transfer.offered_price
+        paid = core_models.Team.objects.filter(pk=buyer_id, budget__gte=price).update(
+            budget=F("budget") - price,
+            updated_at=timezone.now(),
+        )
+        if not paid:
+            raise TransferError(f"Team {buyer_id} cannot afford {price}")
+        core_models.Team.objects.filter(pk=seller_id).update(
+            budget=F("budget") + price,
+            earning=F("earning") + price,
+            updated_at=timezone.now(),
+        )
+
+        player.team_id = buyer_id
+        player.status = SOLD_STATUS
+        player.join_date = datetime.date.today()
+        player.save(update_fields=["team", "status", "join_date", "updated_at"])
+        transfer.status = CLOSED
+        transfer.save(update_fields=["status", "updated_at"])
+        core_models.Transfer.objects.filter(player_id=player_id, status=OPEN).update(
+            status=CLOSED, updated_at=timezone.now()
+        )
+        core_models.CounterOffer.objects.filter(player_id=player_id).exclude(
+            status__in=[ACCEPTED, REJECTED]
+        ).update(status=REJECTED, updated_at=timezone.now())
+
+    return transfer
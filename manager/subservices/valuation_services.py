@@ -0,0 +1,348 @@
+"""Price players from their ratings, condition and the transfer market."""
+
+from dataclasses import dataclass
+import datetime
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+import numpy as np
+
+from manager.submodels import core_models
+from manager.subservices import rating_services, team_services, transfer_services
+
+
+ATTRIBUTES: list[str] = rating_services.ATTRIBUTES
+PLAYER_POSITIONS: list[str] = settings.PLAYER_POSITIONS
+DEFAULT_ATTRIBUTE_VALUE: int = settings.DEFAULT_ATTRIBUTE_VALUE
+DEFAULT_PLAYER_VALUE: int = settings.DEFAULT_PLAYER_VALUE
+VALUATION_CHUNK_SIZE: int = settings.VALUATION_CHUNK_SIZE
+VALUATION_EXPONENT: float = settings.VALUATION_EXPONENT
+VALUATION_FORM_WEIGHT: float = settings.VALUATION_FORM_WEIGHT
+VALUATION_MORALE_WEIGHT: float = settings.VALUATION_MORALE_WEIGHT
+VALUATION_MARKET_RANGE: tuple = settings.VALUATION_MARKET_RANGE
+VALUATION_MIN_TRANSFERS: int = settings.VALUATION_MIN_TRANSFERS
+VALUATION_ROUNDING: int = settings.VALUATION_ROUNDING
+VALUATION_TRANSFER_DAYS: int = settings.VALUATION_TRANSFER_DAYS
+VALUATION_TRANSFER_WEIGHT: float = settings.VALUATION_TRANSFER_WEIGHT
+POSITION_FACTORS = np.array(
+    [settings.VALUATION_POSITION_FACTORS[position] for position in PLAYER_POSITIONS]
+)
+# Bounds of the factor of form and morale, whatever their values.
+CONDITION_RANGE = (0.5, 1.5)
+CLOSED = settings.STATUS["transfer"][1]
+# Columns priced for a player, ``(id, position, *ATTRIBUTES)`` first as read
+# by rating_services.rows_to_arrays.
+VALUATION_FIELDS = ["id", "position", *ATTRIBUTES, "form", "morale"]
+
+
+class ValuationError(ValueError):
+    """Players cannot be priced with the current reference data."""
+
+
+@dataclass
+class Valuation:
+    """Weights and recent transfer fees to price players, loaded once per run."""
+
+    category_weights: np.ndarray
+    position_weights: np.ndarray
+    transferred_ids: np.ndarray
+    fees: np.ndarray
+    market_index: np.ndarray
+
+
+def rows_to_arrays(rows: list[tuple]) -> tuple:
+    """
+    Split rows starting with VALUATION_FIELDS into NumPy arrays.
+
+    :return: Ids, position indexes, the attribute matrix, form and morale.
+    :rtype: tuple
+    """
+
+    ids, positions, matrix = rating_services.rows_to_arrays(rows)
+    condition = np.array(
+        [row[2 + len(ATTRIBUTES) : 4 + len(ATTRIBUTES)] for row in rows],
+        dtype=np.float64,
+    ).reshape(len(rows), 2)
+
+    return ids, positions, matrix, condition[:, 0], condition[:, 1]
+
+
+def model_prices(
+    valuation: Valuation,
+    positions: np.ndarray,
+    matrix: np.ndarray,
+    form: np.ndarray,
+    morale: np.ndarray,
+) -> np.ndarray:
+    """
+    Price players from their overall rating, position, form and morale.
+
+    A player rated DEFAULT_ATTRIBUTE_VALUE at their position, in average form
+    and morale, is worth DEFAULT_PLAYER_VALUE times the factor of the
+    position. The transfer market is not applied.
+
+    :return: Prices, one per player.
+    :rtype: numpy.ndarray
+    """
+
+    _, overall = rating_services.compute_ratings(
+        matrix, valuation.category_weights, valuation.position_weights
+    )
+    rating = overall[np.arange(len(positions)), positions]
+    condition = (
+        1
+        + VALUATION_FORM_WEIGHT * (form - DEFAULT_ATTRIBUTE_VALUE)
+        + VALUATION_MORALE_WEIGHT * (morale - DEFAULT_ATTRIBUTE_VALUE)
+    )
+
+    return (
+        DEFAULT_PLAYER_VALUE
+        * (rating / DEFAULT_ATTRIBUTE_VALUE) ** VALUATION_EXPONENT
+        * POSITION_FACTORS[positions]
+        * np.clip(condition, *CONDITION_RANGE)
+    )
+
+
+def load_valuation(attribute_categories=None, now=None) -> Valuation:
+    """
+    Load the rating weights and the fees of recent transfers.
+
+    A transfer counts when it was closed in the last VALUATION_TRANSFER_DAYS
+    with a BUY contract and the player now plays for the buyer; the latest
+    one of a player is its fee. The market index of a position is the
+    median ratio of these fees to model prices, once the position has
+    VALUATION_MIN_TRANSFERS of them, and 1 before. Every attribute needs a
+    category, otherwise ratings would be zero and every price the minimum.
+    """
+
+    if attribute_categories is None:
+        attribute_categories = rating_services.get_attribute_categories()
+    missing = [name for name in ATTRIBUTES if name not in attribute_categories]
+    if missing:
+        raise ValuationError(f"Attributes without a category: {', '.join(missing)}")
+    since = (now or timezone.now()) - datetime.timedelta(days=VALUATION_TRANSFER_DAYS)
+    # pylint: disable=no-member
+    transfers = (
+        core_models.Transfer.objects.filter(
+            status=CLOSED,
+            contract="BUY",
+            updated_at__gte=since,
+            buyer_id=F("player__team_id"),
+        )
+        .order_by("updated_at", "id")
+        .values_list(
+            *(f"player__{field}" for field in VALUATION_FIELDS), "offered_price"
+        )
+    )
+    latest = {row[0]: row for row in transfers}
+    rows = [latest[player_id] for player_id in sorted(latest)]
+    valuation = Valuation(
+        category_weights=rating_services.get_category_weights(attribute_categories),
+        position_weights=rating_services.get_position_weights(),
+        transferred_ids=np.array([row[0] for row in rows], dtype=np.int64),
+        fees=np.array([row[-1] for row in rows], dtype=np.float64),
+        market_index=np.ones(len(PLAYER_POSITIONS)),
+    )
+    if rows:
+        _, positions, matrix, form, morale = rows_to_arrays(rows)
+        ratios = valuation.fees / np.maximum(
+            model_prices(valuation, positions, matrix, form, morale), 1
+        )
+        for i in range(len(PLAYER_POSITIONS)):
+            position_ratios = ratios[positions == i]
+            if len(position_ratios) >= VALUATION_MIN_TRANSFERS:
+                valuation.market_index[i] = np.clip(
+                    np.median(position_ratios), *VALUATION_MARKET_RANGE
+                )
+
+    return valuation
+
+
+def price_players(
+    valuation: Valuation,
+    ids: np.ndarray,
+    positions: np.ndarray,
+    matrix: np.ndarray,
+    form: np.ndarray,
+    morale: np.ndarray,
+) -> np.ndarray:
+    """
+    Compute the market price of players in one pass of array math.
+
+    Model prices are scaled by the market index of each position, then
+    blended with the recent fee of transferred players. Prices are rounded
+    to VALUATION_ROUNDING and never below it.
+
+    :return: Prices as stored in ``Player.price``.
+    :rtype: numpy.ndarray
+    """
+
+    prices = model_prices(valuation, positions, matrix, form, morale)
+    prices *= valuation.market_index[positions]
+    if len(valuation.transferred_ids):
+        index = np.minimum(
+            np.searchsorted(valuation.transferred_ids, ids),
+            len(valuation.transferred_ids) - 1,
+        )
+        traded = valuation.transferred_ids[index] == ids
+        prices[traded] += VALUATION_TRANSFER_WEIGHT * (
+            valuation.fees[index[traded]] - prices[traded]
+        )
+    rounded = np.rint(prices / VALUATION_ROUNDING) * VALUATION_ROUNDING
+
+    return np.maximum(rounded, VALUATION_ROUNDING).astype(np.int64)
+
+
+def value_deltas(team_ids: np.ndarray, differences: np.ndarray) -> dict:
+    """
+    Sum price changes by team, as ``(num_players, value)`` deltas.
+
+    Players without a team, with the id 0, are skipped.
+    """
+
+    owned = team_ids > 0
+    teams, inverse = np.unique(team_ids[owned], return_inverse=True)
+    sums = np.zeros(len(teams), dtype=np.int64)
+    np.add.at(sums, inverse, differences[owned])
+
+    return {
+        team_id: (0, value)
+        for team_id, value in zip(teams.tolist(), sums.tolist(), strict=True)
+        if value
+    }
+
+
+def lock_chunk(players, last_id: int, chunk_size: int) -> tuple:
+    """
+    Lock the next chunk of players after their teams.
+
+    The teams are locked first in id order, as complete_transfer does, so a
+    revaluation and a transfer wait for each other instead of deadlocking.
+
+    :return: The last id of the chunk, None after the last chunk, and the
+        rows of its players, None if some moved to a team not locked
+        meanwhile and the chunk must be locked again.
+    :rtype: tuple
+    """
+
+    chunk = list(
+        players.filter(id__gt=last_id).values_list("id", "team_id")[:chunk_size]
+    )
+    if not chunk:
+        return None, []
+    team_ids = {team_id for _, team_id in chunk if team_id}
+    transfer_services.lock_teams(team_ids)
+    end = chunk[-1][0]
+    rows = list(
+        players.select_for_update()
+        .filter(id__gt=last_id, id__lte=end)
+        .values_list(*VALUATION_FIELDS, "team_id", "price")
+    )
+    if any(row[-2] and row[-2] not in team_ids for row in rows):
+        return end, None
+
+    return end, rows
+
+
+def revalue_players(chunk_size: int = VALUATION_CHUNK_SIZE, progress=None) -> dict:
+    """
+    Reprice every player and roll the changes up into team values.
+
+    Players are walked in primary key chunks, each locked with its teams,
+    priced and written in its own transaction: two reads, and only if some
+    prices changed, one ``bulk_update`` of these rows and one ``F()``
+    update of ``Team.value`` per team whose players changed price, as the
+    signals do when a single player is saved.
+
+    :return: Number of players checked and updated, and team updates.
+    :rtype: dict
+
+    :raises ValuationError: If some attribute has no category.
+    """
+
+    valuation = load_valuation()
+    # pylint: disable=no-member
+    players = core_models.Player.objects.order_by("id")
+    checked = updated = teams = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            end, rows = lock_chunk(players, last_id, chunk_size)
+            if end is None:
+                break
+            if rows is None:
+                continue
+            last_id = end
+            if not rows:
+                continue
+            ids, positions, matrix, form, morale = rows_to_arrays(rows)
+            team_ids = np.array([row[-2] or 0 for row in rows], dtype=np.int64)
+            stored = np.array([row[-1] for row in rows], dtype=np.int64)
+            prices = price_players(valuation, ids, positions, matrix, form, morale)
+            changed = np.flatnonzero(prices != stored)
+            if len(changed):
+                now = timezone.now()
+                core_models.Player.objects.bulk_update(
+                    [
+                        core_models.Player(id=player_id, price=price, updated_at=now)
+                        for player_id, price in zip(
+                            ids[changed].tolist(),
+                            prices[changed].tolist(),
+                            strict=True,
+                        )
+                    ],
+                    ["price", "updated_at"],
+                )
+                deltas = value_deltas(
+                    team_ids[changed], prices[changed] - stored[changed]
+                )
+                team_services.adjust_team_totals(deltas)
+                teams += len(deltas)
+        checked += len(rows)
+        updated += len(changed)
+        if progress is not None:
+            progress(checked, updated)
+
+    return {"checked": checked, "updated": updated, "teams": teams}
+
+
+def benchmark_valuation(num_players: int, seed: int = 0) -> dict:
+    """Time the pricing of random players, without database time."""
+
+    rng = np.random.default_rng(seed)
+    matrix = rng.integers(30, 95, size=(num_players, len(ATTRIBUTES))).astype(
+        np.float64
+    )
+    positions = rng.integers(0, len(PLAYER_POSITIONS), size=num_players)
+    form = rng.integers(0, 100, size=num_players).astype(np.float64)
+    morale = rng.integers(0, 100, size=num_players).astype(np.float64)
+    ids = np.arange(1, num_players + 1, dtype=np.int64)
+    transferred = np.unique(rng.choice(ids, size=max(num_players // 100, 1)))
+    valuation = Valuation(
+        category_weights=rating_services.get_category_weights(
+            {
+                attribute: rating_services.CATEGORIES[
+                    i % len(rating_services.CATEGORIES)
+                ]
+                for i, attribute in enumerate(ATTRIBUTES)
+            }
+        ),
+        position_weights=rating_services.get_position_weights(),
+        transferred_ids=transferred,
+        fees=rng.integers(10**5, 10**8, size=len(transferred)).astype(np.float64),
+        market_index=rng.uniform(*VALUATION_MARKET_RANGE, size=len(PLAYER_POSITIONS)),
+    )
+
+    start = time.perf_counter()
+    prices = price_players(valuation, ids, positions, matrix, form, morale)
+    seconds = time.perf_counter() - start
+
+    return {
+        "players": num_players,
+        "seconds": seconds,
+        "players_per_second": num_players / seconds,
+        "mean_price": float(prices.mean()),
+    }
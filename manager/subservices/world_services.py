@@ -0,0 +1,333 @@
+"""Generate synthetic worlds of leagues, teams and players."""
+
+from dataclasses import dataclass
+import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import crypto
+import numpy as np
+
+from manager.cache import reference_cache
+from manager.submodels import base_models, core_models
+from manager.subservices import rating_services, transfer_services
+
+
+UserModel = get_user_model()
+ATTRIBUTES: list[str] = rating_services.ATTRIBUTES
+PLAYER_POSITIONS: list[str] = settings.PLAYER_POSITIONS
+WORLD_CHUNK_SIZE: int = settings.IMPORT_CHUNK_SIZE
+# Share of each position in a squad, in PLAYER_POSITIONS order.
+SQUAD_SHAPE = [0.1, 0.35, 0.35, 0.2]
+
+
+@dataclass
+class World:
+    """Ids of the rows of a generated world, grouped by model."""
+
+    prefix: str
+    owner_id: int
+    country_ids: list[int]
+    league_ids: list[int]
+    team_ids: np.ndarray
+    player_ids: np.ndarray
+    transfer_ids: np.ndarray
+    counter_offers: int
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of rows of every model."""
+
+        return {
+            "countries": len(self.country_ids),
+            "leagues": len(self.league_ids),
+            "teams": len(self.team_ids),
+            "players": len(self.player_ids),
+            "transfers": len(self.transfer_ids),
+            "counter_offers": self.counter_offers,
+        }
+
+
+@dataclass
+class Squads:
+    """Generated players of consecutive teams, one row per player."""
+
+    positions: np.ndarray
+    attributes: np.ndarray
+    ratings: np.ndarray
+    prices: np.ndarray
+    salaries: np.ndarray
+
+
+def _ids_by_name(model, prefix: str) -> dict[str, int]:
+    """Read back ids of rows named with a prefix, as bulk_create may not set them."""
+
+    # pylint: disable=no-member
+    return dict(model.objects.filter(name__startswith=prefix).values_list("name", "id"))
+
+
+def squad_positions(num_teams: int, players_per_team: int) -> np.ndarray:
+    """Return the position index of every player, team by team."""
+
+    counts = np.floor(np.array(SQUAD_SHAPE) * players_per_team).astype(int)
+    counts[2] += players_per_team - counts.sum()
+    squad = np.repeat(np.arange(len(PLAYER_POSITIONS)), counts)
+
+    return np.tile(squad, num_teams)
+
+
+def draw_squads(rng, num_teams: int, players_per_team: int) -> Squads:
+    """Draw attributes of all players and derive ratings, prices and salaries."""
+
+    num_players = num_teams * players_per_team
+    positions = squad_positions(num_teams, players_per_team)
+    attributes = rng.integers(30, 95, size=(num_players, len(ATTRIBUTES)))
+    categories, overall = rating_services.compute_ratings(
+        attributes.astype(np.float64),
+        rating_services.get_category_weights(
+            rating_services.get_attribute_categories()
+        ),
+        rating_services.get_position_weights(),
+    )
+    ratings = rating_services.PlayerRatings(
+        np.zeros(num_players, dtype=np.int64), positions, categories, overall
+    )
+    # Prices grow with the fourth power of the rating, from the default value.
+    ratio = ratings.own_overall / settings.DEFAULT_ATTRIBUTE_VALUE
+    prices = np.rint(settings.DEFAULT_PLAYER_VALUE * ratio**4 / 1000) * 1000
+
+    return Squads(
+        positions=positions,
+        attributes=attributes,
+        ratings=ratings.stored_values(),
+        prices=prices.astype(np.int64),
+        salaries=np.rint(settings.DEFAULT_SALARY * ratio).astype(np.int64),
+    )
+
+
+def _create_players(rng, squads: Squads, team_ids, country_ids, chunk_size: int):
+    """
+    Insert generated squads and return their ``(id, team_id, price)`` rows.
+
+    :return: Array of shape ``(players, 3)``.
+    :rtype: numpy.ndarray
+    """
+
+    num_players = len(squads.positions)
+    player_teams = np.repeat(team_ids, num_players // max(len(team_ids), 1))
+    player_countries = rng.choice(country_ids, size=num_players)
+    statuses = settings.STATUS["player"]
+    today = datetime.date.today()
+    for start in range(0, num_players, chunk_size):
+        end = min(start + chunk_size, num_players)
+        columns = zip(
+            player_teams[start:end].tolist(),
+            player_countries[start:end].tolist(),
+            squads.positions[start:end].tolist(),
+            squads.attributes[start:end].tolist(),
+            squads.ratings[start:end].tolist(),
+            squads.prices[start:end].tolist(),
+            squads.salaries[start:end].tolist(),
+            strict=True,
+        )
+        # pylint: disable=no-member
+        core_models.Player.objects.bulk_create(
+            [
+                core_models.Player(
+                    first_name="Player",
+                    last_name=str(start + i),
+                    team_id=team_id,
+                    country_id=country_id,
+                    position=PLAYER_POSITIONS[position],
+                    status=statuses[(start + i) % 2],
+                    join_date=today,
+                    price=price,
+                    salary=salary,
+                    **dict(zip(ATTRIBUTES, attributes, strict=True)),
+                    **dict(zip(rating_services.RATING_FIELDS, ratings, strict=True)),
+                )
+                for i, (
+                    team_id,
+                    country_id,
+                    position,
+                    attributes,
+                    ratings,
+                    price,
+                    salary,
+                ) in enumerate(columns)
+            ]
+        )
+
+    # pylint: disable=no-member
+    rows = core_models.Player.objects.filter(team_id__in=team_ids.tolist()).order_by(
+        "id"
+    )
+
+    return np.array(
+        list(rows.values_list("id", "team_id", "price")), dtype=np.int64
+    ).reshape(-1, 3)
+
+
+def _create_transfers(
+    rng, team_ids, players, transfers: int, counter_offers: int, chunk_size: int
+) -> tuple[np.ndarray, int]:
+    """
+    Insert open BUY bids for random players, some of them countered.
+
+    Loans cannot be completed, so none are generated.
+
+    :return: Ids of the transfers and the number of counter offers.
+    :rtype: tuple
+    """
+
+    transfers = min(transfers, len(players))
+    if len(team_ids) < 2 or not transfers:
+        return np.zeros(0, dtype=np.int64), 0
+
+    team_index = {team_id: i for i, team_id in enumerate(team_ids.tolist())}
+    chosen = players[rng.choice(len(players), size=transfers, replace=False)]
+    sellers = np.array([team_index[team_id] for team_id in chosen[:, 1].tolist()])
+    buyers = sellers + rng.integers(1, len(team_ids), size=transfers)
+    offered = np.rint(chosen[:, 2] * rng.uniform(0.8, 1.3, size=transfers))
+    bids = [
+        {
+            "player_id": player_id,
+            "seller_id": seller,
+            "buyer_id": buyer,
+            "asking_price": asking,
+            "offered_price": offer,
+        }
+        for (player_id, _, asking), seller, buyer, offer in zip(
+            chosen.tolist(),
+            team_ids[sellers].tolist(),
+            team_ids[buyers % len(team_ids)].tolist(),
+            offered.astype(np.int64).tolist(),
+            strict=True,
+        )
+    ]
+
+    # pylint: disable=no-member
+    core_models.Transfer.objects.bulk_create(
+        [
+            core_models.Transfer(status="OPEN", contract=transfer_services.BUY, **bid)
+            for bid in bids
+        ],
+        batch_size=chunk_size,
+    )
+    countered = rng.choice(
+        transfers, size=min(counter_offers, transfers), replace=False
+    )
+    statuses = rng.choice(settings.STATUS["offer"], size=len(countered)).tolist()
+    core_models.CounterOffer.objects.bulk_create(
+        [
+            core_models.CounterOffer(
+                **{**bids[i], "asking_price": bids[i]["offered_price"] * 11 // 10},
+                status=status,
+                type=transfer_services.BUY,
+            )
+            for i, status in zip(countered.tolist(), statuses, strict=True)
+        ],
+        batch_size=chunk_size,
+    )
+    transfer_ids = core_models.Transfer.objects.filter(
+        player_id__in=chosen[:, 0].tolist()
+    ).values_list("id", flat=True)
+
+    return np.sort(np.array(list(transfer_ids), dtype=np.int64)), len(countered)
+
+
+def generate_world(
+    countries: int = 2,
+    leagues_per_country: int = 2,
+    teams_per_league: int = 10,
+    players_per_team: int = settings.DEFAULT_INITIAL_PLAYER_NUMBER,
+    transfers: int = 100,
+    counter_offers: int = 20,
+    owner=None,
+    seed: int = 0,
+    chunk_size: int = WORLD_CHUNK_SIZE,
+) -> World:
+    """
+    Insert a random world and return the ids of its rows.
+
+    Attributes, ratings and prices of all players are drawn and computed at
+    once with NumPy and every model is inserted with ``bulk_create``. Teams
+    are created with the totals of their generated squads, since bulk
+    inserts skip the signals that keep them. Names start with a random
+    prefix, so a world can be generated next to existing data. Without an
+    owner, a superuser owning every team is created.
+    """
+
+    rng = np.random.default_rng(seed)
+    prefix = f"World {crypto.get_random_string(8)}"
+    if owner is None:
+        owner = UserModel.objects.create_superuser(
+            email=f"{prefix.split()[1].lower()}@example.com", password=None
+        )
+
+    # pylint: disable=no-member
+    base_models.Country.objects.bulk_create(
+        [base_models.Country(name=f"{prefix} {i}") for i in range(countries)]
+    )
+    country_ids = sorted(_ids_by_name(base_models.Country, prefix).values())
+    reference_cache.bump_on_commit("country")
+
+    league_names = [
+        (f"{prefix} {country_id}-{division}", country_id, division)
+        for country_id in country_ids
+        for division in range(1, leagues_per_country + 1)
+    ]
+    core_models.League.objects.bulk_create(
+        [
+            core_models.League(name=name, country_id=country_id, division=division)
+            for name, country_id, division in league_names
+        ]
+    )
+    leagues = _ids_by_name(core_models.League, prefix)
+    league_ids = [leagues[name] for name, _, _ in league_names]
+    reference_cache.bump_on_commit("league")
+
+    num_teams = len(league_ids) * teams_per_league
+    squads = draw_squads(rng, num_teams, players_per_team)
+    values = squads.prices.reshape(num_teams, players_per_team).sum(axis=1)
+    team_leagues = np.repeat(league_ids, teams_per_league).tolist()
+    team_names = [f"{prefix} {i}" for i in range(num_teams)]
+    core_models.Team.objects.bulk_create(
+        [
+            core_models.Team(
+                name=name,
+                owner=owner,
+                league_id=league_id,
+                num_players=players_per_team,
+                value=value,
+            )
+            for name, league_id, value in zip(
+                team_names, team_leagues, values.tolist(), strict=True
+            )
+        ],
+        batch_size=chunk_size,
+    )
+    teams = _ids_by_name(core_models.Team, prefix)
+    team_ids = np.array([teams[name] for name in team_names], dtype=np.int64)
+    core_models.Standing.objects.bulk_create(
+        [
+            core_models.Standing(league_id=league_id, team_id=team_id)
+            for league_id, team_id in zip(team_leagues, team_ids.tolist(), strict=True)
+        ],
+        batch_size=chunk_size,
+    )
+
+    players = _create_players(rng, squads, team_ids, country_ids, chunk_size)
+    transfer_ids, counter_offers = _create_transfers(
+        rng, team_ids, players, transfers, counter_offers, chunk_size
+    )
+
+    return World(
+        prefix=prefix,
+        owner_id=owner.pk,
+        country_ids=country_ids,
+        league_ids=league_ids,
+        team_ids=team_ids,
+        player_ids=np.sort(players[:, 0]),
+        transfer_ids=transfer_ids,
+        counter_offers=counter_offers,
+    )
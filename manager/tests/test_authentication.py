@@ -0,0 +1,155 @@
+"""Test cached authentication."""
+
+import base64
+import importlib
+import io
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import management
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from rest_framework import authentication as rest_authentication
+from rest_framework import status, test
+from rest_framework.authtoken.models import Token
+
+from manager import authentication, cache
+
+
+UserModel = get_user_model()
+
+
+class TestCachedAuthentication(test.APITestCase):
+    """Verify credentials once per TTL and again after any change."""
+
+    def setUp(self):
+        authentication.credential_cache.clear()
+        self.__password = get_random_string(length=12)
+        self.__user = UserModel.objects.create_user(
+            email="user@test.com", password=self.__password
+        )
+        self.__url = reverse("manager-list")
+
+    def __basic(self, password=None):
+        credentials = f"{self.__user.email}:{password or self.__password}"
+        return "Basic " + base64.b64encode(credentials.encode()).decode()
+
+    def __get(self, header):
+        return self.client.get(self.__url, HTTP_AUTHORIZATION=header)
+
+    def test_basic(self):
+        """The password is hashed once until the user changes."""
+
+        with mock.patch.object(
+            UserModel,
+            "check_password",
+            autospec=True,
+            side_effect=UserModel.check_password,
+        ) as check_password:
+            for _ in range(3):
+                self.assertEqual(
+                    self.__get(self.__basic()).status_code, status.HTTP_200_OK
+                )
+            self.assertEqual(check_password.call_count, 1)
+
+            self.__user.set_password("new password")
+            self.__user.save()
+            response = self.__get(self.__basic())
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            response = self.__get(self.__basic("new password"))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.__get(self.__basic("wrong")).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_changed_while_verifying(self):
+        """A change committed while credentials are verified is not cached over."""
+
+        verify = UserModel.check_password
+
+        def check_password(user, password):
+            authentication.invalidate_credentials(user.pk)
+            return verify(user, password)
+
+        with mock.patch.object(
+            UserModel, "check_password", autospec=True, side_effect=check_password
+        ) as checked:
+            for _ in range(2):
+                self.assertEqual(
+                    self.__get(self.__basic()).status_code, status.HTTP_200_OK
+                )
+        self.assertEqual(checked.call_count, 2)
+
+    def test_token(self):
+        """The token table is read once until the token is rotated."""
+
+        token = Token.objects.create(user=self.__user)
+        with mock.patch.object(
+            Token.objects, "select_related", wraps=Token.objects.select_related
+        ) as lookup:
+            for _ in range(3):
+                response = self.__get(f"Token {token.key}")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(lookup.call_count, 1)
+
+        key = token.key
+        token.delete()
+        Token.objects.create(user=self.__user)
+        self.assertEqual(
+            self.__get(f"Token {key}").status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_logout(self):
+        """Logging out bumps the credential version of the user."""
+
+        namespace = authentication.user_namespace(self.__user.pk)
+        version = cache.get_version(namespace)
+        self.client.force_login(self.__user)
+        self.client.logout()
+        self.assertGreater(cache.get_version(namespace), version)
+
+    def test_local_cache(self):
+        """Without a shared cache the uncached DRF classes are used."""
+
+        self.assertIs(
+            authentication.BasicAuthentication,
+            authentication.CachedBasicAuthentication,
+        )
+        self.addCleanup(importlib.reload, authentication)
+        with mock.patch.object(cache, "AUTH_CACHE_SHARED", False):
+            importlib.reload(authentication)
+        self.assertIs(
+            authentication.BasicAuthentication,
+            rest_authentication.BasicAuthentication,
+        )
+        self.assertIs(
+            authentication.TokenAuthentication,
+            rest_authentication.TokenAuthentication,
+        )
+
+    def test_ttl_cache(self):
+        """Entries expire after the TTL and the size stays bounded."""
+
+        now = [0.0]
+        ttl_cache = cache.TTLCache(maxsize=2, ttl=10, timer=lambda: now[0])
+        for key in ["a", "b", "c"]:
+            ttl_cache.set(key, key.upper())
+        self.assertEqual(len(ttl_cache), 2)
+        self.assertIsNone(ttl_cache.get("a"))
+        self.assertEqual(ttl_cache.get("b"), "B")
+        now[0] = 10
+        self.assertIsNone(ttl_cache.get("c"))
+        self.assertEqual(ttl_cache.stats(), {"hits": 1, "misses": 2})
+
+    def test_benchmark(self):
+        """The benchmark reports every authentication and leaves no user."""
+
+        out = io.StringIO()
+        management.call_command("benchmark_auth", requests=2, stdout=out)
+        results = json.loads(out.getvalue())
+        self.assertEqual(
+            [result["authentication"] for result in results],
+            ["basic", "cached basic", "token", "cached token"],
+        )
+        self.assertEqual(UserModel.objects.count(), 1)
@@ -0,0 +1,185 @@
+"""Test the world generator and the benchmark suite."""
+
+import io
+import json
+import pathlib
+import tempfile
+
+from django.core import management
+from django.test import TestCase
+
+from manager import models, services
+
+
+class TestWorldGenerator(TestCase):
+    """Generate consistent worlds with bulk inserts."""
+
+    def setUp(self):
+        self.__world = services.generate_world(
+            countries=2,
+            leagues_per_country=2,
+            teams_per_league=3,
+            players_per_team=5,
+            transfers=10,
+            counter_offers=4,
+            seed=1,
+        )
+
+    def test_counts(self):
+        """Every model gets the requested number of rows."""
+
+        self.assertEqual(
+            self.__world.counts(),
+            {
+                "countries": 2,
+                "leagues": 4,
+                "teams": 12,
+                "players": 60,
+                "transfers": 10,
+                "counter_offers": 4,
+            },
+        )
+        # pylint: disable=no-member
+        self.assertEqual(models.Player.objects.count(), 60)
+        self.assertEqual(models.CounterOffer.objects.count(), 4)
+        self.assertEqual(models.Standing.objects.count(), 12)
+
+    def test_consistent(self):
+        """Stored team totals and ratings match the generated players."""
+
+        self.assertEqual(services.reconcile_teams()["updated"], 0)
+        self.assertEqual(services.reconcile_ratings()["updated"], 0)
+
+    def test_transfers(self):
+        """Completable bids are sold by the player's team to another team."""
+
+        # pylint: disable=no-member
+        for transfer in models.Transfer.objects.select_related("player"):
+            self.assertEqual(transfer.contract, "BUY")
+            self.assertEqual(transfer.seller_id, transfer.player.team_id)
+            self.assertNotEqual(transfer.buyer_id, transfer.seller_id)
+            self.assertEqual(transfer.asking_price, transfer.player.price)
+
+    def test_next_to_existing(self):
+        """A second world does not clash with the first."""
+
+        world = services.generate_world(
+            countries=2, leagues_per_country=1, teams_per_league=2, players_per_team=3
+        )
+
+        self.assertEqual(world.counts()["teams"], 4)
+        self.assertTrue(set(world.team_ids).isdisjoint(self.__world.team_ids))
+
+
+class TestBenchmark(TestCase):
+    """Measure calls and compare runs."""
+
+    def test_measure(self):
+        """Percentiles, queries and peak memory are reported."""
+
+        def call(i):
+            # pylint: disable=no-member
+            list(models.Country.objects.filter(id=i))
+            return bytearray(100000)
+
+        result = services.measure(call, repeat=5)
+
+        self.assertEqual(result["queries"], 1)
+        self.assertEqual(result["calls"], 5)
+        self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        self.assertGreater(result["peak_memory_kb"], 90)
+
+    def test_isolated(self):
+        """Cases that change the world leave it as it was for the next one."""
+
+        world = services.generate_world(
+            countries=1,
+            leagues_per_country=1,
+            teams_per_league=3,
+            players_per_team=2,
+            transfers=2,
+            seed=1,
+        )
+        # pylint: disable=no-member
+        transfers = models.Transfer.objects.order_by("id")
+        before = list(transfers.values_list("id", "status"))
+        users = models.User.objects.count()
+
+        services.benchmark_service_calls(world, 2, ["make_bid"])
+        results = services.benchmark_endpoints(
+            world, 2, ["register", "transfer-complete"]
+        )
+
+        self.assertEqual(list(transfers.values_list("id", "status")), before)
+        self.assertEqual(models.User.objects.count(), users)
+        self.assertEqual(sorted(results), ["register", "transfer-complete"])
+        self.assertEqual(results["transfer-complete"]["errors"], 0)
+
+    def test_compare(self):
+        """Slower, bigger or chattier cases regress, noise does not."""
+
+        case = {"p95_ms": 10.0, "queries": 2, "peak_memory_kb": 100.0}
+        baseline = {"endpoints": {"a": case, "b": case, "c": case, "d": case}}
+        current = {
+            "endpoints": {
+                "a": {**case, "p95_ms": 15.0},
+                "b": {**case, "queries": 3},
+                "c": {**case, "p95_ms": 10.5, "peak_memory_kb": 120.0},
+                "d": {**case, "peak_memory_kb": 1000.0},
+                "new": case,
+            }
+        }
+
+        regressions = services.compare_results(baseline, current, tolerance=0.2)
+
+        self.assertEqual(
+            [(item["case"], item["metric"]) for item in regressions],
+            [
+                ("endpoints.a", "p95_ms"),
+                ("endpoints.b", "queries"),
+                ("endpoints.d", "peak_memory_kb"),
+            ],
+        )
+
+    def test_command(self):
+        """The command reports JSON, rolls back and fails on regressions."""
+
+        options = {
+            "countries": 1,
+            "leagues": 1,
+            "teams": 2,
+            "players": 4,
+            "transfers": 2,
+            "offers": 1,
+            "repeat": 2,
+            "only": ["team-list", "league-standings", "top_players"],
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / "baseline.json"
+            management.call_command(
+                "benchmark", output=path, stdout=io.StringIO(), **options
+            )
+            result = json.loads(path.read_text())
+
+            self.assertEqual(result["world"]["players"], 8)
+            self.assertEqual(
+                sorted(result["endpoints"]), ["league-standings", "team-list"]
+            )
+            self.assertEqual(sorted(result["services"]), ["top_players"])
+            self.assertEqual(result["endpoints"]["team-list"]["errors"], 0)
+            self.assertFalse(result["settings"]["debug"])
+            self.assertFalse(
+                any(
+                    middleware.startswith(services.DEV_MIDDLEWARE)
+                    for middleware in result["settings"]["middleware"]
+                )
+            )
+            # pylint: disable=no-member
+            self.assertFalse(models.Team.objects.exists())
+
+            result["endpoints"]["team-list"]["queries"] = 0
+            path.write_text(json.dumps(result))
+            with self.assertRaises(management.CommandError):
+                management.call_command(
+                    "benchmark", baseline=path, stdout=io.StringIO(), **options
+                )
@@ -0,0 +1,158 @@
+"""Test the versioned reference cache."""
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import crypto
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from manager import models, services
+from manager.cache import ReferenceCache, reference_cache, version_key
+
+
+UserModel = get_user_model()
+
+
+class TestReferenceCache(TestCase):
+    """Serve reference data from two tiers and invalidate it by version."""
+
+    def setUp(self):
+        cache.clear()
+        # The test settings turn the shared reference cache off, since rolled
+        # back rows would stay cached; use it here and empty it after a test.
+        for attribute, value in [("maxsize", 256), ("timeout", 60)]:
+            patcher = mock.patch.object(reference_cache, attribute, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        reference_cache.clear()
+        self.addCleanup(reference_cache.clear)
+        self.addCleanup(cache.clear)
+        self.__worker = ReferenceCache(maxsize=2, timeout=60)
+        self.__other_worker = ReferenceCache(maxsize=2, timeout=60)
+        self.__loader = mock.Mock(
+            side_effect=lambda: {"loads": self.__loader.call_count}
+        )
+
+    def test_tiers(self):
+        """Values are loaded once and then served locally or from the shared tier."""
+
+        for _ in range(3):
+            self.assertEqual(
+                self.__worker.get_or_set("country", "names", self.__loader),
+                {"loads": 1},
+            )
+        self.assertEqual(
+            self.__other_worker.get_or_set("country", "names", self.__loader),
+            {"loads": 1},
+        )
+        self.assertEqual(self.__loader.call_count, 1)
+        self.assertEqual(
+            self.__worker.stats(), {"local_hits": 2, "shared_hits": 0, "misses": 1}
+        )
+        self.assertEqual(
+            self.__other_worker.stats(),
+            {"local_hits": 0, "shared_hits": 1, "misses": 0},
+        )
+
+    def test_bump(self):
+        """A bump in one process makes every process reload."""
+
+        self.__worker.get_or_set("country", "names", self.__loader)
+        self.__other_worker.get_or_set("country", "names", self.__loader)
+        self.__other_worker.get_or_set("league", "rows", self.__loader)
+        self.__worker.bump("country")
+        self.assertEqual(
+            self.__other_worker.get_or_set("country", "names", self.__loader),
+            {"loads": 3},
+        )
+        self.assertEqual(
+            self.__worker.get_or_set("country", "names", self.__loader), {"loads": 3}
+        )
+        self.assertEqual(
+            self.__other_worker.get_or_set("league", "rows", self.__loader),
+            {"loads": 2},
+        )
+        self.assertEqual(self.__loader.call_count, 3)
+
+    def test_lru(self):
+        """The local tier keeps only the most recently used entries."""
+
+        for key in ["a", "b", "a", "c"]:
+            self.__worker.get_or_set("country", key, self.__loader)
+        version = self.__worker.get_version("country")
+        for key in ["a", "b", "c"]:
+            cache.delete(f"reference:country:{key}", version=version)
+        self.__worker.get_or_set("country", "a", self.__loader)
+        self.__worker.get_or_set("country", "b", self.__loader)
+        self.assertEqual(self.__loader.call_count, 4)
+        self.__worker.clear()
+        self.assertEqual(
+            self.__worker.stats(),
+            dict.fromkeys(["local_hits", "shared_hits", "misses"], 0),
+        )
+
+    def test_lost_version(self):
+        """Entries of a namespace whose version is evicted are not served again."""
+
+        self.__worker.get_or_set("country", "names", self.__loader)
+        version = self.__worker.get_version("country")
+        cache.delete(version_key("country"))
+        self.assertGreater(self.__worker.get_version("country"), version)
+        self.assertEqual(
+            self.__worker.get_or_set("country", "names", self.__loader), {"loads": 2}
+        )
+
+    def test_signals(self):
+        """Saving or deleting reference rows bumps their namespace."""
+
+        self.assertEqual(services.get_countries(), {})
+        version = reference_cache.get_version("country")
+        country = models.Country.objects.create(name="Country")
+        self.assertGreater(reference_cache.get_version("country"), version)
+        version = reference_cache.get_version("country")
+        league = models.League.objects.create(country=country, division=1)
+        self.assertEqual(services.get_leagues()[league.id]["country_id"], country.id)
+        self.assertEqual(services.get_countries(), {country.id: "Country"})
+        with self.assertNumQueries(0):
+            services.get_countries()
+            services.get_leagues()
+        league.delete()
+        self.assertEqual(services.get_leagues(), {})
+        self.assertEqual(reference_cache.get_version("country"), version)
+
+    def test_list_views(self):
+        """Reference lists are served from the cache until they change."""
+
+        client = APIClient()
+        client.force_authenticate(
+            UserModel.objects.create_user(
+                email="admin@test.com",
+                password=crypto.get_random_string(length=12),
+                is_staff=True,
+            )
+        )
+        models.Country.objects.create(name="First")
+        url = reverse("countries")
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            cached = client.get(url)
+        self.assertEqual(cached.json(), response.json())
+        self.assertEqual(cached["ETag"], response["ETag"])
+        with self.assertNumQueries(0):
+            not_modified = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        models.Country.objects.create(name="Second")
+        response = client.get(url)
+        self.assertEqual(
+            [country["name"] for country in response.json()["results"]],
+            ["First", "Second"],
+        )
+        self.assertNotEqual(response["ETag"], cached["ETag"])
+        response = client.get(url, {"page_size": 1})
+        self.assertEqual(len(response.json()["results"]), 1)
@@ -0,0 +1,87 @@
+"""UnitTest for conditional GET on list endpoints."""
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from rest_framework import status, test
+
+from manager import encoders, models
+
+
+UserModel = get_user_model()
+
+
+class TestConditionalList(test.APITestCase):
+    """Answer unchanged collections with 304 Not Modified."""
+
+    def setUp(self) -> None:
+        password = get_random_string(length=12)
+        admin = UserModel.objects.create_superuser(
+            email="admin@test.com",
+            password=password,
+        )
+        self.client.login(email=admin.email, password=password)
+        self.__url = reverse("countries")
+        self.__countries = [
+            models.Country.objects.create(name=f"Country {i}") for i in range(3)
+        ]
+
+    def test_etag(self):
+        """A matching ETag skips the list, any change invalidates it."""
+
+        response = self.client.get(self.__url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        with mock.patch.object(
+            encoders.ValuesListMixin, "list", autospec=True
+        ) as list_rows:
+            response = self.client.get(self.__url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        list_rows.assert_not_called()
+
+        response = self.client.get(
+            self.__url, {"page_size": 1}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        country = self.__countries[0]
+        country.name = "Renamed"
+        country.save()
+        response = self.client.get(self.__url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        self.__countries[1].delete()
+        response = self.client.get(self.__url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_last_modified(self):
+        """If-Modified-Since is honoured when no ETag is sent."""
+
+        response = self.client.get(self.__url)
+        last_modified = response["Last-Modified"]
+        response = self.client.get(self.__url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(
+            self.__url, HTTP_IF_MODIFIED_SINCE="Mon, 01 Jan 2001 00:00:00 GMT"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_empty(self):
+        """Empty collections get an ETag but no Last-Modified."""
+
+        response = self.client.get(reverse("league-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+        response = self.client.get(
+            reverse("league-list"), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
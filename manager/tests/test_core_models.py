@@ -76,11 +76,10 @@ class TestCoreModels(test.APITestCase):
         self.assertEqual(self.__team.owner, self.__user)
         self.assertEqual(self.__team.manager, self.__manager)
         self.assertEqual(self.__team.has_manager, True)
-        self.assertEqual(
-            self.__team.num_players, settings.DEFAULT_INITIAL_PLAYER_NUMBER
-        )
+        self.__team.refresh_from_db()
+        self.assertEqual(self.__team.num_players, 1)
         self.assertEqual(self.__team.budget, settings.DEFAULT_BUDGET)
-        self.assertEqual(self.__team.value, settings.DEFAULT_VALUE)
+        self.assertEqual(self.__team.value, self.__player.price)
         self.assertEqual(self.__team.league, self.__leagues[0])
         self.assertEqual(self.__team.earning, 0)
         self.assertEqual(self.__team.starting_manager_salary, settings.DEFAULT_SALARY)
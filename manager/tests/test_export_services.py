@@ -0,0 +1,115 @@
+"""Test streaming exports."""
+
+import csv
+import datetime
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from rest_framework import status, test
+
+from manager import models, services
+
+
+UserModel = get_user_model()
+
+
+class TestExport(test.APITestCase):
+    """Stream players, teams and transfers."""
+
+    def setUp(self) -> None:
+        password = get_random_string(length=12)
+        self.__admin = UserModel.objects.create_superuser(
+            email="admin@test.com",
+            password=password,
+        )
+        self.client.login(email=self.__admin.email, password=password)
+        country = models.Country.objects.create(name="Country")
+        league = models.League.objects.create(
+            name="League", country=country, division=1
+        )
+        self.__team = models.Team.objects.create(
+            name="Team", league=league, owner=self.__admin
+        )
+        for i in range(5):
+            models.Player.objects.create(
+                first_name=f"Player {i}",
+                team=self.__team,
+                status=settings.STATUS["player"][0],
+                salary=1000,
+                position=settings.PLAYER_POSITIONS[i % 4],
+                join_date=datetime.date.today(),
+            )
+
+    def __get(self, model, **params):
+        response = self.client.get(reverse("export", args=[model]), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        """Every row is one JSON line in (updated_at, id) order."""
+
+        response, content = self.__get("players")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in content.splitlines()]
+        expected = list(
+            models.Player.objects.order_by("updated_at", "id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual([row["id"] for row in rows], expected)
+        self.assertEqual(rows[0]["team_id"], self.__team.id)
+        self.assertEqual(rows[0]["first_name"], "Player 0")
+        self.assertIn("overall", rows[0])
+
+    def test_csv(self):
+        """CSV exports start with a header of the model columns."""
+
+        response, content = self.__get("teams", output="csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], str(self.__team.id))
+        self.assertEqual(rows[0]["owner_id"], str(self.__admin.id))
+        self.__team.refresh_from_db()
+        updated_at = datetime.datetime.fromisoformat(rows[0]["updated_at"])
+        self.assertEqual(updated_at, self.__team.updated_at)
+
+    def test_updated_at_range(self):
+        """Only rows updated in [since, until) are exported."""
+
+        middle = timezone.now()
+        player = models.Player.objects.order_by("id").first()
+        player.first_name = "Updated"
+        player.save()
+        _, content = self.__get("players", since=middle.isoformat())
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [player.id])
+        _, content = self.__get("players", until=middle.isoformat())
+        self.assertEqual(len(content.splitlines()), 4)
+        _, content = self.__get("transfers", since="2000-01-01")
+        self.assertEqual(content, "")
+
+    def test_invalid(self):
+        """Unknown exports, formats and dates are rejected."""
+
+        cases = [
+            ("managers", {}, status.HTTP_404_NOT_FOUND),
+            ("players", {"output": "xml"}, status.HTTP_400_BAD_REQUEST),
+            ("players", {"since": "yesterday"}, status.HTTP_400_BAD_REQUEST),
+            ("players", {"since": "2024-02-30"}, status.HTTP_400_BAD_REQUEST),
+            ("players", {"until": "2024-02-30T00:00"}, status.HTTP_400_BAD_REQUEST),
+        ]
+        for model, params, code in cases:
+            response = self.client.get(reverse("export", args=[model]), params)
+            self.assertEqual(response.status_code, code)
+        self.assertRaises(KeyError, services.export_rows, "managers")
+
+        self.client.logout()
+        response = self.client.get(reverse("export", args=["players"]))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,147 @@
+"""Test streaming player imports."""
+
+import csv
+import io
+import json
+import pathlib
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import management
+from django.test import TestCase
+from django.utils import crypto
+
+from manager import models, services
+
+
+UserModel = get_user_model()
+ROWS = [
+    {
+        "first_name": f"First {i}",
+        "last_name": f"Last {i}",
+        "country": ["England", "Brazil", "France"][i % 3],
+        "team": "" if i == 4 else f"Team {i % 2}",
+        "league": "Premier League",
+        "league_country": "England",
+        "division": "1",
+        "position": settings.PLAYER_POSITIONS[i % 4].lower(),
+        "price": str(1000 * i),
+        "salary": "500",
+        "join_date": "2023-07-01",
+        "finishing": str(50 + i),
+    }
+    for i in range(5)
+]
+
+
+class TestImportServices(TestCase):
+    """Test importing CSV and JSON lines datasets."""
+
+    def setUp(self):
+        self.__owner = UserModel.objects.create_superuser(
+            email="admin@test.com",
+            password=crypto.get_random_string(length=12),
+        )
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__path = pathlib.Path(self.__directory.name)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def __write_csv(self, rows, name="players.csv"):
+        path = self.__path / name
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+        return path
+
+    def __write_jsonl(self, rows, name="players.jsonl"):
+        path = self.__path / name
+        with open(path, "w", encoding="utf-8") as file:
+            for row in rows:
+                file.write(json.dumps(row) + "\n\n")
+
+        return path
+
+    def test_import(self):
+        """Rows are imported and foreign keys are created once."""
+
+        for path in [self.__write_csv(ROWS), self.__write_jsonl(ROWS)]:
+            result = services.import_players(
+                services.read_rows(path), self.__owner, chunk_size=2
+            )
+            self.assertEqual(result["rows"], len(ROWS))
+        self.assertEqual(models.Player.objects.count(), 2 * len(ROWS))
+        self.assertEqual(models.Country.objects.count(), 3)
+        self.assertEqual(models.League.objects.count(), 1)
+        self.assertEqual(models.Team.objects.count(), 2)
+        self.assertEqual(
+            set(models.Team.objects.values_list("owner", flat=True)), {self.__owner.pk}
+        )
+        self.assertEqual(
+            list(
+                models.Team.objects.order_by("name").values_list("num_players", "value")
+            ),
+            [(4, 4000), (4, 8000)],
+        )
+
+        free_agent = models.Player.objects.filter(first_name="First 4").first()
+        self.assertIsNone(free_agent.team)
+        self.assertEqual(free_agent.status, "FREE AGENT")
+        player = models.Player.objects.filter(first_name="First 1").first()
+        self.assertEqual(player.team.name, "Team 1")
+        self.assertEqual(player.team.league.country.name, "England")
+        self.assertEqual(player.country.name, "Brazil")
+        self.assertEqual(player.position, settings.PLAYER_POSITIONS[1])
+        self.assertEqual(player.finishing, 51)
+        self.assertEqual(player.status, "NOT FOR SALE")
+        ratings = services.rate_players([player])
+        self.assertEqual(player.overall, ratings.stored_values()[0, -1])
+
+    def test_invalid(self):
+        """Invalid rows abort the import and their chunk is rolled back."""
+
+        rows = [dict(ROWS[0]), {**ROWS[1], "position": "STRIKER"}]
+        path = self.__write_csv(rows)
+        with self.assertRaisesRegex(ValueError, "starting at row 1"):
+            services.import_players(services.read_rows(path), self.__owner)
+        self.assertEqual(models.Player.objects.count(), 0)
+
+        for row in [
+            {**ROWS[0], "status": "RETIRED"},
+            {**ROWS[0], "league": ""},
+            {**ROWS[0], "price": "-1"},
+        ]:
+            path = self.__write_csv([row])
+            self.assertRaises(
+                ValueError,
+                services.import_players,
+                services.read_rows(path),
+                self.__owner,
+            )
+        for name in ["players.txt", "players.json"]:
+            self.assertRaises(ValueError, list, services.read_rows(self.__path / name))
+
+    def test_command(self):
+        """The command imports a file and reports throughput."""
+
+        path = self.__write_jsonl(ROWS, name="players.data")
+        out = io.StringIO()
+        management.call_command(
+            "import_players", str(path), format="jsonl", chunk_size=3, stdout=out
+        )
+        self.assertIn("Imported 5 players", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+
+        for options in [{"owner": "missing@test.com"}, {"format": "csv"}]:
+            self.assertRaises(
+                management.CommandError,
+                management.call_command,
+                "import_players",
+                str(self.__path / "missing.csv"),
+                stdout=out,
+                **options,
+            )
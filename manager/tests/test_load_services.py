@@ -0,0 +1,105 @@
+"""Test the in-process load generator."""
+
+import io
+import json
+
+from unittest import mock
+
+from django.core import management
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from manager import models, services
+
+
+class TestLoadServices(TransactionTestCase):
+    """Drive the real WSGI and ASGI applications from several workers."""
+
+    def setUp(self):
+        self.__load = services.prepare_load(
+            2, countries=1, leagues_per_country=1, teams_per_league=2, transfers=0
+        )
+
+    def test_prepare(self):
+        """Every virtual user gets a token and a team of its own."""
+
+        self.assertEqual(len(self.__load.users), 2)
+        # pylint: disable=no-member
+        for user in self.__load.users:
+            team = models.Team.objects.select_related("owner").get(id=user.team_id)
+            self.assertEqual(team.owner.email, user.email)
+            self.assertEqual(team.owner.auth_token.key, user.token)
+
+    def test_wsgi(self):
+        """Scenarios succeed through WSGI_APPLICATION and are counted."""
+
+        level = services.run_level(
+            self.__load, "wsgi", 1, 0.3, {"list_teams": 2, "create_team": 1, "bid": 1}
+        )
+
+        self.assertGreater(level["requests"], 0)
+        self.assertEqual(level["errors"], 0, level["statuses"])
+        self.assertLessEqual(level["p50_ms"], level["p99_ms"])
+        self.assertEqual(set(level["statuses"]["list_teams"]), {"200"})
+
+    def test_asgi(self):
+        """Concurrent asyncio tasks go through ASGI_APPLICATION."""
+
+        level = services.run_level(self.__load, "asgi", 2, 0.3, {"list_teams": 1})
+
+        self.assertEqual(level["concurrency"], 2)
+        self.assertGreater(level["requests"], 0)
+        self.assertEqual(level["errors"], 0, level["statuses"])
+
+    def test_cleanup(self):
+        """Cleaning up removes the world, the users and their teams."""
+
+        services.cleanup_load(self.__load)
+
+        # pylint: disable=no-member
+        self.assertFalse(models.Team.objects.exists())
+        self.assertFalse(models.Player.objects.exists())
+        self.assertFalse(models.User.objects.exists())
+
+    def test_cleanup_queries(self):
+        """Players are deleted without updating the totals of their team each."""
+
+        with CaptureQueriesContext(connections["default"]) as queries:
+            services.cleanup_load(self.__load)
+
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "manager_team" SET "num_players"')
+        ]
+        self.assertEqual(updates, [])
+        # pylint: disable=no-member
+        self.assertFalse(models.Team.objects.exists())
+
+    def test_command(self):
+        """The command reports one level per interface and concurrency."""
+
+        stdout = io.StringIO()
+        management.call_command(
+            "loadtest",
+            interface="wsgi",
+            concurrency=[1, 2],
+            duration=0.2,
+            mix="list_teams",
+            teams=2,
+            stdout=stdout,
+            stderr=io.StringIO(),
+        )
+        result = json.loads(stdout.getvalue())
+
+        self.assertEqual([level["concurrency"] for level in result["levels"]], [1, 2])
+        self.assertEqual(result["mix"], {"list_teams": 1.0})
+
+    def test_command_sqlite_only(self):
+        """The command refuses to commit requests to other databases."""
+
+        with mock.patch.object(connections["default"], "vendor", "postgresql"):
+            with self.assertRaises(CommandError):
+                management.call_command("loadtest", stdout=io.StringIO())
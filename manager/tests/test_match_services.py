@@ -0,0 +1,116 @@
+"""Test the match simulation engine."""
+
+import datetime
+import io
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import management
+from django.test import TestCase
+from django.utils import crypto
+import numpy as np
+
+from manager import models, services
+from manager.subservices import match_services
+
+
+UserModel = get_user_model()
+
+
+class TestMatchServices(TestCase):
+    """Test team strengths and batched match simulation."""
+
+    def setUp(self):
+        user = UserModel.objects.create_user(
+            email="test@test.com",
+            password=crypto.get_random_string(length=12),
+        )
+        country = models.Country.objects.create(name="Country")
+        self.__leagues = [
+            models.League.objects.create(country=country, division=i)
+            for i in range(2)
+        ]
+        self.__teams = [
+            models.Team.objects.create(name=f"{i}", league=league, owner=user)
+            for i, league in enumerate(self.__leagues * 3)
+        ]
+        for team, value in [(self.__teams[0], 90), (self.__teams[2], 30)]:
+            for position in settings.PLAYER_POSITIONS:
+                models.Player.objects.create(
+                    team=team,
+                    status=settings.STATUS["player"][0],
+                    salary=1000,
+                    position=position,
+                    join_date=datetime.date.today(),
+                    **{
+                        attribute: value
+                        for attributes in settings.MATCH_STRENGTH_ATTRIBUTES.values()
+                        for attribute in attributes
+                    },
+                )
+
+    def test_team_strengths(self):
+        """Strengths average squad attributes, empty squads get defaults."""
+
+        strong, empty, weak = self.__teams[:3]
+        strengths = services.get_team_strengths([weak.pk, strong.pk, empty.pk])
+        self.assertEqual(strengths.team_ids.tolist(), [strong.pk, empty.pk, weak.pk])
+        np.testing.assert_allclose(strengths.rows([strong.pk])[0], 90)
+        np.testing.assert_allclose(strengths.rows([weak.pk])[0], 30)
+        np.testing.assert_allclose(
+            strengths.rows([empty.pk])[0], settings.DEFAULT_ATTRIBUTE_VALUE
+        )
+
+    def test_zero_strengths(self):
+        """Teams with zero strength still get finite scores."""
+
+        zero = np.zeros((2, len(match_services.UNITS)))
+        strong = np.full((2, len(match_services.UNITS)), 99.0)
+        home_goals, away_goals = match_services.expected_goals(strong, zero)
+        self.assertTrue(np.isfinite(home_goals).all())
+        np.testing.assert_array_equal(away_goals, 0)
+        match_services.sample_scores(home_goals, away_goals, np.random.default_rng(0))
+        home_goals, away_goals = match_services.expected_goals(zero, zero)
+        np.testing.assert_array_equal(home_goals, 0)
+
+    def test_simulate_matches(self):
+        """Stronger teams win more often and results are saved in batches."""
+
+        strong, _, weak = self.__teams[:3]
+        fixtures = [(strong.pk, weak.pk, strong.league_id)] * 500
+        matches = services.simulate_matches(fixtures, seed=1, batch_size=100)
+        self.assertEqual(len(matches), 500)
+        self.assertEqual(models.Match.objects.count(), 500)
+        home_goals = np.array([match.home_goals for match in matches])
+        away_goals = np.array([match.away_goals for match in matches])
+        self.assertGreater(home_goals.mean(), away_goals.mean())
+        self.assertGreater((home_goals > away_goals).mean(), 0.5)
+        self.assertEqual(services.simulate_matches([]), [])
+
+    def test_simulate_match(self):
+        """A single match between two teams is saved."""
+
+        match = services.simulate_match(self.__teams[0], self.__teams[2], seed=0)
+        self.assertEqual(match.league, self.__leagues[0])
+        self.assertEqual(match.home_team, self.__teams[0])
+        self.assertEqual(
+            str(match),
+            f"{match.home_team_id} {match.home_goals}-{match.away_goals} "
+            f"{match.away_team_id}",
+        )
+        match = services.simulate_match(self.__teams[0], self.__teams[1], seed=0)
+        self.assertIsNone(match.league)
+
+    def test_simulate_matchday(self):
+        """Every team of every league plays at most once, within its league."""
+
+        matches = services.simulate_matchday(seed=0)
+        self.assertEqual(len(matches), 2)
+        for match in models.Match.objects.select_related("home_team", "away_team"):
+            self.assertEqual(match.home_team.league_id, match.league_id)
+            self.assertEqual(match.away_team.league_id, match.league_id)
+        out = io.StringIO()
+        management.call_command(
+            "simulate_matchday", leagues=[self.__leagues[0].pk], stdout=out
+        )
+        self.assertIn("Simulated 1 matches", out.getvalue())
@@ -0,0 +1,145 @@
+"""Test request metrics and their Prometheus rendering."""
+
+import tempfile
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from manager import metrics
+
+
+class TestRegistry(SimpleTestCase):
+    """Aggregate counters and histograms across threads and processes."""
+
+    def test_histogram(self):
+        """Buckets are cumulative and end with +Inf, _sum and _count."""
+
+        registry = metrics.Registry()
+        labels = (("view", "team-list"),)
+        for value in [0, 3, 3, 1000]:
+            registry.observe("http_request_db_queries", labels, value)
+        text = registry.render()
+
+        self.assertIn('http_request_db_queries_bucket{view="team-list",le="0"} 1', text)
+        self.assertIn('http_request_db_queries_bucket{view="team-list",le="5"} 3', text)
+        self.assertIn(
+            'http_request_db_queries_bucket{view="team-list",le="500"} 3', text
+        )
+        self.assertIn(
+            'http_request_db_queries_bucket{view="team-list",le="+Inf"} 4', text
+        )
+        self.assertIn('http_request_db_queries_sum{view="team-list"} 1006', text)
+        self.assertIn('http_request_db_queries_count{view="team-list"} 4', text)
+
+    def test_threads(self):
+        """Every thread records into its own shard and collecting sums them."""
+
+        registry = metrics.Registry()
+        labels = (("view", "v"), ("method", "GET"), ("status", 200))
+
+        def work():
+            for _ in range(1000):
+                registry.inc("http_requests_total", labels)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(registry.collect()[("http_requests_total", labels)], 4000)
+        # pylint: disable=protected-access
+        self.assertEqual(registry._shards, [])
+
+        registry.inc("http_requests_total", labels)
+        self.assertEqual(registry.collect()[("http_requests_total", labels)], 4001)
+        self.assertEqual(len(registry._shards), 1)
+
+    def test_processes(self):
+        """Registries sharing a directory report the totals of all of them."""
+
+        labels = (("view", "league-list"), ("method", "GET"), ("status", 200))
+        with tempfile.TemporaryDirectory() as directory:
+            first = metrics.Registry(directory, identity="first")
+            second = metrics.Registry(directory, identity="second")
+            first.inc("http_requests_total", labels, 2)
+            first.observe("http_response_size_bytes", labels[:1], 50)
+            first.flush(force=True)
+            second.inc("http_requests_total", labels, 3)
+            second.observe("http_response_size_bytes", labels[:1], 5000)
+
+            totals = second.collect()
+
+        self.assertEqual(totals[("http_requests_total", labels)], 5)
+        sizes = totals[("http_response_size_bytes", labels[:1])]
+        self.assertEqual(sum(sizes[:-1]), 2)
+        self.assertEqual(sizes[-1], 5050)
+
+    def test_escape(self):
+        """Label values are escaped."""
+
+        self.assertEqual(
+            metrics.format_labels([("view", 'a"b\\c')]), '{view="a\\"b\\\\c"}'
+        )
+
+
+class TestMetricsMiddleware(TestCase):
+    """Record every request under its URL name."""
+
+    def setUp(self):
+        self.__client = APIClient()
+        self.__user = get_user_model().objects.create_superuser(
+            email="metrics@example.com", password="metrics"
+        )
+
+    @staticmethod
+    def __value(key):
+        return metrics.registry.collect().get(key)
+
+    def test_request(self):
+        """Latency, queries, database time and size are recorded per view."""
+
+        labels = (("view", "countries"),)
+        requests = (
+            "http_requests_total",
+            (*labels, ("method", "GET"), ("status", 200)),
+        )
+        before = self.__value(requests) or 0
+        queries = self.__value(("http_request_db_queries", labels))
+        queries_before = queries[-1] if queries else 0
+
+        self.__client.force_authenticate(self.__user)
+        response = self.__client.get(reverse("countries"))
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.__value(requests), before + 1)
+        self.assertGreater(
+            self.__value(("http_request_db_queries", labels))[-1], queries_before
+        )
+        for name in ["http_request_duration_seconds", "http_response_size_bytes"]:
+            self.assertIsNotNone(self.__value((name, labels)))
+
+    @override_settings(METRICS_TOKEN="scrape")
+    def test_endpoint(self):
+        """The metrics endpoint serves the Prometheus text format to scrapers."""
+
+        self.__client.get(reverse("countries"))
+        for header in [None, "Bearer wrong", "Token scrape"]:
+            self.__client.credentials(
+                **({"HTTP_AUTHORIZATION": header} if header else {})
+            )
+            response = self.__client.get(reverse("metrics"))
+            self.assertEqual(response.status_code, 403)
+        self.__client.credentials(HTTP_AUTHORIZATION="Bearer scrape")
+        response = self.__client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        text = response.content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", text)
+        self.assertIn(
+            'http_requests_total{view="countries",method="GET",status="401"}', text
+        )
@@ -0,0 +1,95 @@
+"""UnitTest for keyset pagination."""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from rest_framework import request, status, test
+
+from manager import models, pagination
+
+
+UserModel = get_user_model()
+
+
+class TestKeysetPagination(test.APITestCase):
+    """Page through list endpoints with cursors."""
+
+    def setUp(self) -> None:
+        password = get_random_string(length=12)
+        admin = UserModel.objects.create_superuser(
+            email="admin@test.com",
+            password=password,
+        )
+        self.client.login(email=admin.email, password=password)
+        self.__url = reverse("countries")
+        for i in range(7):
+            models.Country.objects.create(name=f"Country {i}")
+
+    def __fetch_all(self, url):
+        """Follow next links until the last page and return all rows."""
+
+        rows = []
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            page = response.json()
+            self.assertLessEqual(len(page["results"]), 3)
+            rows.extend(page["results"])
+            url = page["next"]
+
+        return rows
+
+    def test_pages(self):
+        """Every row is served exactly once in (updated_at, id) order."""
+
+        rows = self.__fetch_all(f"{self.__url}?page_size=3")
+        expected = list(
+            models.Country.objects.order_by("updated_at", "id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual([row["id"] for row in rows], expected)
+
+    def test_concurrent_insert(self):
+        """Rows inserted while paging appear once, at the end."""
+
+        response = self.client.get(f"{self.__url}?page_size=3")
+        page = response.json()
+        seen = [row["id"] for row in page["results"]]
+        country = models.Country.objects.create(name="Late Country")
+        seen.extend(row["id"] for row in self.__fetch_all(page["next"]))
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(seen[-1], country.id)
+        self.assertEqual(len(seen), models.Country.objects.count())
+
+    def test_default_page(self):
+        """Small tables fit in the default page with no next link."""
+
+        response = self.client.get(self.__url)
+        page = response.json()
+        self.assertIsNone(page["next"])
+        self.assertEqual(len(page["results"]), 7)
+
+    def test_invalid_cursor(self):
+        """A malformed cursor is rejected."""
+
+        for cursor in ["not-base64!", "bm90LWEtY3Vyc29y"]:
+            response = self.client.get(self.__url, {"cursor": cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_size(self):
+        """Requested page sizes are capped and invalid ones fall back."""
+
+        paginator = pagination.KeysetPagination()
+        factory = test.APIRequestFactory()
+        cases = {
+            "": settings.PAGE_SIZE,
+            "abc": settings.PAGE_SIZE,
+            "-1": settings.PAGE_SIZE,
+            "5": 5,
+            str(settings.MAX_PAGE_SIZE + 1): settings.MAX_PAGE_SIZE,
+        }
+        for page_size, expected in cases.items():
+            _request = request.Request(factory.get("/", {"page_size": page_size}))
+            self.assertEqual(paginator.get_page_size(_request), expected)
@@ -0,0 +1,115 @@
+"""Test the Monte Carlo season predictor."""
+
+import datetime
+import io
+import json
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import management
+from django.test import TestCase
+from django.utils import crypto
+import numpy as np
+
+from manager import models, services
+from manager.subservices import prediction_services
+
+
+UserModel = get_user_model()
+
+
+class TestPredictionServices(TestCase):
+    """Test season odds of a league."""
+
+    def setUp(self):
+        user = UserModel.objects.create_user(
+            email="test@test.com",
+            password=crypto.get_random_string(length=12),
+        )
+        country = models.Country.objects.create(name="Country")
+        self.__league = models.League.objects.create(country=country, division=1)
+        self.__teams = [
+            models.Team.objects.create(name=f"{i}", league=self.__league, owner=user)
+            for i in range(5)
+        ]
+        models.Player.objects.create(
+            team=self.__teams[2],
+            status=settings.STATUS["player"][0],
+            salary=1000,
+            position=settings.PLAYER_POSITIONS[-1],
+            join_date=datetime.date.today(),
+            **{
+                attribute: 95
+                for attributes in settings.MATCH_STRENGTH_ATTRIBUTES.values()
+                for attribute in attributes
+            },
+        )
+
+    def test_season_odds(self):
+        """Probabilities are consistent and favour the strongest team."""
+
+        odds = services.season_odds(self.__league, seasons=1200, workers=1, seed=0)
+        self.assertEqual(odds.probabilities.shape, (5, 5))
+        np.testing.assert_allclose(odds.probabilities.sum(axis=0), 1)
+        np.testing.assert_allclose(odds.probabilities.sum(axis=1), 1)
+        rows = odds.as_dicts()
+        self.assertEqual(rows[0]["team"], self.__teams[2].pk)
+        self.assertGreater(rows[0]["title"], 0.5)
+        self.assertEqual(len(rows[0]["positions"]), 5)
+
+    def test_workers(self):
+        """Results depend on the seed only, not on the number of workers."""
+
+        units = np.random.default_rng(0).uniform(40, 90, size=(6, 3))
+        serial = services.simulate_odds(units, 1000, workers=1, seed=3, chunk_size=250)
+        parallel = services.simulate_odds(
+            units, 1000, workers=2, seed=3, chunk_size=250
+        )
+        np.testing.assert_array_equal(serial, parallel)
+
+    def test_without_fork(self):
+        """Without fork, seasons are simulated in this process."""
+
+        units = np.random.default_rng(0).uniform(40, 90, size=(4, 3))
+        serial = services.simulate_odds(units, 400, workers=1, seed=3, chunk_size=100)
+        with mock.patch.object(
+            prediction_services.multiprocessing,
+            "get_all_start_methods",
+            return_value=["spawn"],
+        ), mock.patch.object(
+            prediction_services.futures, "ProcessPoolExecutor"
+        ) as executor:
+            odds = services.simulate_odds(units, 400, workers=2, seed=3, chunk_size=100)
+        executor.assert_not_called()
+        np.testing.assert_array_equal(serial, odds)
+
+    def test_command(self):
+        """Odds and benchmarks are printed as JSON."""
+
+        out = io.StringIO()
+        management.call_command(
+            "predict_seasons",
+            league=self.__league.pk,
+            seasons=100,
+            workers=[1],
+            seed=0,
+            stdout=out,
+        )
+        rows = json.loads(out.getvalue())
+        self.assertEqual(len(rows), 5)
+
+        out = io.StringIO()
+        management.call_command(
+            "predict_seasons", benchmark=True, teams=4, seasons=100, stdout=out
+        )
+        results = json.loads(out.getvalue())
+        self.assertGreater(results[0]["seasons_per_second"], 0)
+
+        for options in [{}, {"league": 0}]:
+            self.assertRaises(
+                management.CommandError,
+                management.call_command,
+                "predict_seasons",
+                **options,
+            )
@@ -0,0 +1,126 @@
+"""Test the sampling profiler middleware."""
+
+import cProfile
+from collections import Counter
+import io
+import os
+import pathlib
+import pstats
+import tempfile
+import time
+
+from django.core import management
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve
+
+from manager import profiling
+
+
+def slow_view(request):
+    """Spend long enough in one function for the sampler to see it."""
+
+    time.sleep(0.05)
+
+    return HttpResponse("ok")
+
+
+class TestSamplingProfiler(SimpleTestCase):
+    """Profile sampled and flagged requests only."""
+
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__path = pathlib.Path(self.__directory.name)
+        self.__factory = RequestFactory()
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def __middleware(self, **settings):
+        options = {
+            "PROFILING_SAMPLE_RATE": 0,
+            "PROFILING_TOKEN": None,
+            "PROFILING_DIR": self.__path,
+            "PROFILING_INTERVAL": 0.001,
+            "PROFILING_FLUSH_INTERVAL": 0,
+            **settings,
+        }
+        with override_settings(**options):
+            return profiling.SamplingProfilerMiddleware(self.__get_response)
+
+    @staticmethod
+    def __get_response(request):
+        request.resolver_match = resolve("/countries/")
+        return slow_view(request)
+
+    def test_not_sampled(self):
+        """With no rate and no token nothing is profiled."""
+
+        middleware = self.__middleware()
+        request = self.__factory.get("/", HTTP_X_PROFILE="anything")
+        self.assertEqual(middleware(request).content, b"ok")
+        self.assertEqual(list(self.__path.iterdir()), [])
+
+    def test_sampled(self):
+        """Sampled requests are aggregated per view on disk."""
+
+        middleware = self.__middleware(PROFILING_SAMPLE_RATE=1)
+        for _ in range(2):
+            middleware(self.__factory.get("/"))
+        self.assertEqual(middleware.store.requests["countries"], 2)
+        own = self.__path / str(os.getpid())
+        self.assertEqual(
+            sorted(path.name for path in own.iterdir()),
+            ["countries.collapsed", "countries.prof"],
+        )
+        out = io.StringIO()
+        with override_settings(PROFILING_DIR=self.__path):
+            management.call_command("merge_profiles", stdout=out)
+        self.assertIn("Merged 1 views", out.getvalue())
+        self.assertEqual(self.__calls(self.__path / "countries.prof"), [2])
+        stacks = (self.__path / "countries.collapsed").read_text().splitlines()
+        self.assertTrue(stacks)
+        self.assertTrue(any("test_profiling:slow_view" in line for line in stacks))
+        stack, count = stacks[0].rsplit(" ", 1)
+        self.assertGreater(int(count), 0)
+        self.assertIn(";", stack)
+
+    @staticmethod
+    def __calls(path):
+        stats = pstats.Stats(str(path))
+
+        return [
+            count
+            for (_, _, name), (_, count, *_) in stats.stats.items()
+            if name == "slow_view"
+        ]
+
+    def test_processes(self):
+        """Processes keep separate files that are summed when merged."""
+
+        stores = [
+            profiling.ProfileStore(self.__path, flush_interval=60, identity=identity)
+            for identity in ["first", "second"]
+        ]
+        for store in stores:
+            profiler = cProfile.Profile()
+            profiler.runcall(slow_view, None)
+            store.record("countries", profiler, Counter({"a;b": 2}))
+        self.assertEqual(list(self.__path.iterdir()), [])
+
+        self.assertEqual(stores[0].merge(), ["countries"])
+        self.assertEqual(self.__calls(self.__path / "countries.prof"), [1])
+        self.assertEqual(stores[1].merge(), ["countries"])
+        self.assertEqual(self.__calls(self.__path / "countries.prof"), [2])
+        self.assertEqual((self.__path / "countries.collapsed").read_text(), "a;b 4\n")
+        for identity in ["first", "second"]:
+            self.assertTrue((self.__path / identity / "countries.prof").exists())
+
+    def test_header(self):
+        """Requests with the profiling token are always profiled."""
+
+        middleware = self.__middleware(PROFILING_TOKEN="secret")
+        middleware(self.__factory.get("/", HTTP_X_PROFILE="wrong"))
+        self.assertEqual(middleware.store.requests["countries"], 0)
+        middleware(self.__factory.get("/", HTTP_X_PROFILE="secret"))
+        self.assertEqual(middleware.store.requests["countries"], 1)
@@ -0,0 +1,86 @@
+"""Test per-view query budgets."""
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import resolve, reverse
+from rest_framework.test import APIClient
+
+from manager import models, query_budget, views
+
+
+class TestQueryBudget(TestCase):
+    """Enforce the query_budget of the resolved view."""
+
+    def setUp(self):
+        self.__factory = RequestFactory()
+
+    @staticmethod
+    def __middleware(queries: int):
+        def get_response(request):
+            request.resolver_match = resolve(reverse("countries"))
+            for i in range(queries):
+                # pylint: disable=no-member
+                list(models.Country.objects.filter(id=i))
+            return HttpResponse("ok")
+
+        return query_budget.QueryBudgetMiddleware(get_response)
+
+    def test_within_budget(self):
+        """Requests within the budget pass through."""
+
+        budget = views.CountryListView.query_budget
+        response = self.__middleware(budget)(self.__factory.get("/"))
+
+        self.assertEqual(response.content, b"ok")
+
+    def test_over_budget(self):
+        """Exceeding the budget raises with the duplicated SQL and its caller."""
+
+        budget = views.CountryListView.query_budget
+        with self.assertRaises(query_budget.QueryBudgetError) as raised:
+            self.__middleware(budget + 1)(self.__factory.get("/"))
+
+        message = str(raised.exception)
+        self.assertIn(f"ran {budget + 1} queries", message)
+        self.assertIn(f'{budget + 1}x SELECT "manager_country"', message)
+        self.assertIn("test_query_budget.py", message)
+        self.assertIn("get_response", message)
+
+    def test_method_budget(self):
+        """A dict budget applies per HTTP method."""
+
+        view = views.TeamListView
+        self.assertEqual(query_budget.get_query_budget(view, "GET"), 4)
+        self.assertEqual(query_budget.get_query_budget(view, "POST"), 6)
+        self.assertIsNone(query_budget.get_query_budget(view, "DELETE"))
+        self.assertIsNone(query_budget.get_query_budget(None, "GET"))
+
+    def test_normalize_sql(self):
+        """Queries differing only in literals are grouped together."""
+
+        self.assertEqual(
+            query_budget.normalize_sql("SELECT 1 WHERE a = 'x' AND b IN (1, 2)"),
+            query_budget.normalize_sql("SELECT 2 WHERE a = 'y' AND b IN (3)"),
+        )
+
+    def test_list_does_not_grow(self):
+        """Listing many teams stays within the budget of the team list."""
+
+        user = get_user_model().objects.create_superuser(
+            email="budget@example.com", password="budget"
+        )
+        # pylint: disable=no-member
+        country = models.Country.objects.create(name="Budget Country")
+        league = models.League.objects.create(
+            name="Budget League", country=country, division=1
+        )
+        for i in range(30):
+            models.Team.objects.create(name=f"Team {i}", league=league, owner=user)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.get(reverse("team-list"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 30)
@@ -0,0 +1,268 @@
+"""Test the player rating engine."""
+
+import datetime
+import io
+import json
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import management
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import crypto
+import numpy as np
+
+from manager import models, services
+from manager.subservices import rating_services
+
+
+UserModel = get_user_model()
+ATTRIBUTES = rating_services.ATTRIBUTES
+CATEGORIES = settings.CATEGORIES
+PLAYER_POSITIONS = settings.PLAYER_POSITIONS
+
+
+class TestRatingServices(TestCase):
+    """Test vectorized ratings against the per-object reference."""
+
+    def setUp(self):
+        for i, attribute in enumerate(ATTRIBUTES):
+            models.AttributeCategory.objects.create(
+                attribute=attribute,
+                category=CATEGORIES[i % len(CATEGORIES)],
+            )
+        user = UserModel.objects.create_user(
+            email="test@test.com",
+            password=crypto.get_random_string(length=12),
+        )
+        country = models.Country.objects.create(name="Country")
+        self.__leagues = [
+            models.League.objects.create(country=country, division=i)
+            for i in range(2)
+        ]
+        self.__players = []
+        rng = np.random.default_rng(0)
+        for i, league in enumerate(self.__leagues):
+            team = models.Team.objects.create(name=f"{i}", league=league, owner=user)
+            for j, position in enumerate(PLAYER_POSITIONS):
+                attributes = rng.integers(1, 100, size=len(ATTRIBUTES)).tolist()
+                self.__players.append(
+                    models.Player.objects.create(
+                        team=team,
+                        status=settings.STATUS["player"][0],
+                        salary=1000,
+                        position=position,
+                        join_date=datetime.date.today(),
+                        first_name=f"{i}{j}",
+                        **dict(zip(ATTRIBUTES, attributes, strict=True)),
+                    )
+                )
+
+    def test_category_weights(self):
+        """Each category row averages its attributes, unmapped ones count zero."""
+
+        weights = rating_services.get_category_weights({ATTRIBUTES[0]: CATEGORIES[0]})
+        self.assertEqual(weights.shape, (len(CATEGORIES), len(ATTRIBUTES)))
+        self.assertEqual(weights[0, 0], 1)
+        self.assertEqual(weights.sum(), 1)
+
+        weights = rating_services.get_category_weights(
+            rating_services.get_attribute_categories()
+        )
+        np.testing.assert_allclose(weights.sum(axis=1), np.ones(len(CATEGORIES)))
+
+    def test_position_weights(self):
+        """Position weights are normalized per position."""
+
+        weights = rating_services.get_position_weights()
+        self.assertEqual(weights.shape, (len(PLAYER_POSITIONS), len(CATEGORIES)))
+        np.testing.assert_allclose(weights.sum(axis=1), np.ones(len(PLAYER_POSITIONS)))
+
+    def test_rate_players(self):
+        """Vectorized ratings equal the per-object loop."""
+
+        ratings = services.rate_league()
+        self.assertEqual(len(ratings), len(self.__players))
+        expected = rating_services.rate_players_loop(
+            self.__players, rating_services.get_attribute_categories()
+        )
+        for i, (player, rating) in enumerate(zip(self.__players, expected, strict=True)):
+            self.assertEqual(ratings.player_ids[i], player.id)
+            self.assertEqual(PLAYER_POSITIONS[ratings.positions[i]], player.position)
+            np.testing.assert_allclose(
+                ratings.categories[i], [rating["categories"][c] for c in CATEGORIES]
+            )
+            self.assertAlmostEqual(
+                ratings.own_overall[i], rating["overall"][player.position]
+            )
+
+        from_objects = services.rate_players(self.__players)
+        np.testing.assert_allclose(from_objects.overall, ratings.overall)
+
+    def test_rate_league(self):
+        """Only players of the league are rated."""
+
+        ratings = services.rate_league(self.__leagues[0])
+        self.assertEqual(len(ratings), len(PLAYER_POSITIONS))
+        rows = ratings.as_dicts()
+        self.assertEqual(rows[0]["player"], self.__players[0].id)
+        self.assertEqual(set(rows[0]["categories"]), set(CATEGORIES))
+        self.assertIsInstance(rows[0]["overall"], int)
+
+    def test_empty(self):
+        """Rating no players gives empty arrays."""
+
+        ratings = services.rate_players(models.Player.objects.none())
+        self.assertEqual(len(ratings), 0)
+        self.assertEqual(ratings.categories.shape, (0, len(CATEGORIES)))
+
+    def test_benchmark(self):
+        """The benchmark command reports matching results."""
+
+        result = services.benchmark_ratings(50)
+        self.assertTrue(result["matches"])
+        out = io.StringIO()
+        management.call_command("benchmark_ratings", players=20, stdout=out)
+        result = json.loads(out.getvalue())
+        self.assertEqual(result["players"], 20)
+        self.assertTrue(result["matches"])
+
+
+class TestStoredRatings(TestCase):
+    """Test ratings persisted on Player."""
+
+    def setUp(self):
+        for i, attribute in enumerate(ATTRIBUTES):
+            models.AttributeCategory.objects.create(
+                attribute=attribute,
+                category=CATEGORIES[i % len(CATEGORIES)],
+            )
+        user = UserModel.objects.create_user(
+            email="test@test.com",
+            password=crypto.get_random_string(length=12),
+        )
+        country = models.Country.objects.create(name="Country")
+        league = models.League.objects.create(country=country, division=1)
+        self.__team = models.Team.objects.create(league=league, owner=user)
+        self.__players = [
+            models.Player.objects.create(
+                team=self.__team,
+                status=settings.STATUS["player"][0],
+                salary=1000,
+                position=PLAYER_POSITIONS[-1],
+                join_date=datetime.date.today(),
+                finishing=50 + 10 * i,
+            )
+            for i in range(3)
+        ]
+
+    def __assert_stored(self, player):
+        """Stored ratings of a player equal freshly computed ones."""
+
+        player.refresh_from_db()
+        ratings = services.rate_players([player])
+        stored = [getattr(player, field) for field in services.RATING_FIELDS]
+        self.assertEqual(stored, ratings.stored_values()[0].tolist())
+
+    def test_create(self):
+        """Ratings are stored when a player is created."""
+
+        for player in self.__players:
+            self.__assert_stored(player)
+            self.assertGreater(player.overall, 0)
+
+    def test_update(self):
+        """Ratings are recomputed only when an attribute changes."""
+
+        player = models.Player.objects.get(pk=self.__players[0].pk)
+        self.assertEqual(player.changed_attributes(), set())
+        player.first_name = "Name"
+        with mock.patch.object(
+            services, "apply_ratings", wraps=services.apply_ratings
+        ) as apply_ratings:
+            player.save()
+            apply_ratings.assert_not_called()
+            player.finishing = 99
+            self.assertEqual(player.changed_attributes(), {"finishing"})
+            player.save()
+            apply_ratings.assert_called_once_with([player])
+        self.assertEqual(player.changed_attributes(), set())
+        self.__assert_stored(player)
+
+        player.pace = 1
+        player.save(update_fields=["pace"])
+        self.__assert_stored(player)
+
+    def test_update_fields(self):
+        """Attribute edits left out of update_fields are neither rated nor saved."""
+
+        player = models.Player.objects.get(pk=self.__players[0].pk)
+        overall = player.overall
+        player.finishing = 99
+        player.price += 1
+        with CaptureQueriesContext(connection) as queries:
+            player.save(update_fields=["price"])
+
+        updates = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('UPDATE "manager_player"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(player.overall, overall)
+        self.assertEqual(player.changed_attributes(), {"finishing"})
+        stored = models.Player.objects.get(pk=player.pk)
+        self.assertNotEqual(stored.finishing, 99)
+        self.__assert_stored(stored)
+
+        player.pace = 1
+        player.save(update_fields=["pace"])
+        self.assertEqual(player.changed_attributes(), {"finishing"})
+        stored = models.Player.objects.get(pk=player.pk)
+        self.assertEqual(stored.pace, 1)
+        self.assertNotEqual(stored.finishing, 99)
+        self.__assert_stored(stored)
+        self.assertEqual(player.overall, stored.overall)
+
+        player.save(update_fields=["finishing"])
+        self.assertEqual(player.changed_attributes(), set())
+        self.__assert_stored(player)
+
+    def test_position_change(self):
+        """The overall rating follows a change of position."""
+
+        player = models.Player.objects.get(pk=self.__players[-1].pk)
+        overall = player.overall
+        player.position = PLAYER_POSITIONS[0]
+        self.assertEqual(player.changed_attributes(), {"position"})
+        player.save()
+        self.__assert_stored(player)
+        self.assertNotEqual(player.overall, overall)
+
+    def test_reconcile(self):
+        """Drifted ratings are fixed and correct ones are left alone."""
+
+        models.Player.objects.filter(pk=self.__players[0].pk).update(overall=0)
+        out = io.StringIO()
+        management.call_command("reconcile_ratings", chunk_size=2, stdout=out)
+        self.assertIn("checked 3, updated 1", out.getvalue())
+        for player in self.__players:
+            self.__assert_stored(player)
+        result = services.reconcile_ratings()
+        self.assertEqual(result, {"checked": 3, "updated": 0})
+
+    def test_top_players(self):
+        """Top players are ordered by the requested rating."""
+
+        category = CATEGORIES[ATTRIBUTES.index("finishing") % len(CATEGORIES)]
+        top = list(services.top_players(limit=2, rating=category, team=self.__team))
+        self.assertEqual(len(top), 2)
+        self.assertGreater(getattr(top[0], category), getattr(top[1], category))
+        self.assertEqual(top[0], self.__players[-1])
+        top = services.top_players(
+            position=PLAYER_POSITIONS[0], league=self.__team.league
+        )
+        self.assertEqual(list(top), [])
+        self.assertRaises(ValueError, services.top_players, rating="pace")
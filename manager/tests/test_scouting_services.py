@@ -0,0 +1,428 @@
+"""Test the similar players search."""
+
+import io
+import pathlib
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import management
+from django.test import TestCase, override_settings
+from django.urls import reverse
+import numpy as np
+from rest_framework.test import APIClient
+
+from manager import models, services
+from manager.subservices import rating_services, scouting_services, snapshot_services
+
+
+ATTRIBUTES = rating_services.ATTRIBUTES
+CATEGORIES = settings.CATEGORIES
+UserModel = get_user_model()
+
+
+class TestScoutingServices(TestCase):
+    """Search the snapshot for the closest players."""
+
+    def setUp(self):
+        for i, attribute in enumerate(ATTRIBUTES):
+            models.AttributeCategory.objects.create(
+                attribute=attribute,
+                category=CATEGORIES[i % len(CATEGORIES)],
+            )
+        self.__world = services.generate_world(
+            countries=1,
+            leagues_per_country=1,
+            teams_per_league=4,
+            players_per_team=10,
+            transfers=0,
+            seed=5,
+        )
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__path = pathlib.Path(self.__directory.name)
+        services.build_snapshot(self.__path)
+        self.__snapshot = services.open_snapshot(self.__path)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def __expected(self, vector, weights, candidates):
+        """Sort every candidate player by distance, the slow way."""
+
+        # pylint: disable=no-member
+        distances = {
+            player.id: float(
+                np.sqrt(
+                    (
+                        (
+                            np.array(
+                                [getattr(player, name) for name in ATTRIBUTES],
+                                dtype=np.float32,
+                            )
+                            / snapshot_services.ATTRIBUTE_SCALE
+                            - vector
+                        )
+                        ** 2
+                    )
+                    @ weights
+                )
+            )
+            for player in candidates
+        }
+
+        return sorted(distances, key=lambda player: (distances[player], player))
+
+    def test_player(self):
+        """The closest players match a full sort and leave the player out."""
+
+        # pylint: disable=no-member
+        player = models.Player.objects.order_by("id").first()
+        vector = np.array(
+            [getattr(player, name) for name in ATTRIBUTES], dtype=np.float32
+        )
+        weights = services.attribute_weights(player.position).astype(np.float32)
+
+        similar = services.find_similar(player.id, k=7, snapshot=self.__snapshot)
+        expected = self.__expected(
+            vector / snapshot_services.ATTRIBUTE_SCALE,
+            weights,
+            models.Player.objects.exclude(id=player.id),
+        )
+
+        self.assertEqual([row["player"] for row in similar], expected[:7])
+        distances = [row["distance"] for row in similar]
+        self.assertEqual(distances, sorted(distances))
+
+    def test_blocks(self):
+        """Small blocks find the same rows as one block."""
+
+        vector = self.__snapshot.vectors[3]
+        weights = services.attribute_weights()
+        rows, distances = services.nearest_rows(self.__snapshot, vector, weights, 5)
+        for block_size in [1, 3, 16]:
+            with self.subTest(block_size=block_size):
+                blocked = services.nearest_rows(
+                    self.__snapshot, vector, weights, 5, block_size=block_size
+                )
+                np.testing.assert_array_equal(blocked[0], rows)
+                np.testing.assert_allclose(blocked[1], distances)
+
+    def test_filters(self):
+        """Candidates are restricted by position, status and price."""
+
+        # pylint: disable=no-member
+        players = list(models.Player.objects.order_by("id"))
+        position = players[0].position
+        status = snapshot_services.PLAYER_STATUSES[0]
+        models.Player.objects.filter(id__in=[p.id for p in players[::2]]).update(
+            status=status
+        )
+        max_price = int(np.median([p.price for p in players]))
+        services.refresh_snapshot(self.__path)
+        snapshot = services.open_snapshot(self.__path)
+
+        similar = services.find_similar(
+            profile={ATTRIBUTES[0]: 80, ATTRIBUTES[1]: 60},
+            k=100,
+            position=position,
+            status=status,
+            max_price=max_price,
+            snapshot=snapshot,
+        )
+
+        candidates = models.Player.objects.filter(
+            position=position, status=status, price__lte=max_price
+        )
+        weights = np.isin(ATTRIBUTES, ATTRIBUTES[:2]) / 2
+        vector = np.zeros(len(ATTRIBUTES), dtype=np.float32)
+        vector[:2] = [0.8, 0.6]
+        self.assertEqual(
+            [row["player"] for row in similar],
+            self.__expected(vector, weights, candidates),
+        )
+        for row in similar:
+            self.assertEqual((row["position"], row["status"]), (position, status))
+            self.assertLessEqual(row["price"], max_price)
+
+    def test_new_player(self):
+        """Players missing from the snapshot are read from the database."""
+
+        # pylint: disable=no-member
+        template = models.Player.objects.order_by("id").first()
+        player = models.Player.objects.create(
+            first_name="New",
+            position=template.position,
+            join_date=template.join_date,
+            salary=1,
+            **{name: getattr(template, name) for name in ATTRIBUTES},
+        )
+
+        similar = services.find_similar(player.id, k=1, snapshot=self.__snapshot)
+
+        self.assertEqual(similar[0]["player"], template.id)
+        self.assertEqual(similar[0]["distance"], 0)
+
+    def test_weights(self):
+        """Positions weigh their rated attributes, uniform otherwise."""
+
+        weights = services.attribute_weights(settings.PLAYER_POSITIONS[0])
+        uniform = services.attribute_weights(
+            settings.PLAYER_POSITIONS[0], attribute_categories={}
+        )
+
+        self.assertAlmostEqual(weights.sum(), 1)
+        self.assertGreater(np.ptp(weights), 0)
+        np.testing.assert_allclose(uniform, services.attribute_weights())
+
+    def test_errors(self):
+        """Invalid searches raise ScoutingError."""
+
+        cases = [
+            {},
+            {"player": 1, "profile": {ATTRIBUTES[0]: 50}},
+            {"profile": {"height": 50}},
+            {"profile": {ATTRIBUTES[0]: 50}, "k": 0},
+            {"profile": {ATTRIBUTES[0]: 50}, "position": "GOALIE"},
+            {"profile": {ATTRIBUTES[0]: 50}, "status": "RETIRED"},
+            {"player": 0},
+        ]
+        for kwargs in cases:
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(services.ScoutingError):
+                    services.find_similar(snapshot=self.__snapshot, **kwargs)
+
+    def test_view(self):
+        """The endpoint answers from the snapshot of SNAPSHOT_DIR."""
+
+        client = APIClient()
+        client.force_authenticate(UserModel.objects.get(pk=self.__world.owner_id))
+        url = reverse("similar-players")
+        player = int(self.__world.player_ids[0])
+
+        with override_settings(SNAPSHOT_DIR=self.__path):
+            response = client.get(url, {"player": player, "k": 3})
+            profile = client.get(url, {ATTRIBUTES[0]: 90, "max_price": 10**9})
+            invalid = client.get(url, {"player": player, "k": "many"})
+            unknown = client.get(url, {"player": player, "status": "RETIRED"})
+        with override_settings(SNAPSHOT_DIR=self.__path / "missing"):
+            missing = client.get(url, {"player": player})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"],
+            services.find_similar(player, k=3, snapshot=self.__snapshot),
+        )
+        self.assertEqual(len(profile.json()["results"]), 10)
+        self.assertEqual(invalid.status_code, 400)
+        self.assertEqual(unknown.status_code, 400)
+        self.assertEqual(missing.status_code, 503)
+
+    def test_benchmark(self):
+        """The benchmark checks the blocked search against a full sort."""
+
+        result = services.benchmark_similar(5000, queries=2, k=5)
+
+        self.assertTrue(result["matches"])
+        self.assertEqual(result["queries"], 2)
+
+
+class TestShortlists(TestCase):
+    """Rank the players who would improve each team within its budget."""
+
+    def setUp(self):
+        for i, attribute in enumerate(ATTRIBUTES):
+            models.AttributeCategory.objects.create(
+                attribute=attribute,
+                category=CATEGORIES[i % len(CATEGORIES)],
+            )
+        self.__world = services.generate_world(
+            countries=1,
+            leagues_per_country=1,
+            teams_per_league=4,
+            players_per_team=10,
+            transfers=0,
+            seed=7,
+        )
+        # pylint: disable=no-member
+        players = models.Player.objects.order_by("id")
+        prices = list(players.values_list("price", flat=True))
+        models.Team.objects.update(budget=int(np.median(prices)))
+        models.Team.objects.filter(id=self.__world.team_ids[0]).update(budget=0)
+        free_agents = list(players.values_list("id", flat=True)[::7])
+        players.filter(id__in=free_agents).update(
+            team=None, status=snapshot_services.PLAYER_STATUSES[2]
+        )
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__path = pathlib.Path(self.__directory.name)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def __expected(self, k):
+        """Rank the candidates of every team, one player at a time."""
+
+        # pylint: disable=no-member
+        players = models.Player.objects.order_by("id")
+        ratings = services.rate_players(players)
+        rows = list(players.values_list("team_id", "status", "price"))
+        teams = list(models.Team.objects.order_by("id").values_list("id", "budget"))
+        team_ids = np.array([team[0] for team in teams])
+        levels = np.array(
+            [
+                ratings.categories[[row[0] == team_id for row in rows]].mean(axis=0)
+                for team_id in team_ids
+            ]
+        )
+        needs = services.team_needs(levels)
+
+        expected = {}
+        for i, (team_id, budget) in enumerate(teams):
+            gains = {}
+            for player_id, categories, (player_team, status, price) in zip(
+                ratings.player_ids.tolist(), ratings.categories, rows, strict=True
+            ):
+                gain = needs[i] @ (categories - levels[i])
+                if (
+                    status in settings.SHORTLIST_STATUSES
+                    and player_team != team_id
+                    and price <= budget
+                    and gain > 1e-4
+                ):
+                    gains[player_id] = gain
+            expected[team_id] = sorted(gains, key=lambda p: (-gains[p], p))[:k]
+
+        return expected
+
+    def __shortlists(self):
+        """Read the saved shortlists of every team."""
+
+        return {
+            int(team_id): list(
+                services.get_shortlist(team_id).values_list("player_id", flat=True)
+            )
+            for team_id in self.__world.team_ids
+        }
+
+    def test_scout(self):
+        """Saved shortlists match a ranking of every candidate."""
+
+        result = services.scout_teams(k=3, workers=1, directory=self.__path)
+        shortlists = self.__shortlists()
+
+        self.assertTrue(result["complete"])
+        self.assertEqual(result["scouted"], 4)
+        self.assertEqual(shortlists, self.__expected(3))
+        self.assertEqual(shortlists[int(self.__world.team_ids[0])], [])
+        self.assertEqual(
+            result["entries"], sum(len(players) for players in shortlists.values())
+        )
+        entries = services.get_shortlist(self.__world.team_ids[1])
+        self.assertEqual([entry.rank for entry in entries], [1, 2, 3])
+        scores = [entry.score for entry in entries]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_rerun(self):
+        """Running again replaces the shortlists."""
+
+        services.scout_teams(k=3, workers=1, directory=self.__path)
+        # pylint: disable=no-member
+        models.Team.objects.update(budget=0)
+        result = services.scout_teams(k=3, workers=1, directory=self.__path)
+
+        self.assertEqual(result["entries"], 0)
+        self.assertFalse(models.ShortlistEntry.objects.exists())
+
+    def test_workers(self):
+        """A process pool saves the same shortlists."""
+
+        services.scout_teams(k=3, workers=1, chunk_size=1, directory=self.__path)
+        serial = self.__shortlists()
+        result = services.scout_teams(
+            k=3, workers=2, chunk_size=1, directory=self.__path
+        )
+
+        self.assertTrue(result["complete"])
+        self.assertEqual(self.__shortlists(), serial)
+
+    def test_without_fork(self):
+        """Without fork, teams are scouted in this process."""
+
+        services.scout_teams(k=3, workers=1, chunk_size=1, directory=self.__path)
+        serial = self.__shortlists()
+        with mock.patch.object(
+            scouting_services.multiprocessing,
+            "get_all_start_methods",
+            return_value=["spawn"],
+        ), mock.patch.object(
+            scouting_services.futures, "ProcessPoolExecutor"
+        ) as executor:
+            result = services.scout_teams(
+                k=3, workers=2, chunk_size=1, directory=self.__path
+            )
+
+        executor.assert_not_called()
+        self.assertTrue(result["complete"])
+        self.assertEqual(self.__shortlists(), serial)
+
+    def test_time_limit(self):
+        """Teams left after the time limit keep their shortlist."""
+
+        progress = []
+        result = services.scout_teams(
+            k=3,
+            workers=1,
+            chunk_size=1,
+            time_limit=0,
+            directory=self.__path,
+            progress=lambda scouted, teams: progress.append((scouted, teams)),
+        )
+
+        self.assertFalse(result["complete"])
+        self.assertEqual(result["scouted"], 1)
+        self.assertEqual(progress, [(1, 4)])
+
+    def test_needs(self):
+        """The weakest categories weigh by how far they fall behind."""
+
+        levels = np.array([[50, 60, 70, 80, 90, 100], [70, 70, 70, 70, 70, 70]])
+
+        needs = services.team_needs(levels, weak_categories=2)
+
+        np.testing.assert_allclose(needs[0], [50 / 90, 40 / 90, 0, 0, 0, 0])
+        np.testing.assert_allclose(needs[1], [0.5, 0.5, 0, 0, 0, 0])
+
+    def test_view(self):
+        """The endpoint reads a shortlist in rank order."""
+
+        services.scout_teams(k=3, workers=1, directory=self.__path)
+        client = APIClient()
+        client.force_authenticate(UserModel.objects.get(pk=self.__world.owner_id))
+        team_id = int(self.__world.team_ids[1])
+
+        response = client.get(reverse("team-shortlist", kwargs={"pk": team_id}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [entry["player"] for entry in response.json()],
+            self.__shortlists()[team_id],
+        )
+
+    def test_command(self):
+        """The command reports progress, or benchmarks synthetic teams."""
+
+        stdout = io.StringIO()
+        management.call_command(
+            "scout_teams", workers=1, directory=self.__path, stdout=stdout
+        )
+        management.call_command(
+            "scout_teams",
+            benchmark=True,
+            teams=50,
+            players=2000,
+            workers=1,
+            stdout=stdout,
+        )
+
+        self.assertIn("Scouted 4 of 4 teams", stdout.getvalue())
+        self.assertIn('"matches": true', stdout.getvalue())
@@ -0,0 +1,196 @@
+"""Test fixtures and standings."""
+
+import io
+import itertools
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import management
+from django.urls import reverse
+from django.utils import crypto
+from rest_framework import status, test
+
+from manager import models, services
+
+
+UserModel = get_user_model()
+STANDING_FIELDS = [
+    "played",
+    "won",
+    "drawn",
+    "lost",
+    "goals_for",
+    "goals_against",
+    "goal_difference",
+    "points",
+    "form",
+]
+
+
+class TestSeasonServices(test.APITestCase):
+    """Test round robin scheduling and standings maintenance."""
+
+    def setUp(self):
+        password = crypto.get_random_string(length=12)
+        self.__user = UserModel.objects.create_user(
+            email="test@test.com",
+            password=password,
+        )
+        self.client.login(email=self.__user.email, password=password)
+        country = models.Country.objects.create(name="Country")
+        self.__leagues = [
+            models.League.objects.create(country=country, division=1),
+            models.League.objects.create(country=country, division=2),
+        ]
+        for league, num_teams in zip(self.__leagues, [4, 5], strict=True):
+            for i in range(num_teams):
+                models.Team.objects.create(
+                    name=f"{i}", league=league, owner=self.__user
+                )
+
+    def test_round_robin(self):
+        """Every team meets every other team home and away, once per round."""
+
+        for num_teams in [2, 5, 6]:
+            rounds = services.round_robin(range(num_teams))
+            self.assertEqual(len(rounds), 2 * (num_teams - 1 + num_teams % 2))
+            for pairs in rounds:
+                teams = [team for pair in pairs for team in pair]
+                self.assertEqual(len(teams), len(set(teams)))
+                self.assertEqual(len(pairs), num_teams // 2)
+            pairs = sorted(pair for pairs in rounds for pair in pairs)
+            self.assertEqual(pairs, sorted(itertools.permutations(range(num_teams), 2)))
+        self.assertEqual(len(services.round_robin(range(4), double=False)), 3)
+
+    def test_season(self):
+        """Standings maintained per result equal standings rebuilt from scratch."""
+
+        count = services.generate_fixtures(models.League.objects.all())
+        self.assertEqual(count, 4 * 3 + 5 * 4)
+        self.assertEqual(models.Standing.objects.count(), 9)
+        played = 0
+        while matches := services.play_round(seed=played):
+            played += len(matches)
+        self.assertEqual(played, count)
+        self.assertFalse(models.Fixture.objects.filter(played=False).exists())
+
+        for league in self.__leagues:
+            incremental = list(services.get_standings(league).values(*STANDING_FIELDS))
+            services.rebuild_standings(league)
+            rebuilt = list(services.get_standings(league).values(*STANDING_FIELDS))
+            self.assertEqual(incremental, rebuilt)
+            for standing in incremental:
+                self.assertEqual(standing["played"], 2 * (league.team_set.count() - 1))
+                self.assertEqual(len(standing["form"]), settings.STANDING_FORM_LENGTH)
+            points = [standing["points"] for standing in incremental]
+            self.assertEqual(points, sorted(points, reverse=True))
+
+    def test_play_round(self):
+        """Only the next round of the selected leagues is played."""
+
+        league = self.__leagues[0]
+        services.generate_fixtures([league])
+        matches = services.play_round(leagues=[league], seed=0)
+        self.assertEqual(len(matches), 2)
+        self.assertEqual(
+            set(
+                models.Fixture.objects.filter(played=True).values_list(
+                    "round", flat=True
+                )
+            ),
+            {1},
+        )
+        for match in matches:
+            self.assertEqual(match.fixture.league, league)
+        self.assertEqual(
+            str(matches[0].fixture),
+            f"1: {matches[0].home_team_id} - " f"{matches[0].away_team_id}",
+        )
+        standing = services.get_standings(league).first()
+        self.assertEqual(str(standing), f"{standing.team_id}: {standing.points}")
+
+    def test_record_results(self):
+        """Results are summed per standing and written in chunked updates."""
+
+        league = self.__leagues[0]
+        teams = list(league.team_set.order_by("id"))
+        matches = [
+            models.Match(
+                league=league,
+                home_team=teams[0],
+                away_team=teams[1],
+                home_goals=3,
+                away_goals=1,
+            ),
+            models.Match(
+                league=league,
+                home_team=teams[2],
+                away_team=teams[0],
+                home_goals=0,
+                away_goals=0,
+            ),
+        ]
+        with self.assertNumQueries(3):
+            services.record_results(matches, chunk_size=2)
+        standings = {
+            standing["team"]: standing
+            for standing in services.get_standings(league).values(
+                "team", *STANDING_FIELDS
+            )
+        }
+        self.assertEqual(len(standings), 3)
+        self.assertEqual(
+            standings[teams[0].pk],
+            {
+                "team": teams[0].pk,
+                "played": 2,
+                "won": 1,
+                "drawn": 1,
+                "lost": 0,
+                "goals_for": 3,
+                "goals_against": 1,
+                "goal_difference": 2,
+                "points": settings.POINTS["win"] + settings.POINTS["draw"],
+                "form": "WD",
+            },
+        )
+        self.assertEqual(standings[teams[1].pk]["form"], "L")
+        self.assertEqual(standings[teams[2].pk]["points"], settings.POINTS["draw"])
+
+    def test_standings_view(self):
+        """Test /leagues/<pk>/standings/."""
+
+        league = self.__leagues[1]
+        services.generate_fixtures([league])
+        services.play_round(seed=0)
+        url = reverse("league-standings", kwargs={"pk": league.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        standings = response.json()
+        self.assertEqual(len(standings), 5)
+        for standing in standings:
+            for field in ["team", "league", *STANDING_FIELDS]:
+                self.assertIn(field, standing)
+        self.assertEqual(sum(standing["played"] for standing in standings), 4)
+
+    def test_commands(self):
+        """Generate, play and rebuild through management commands."""
+
+        out = io.StringIO()
+        management.call_command(
+            "generate_fixtures", division=1, single=True, stdout=out
+        )
+        self.assertIn("Created 6 fixtures", out.getvalue())
+        management.call_command(
+            "play_round", leagues=[self.__leagues[0].pk], stdout=out
+        )
+        self.assertIn("Played 2 matches", out.getvalue())
+        management.call_command("rebuild_standings", stdout=out)
+        self.assertIn("Rebuilt 4 standings", out.getvalue())
+        self.assertRaises(
+            management.CommandError,
+            management.call_command,
+            "generate_fixtures",
+            leagues=[0],
+            stdout=out,
+        )
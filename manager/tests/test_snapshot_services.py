@@ -0,0 +1,255 @@
+"""Test the memory-mapped snapshot of player attributes."""
+
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+import importlib
+import io
+import json
+import multiprocessing
+import pathlib
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+from django.core import management
+from django.test import TestCase
+from django.utils import timezone
+import numpy as np
+
+from manager import models, services
+from manager.subservices import rating_services, snapshot_services
+
+
+ATTRIBUTES = rating_services.ATTRIBUTES
+
+
+def _attribute_sums(directory):
+    """Sum attributes of a snapshot in another process."""
+
+    snapshot = services.open_snapshot(directory)
+
+    return snapshot.attributes[snapshot.live()].sum(axis=0).tolist()
+
+
+class TestSnapshotServices(TestCase):
+    """Build, refresh and map the columnar snapshot."""
+
+    def setUp(self):
+        self.__world = services.generate_world(
+            countries=1,
+            leagues_per_country=1,
+            teams_per_league=2,
+            players_per_team=6,
+            transfers=0,
+            seed=3,
+        )
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__path = pathlib.Path(self.__directory.name)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def __assert_matches(self, snapshot):
+        """The live rows of a snapshot are the players of the database."""
+
+        live = snapshot.live()
+        # pylint: disable=no-member
+        rows = list(
+            models.Player.objects.order_by("id").values_list(
+                "id", "team_id", "position", "status", "price", *ATTRIBUTES
+            )
+        )
+        self.assertEqual(snapshot.ids[live].tolist(), [row[0] for row in rows])
+        self.assertEqual(
+            snapshot.team_ids[live].tolist(), [row[1] or 0 for row in rows]
+        )
+        self.assertEqual(
+            [snapshot_services.PLAYER_POSITIONS[i] for i in snapshot.positions[live]],
+            [row[2] for row in rows],
+        )
+        self.assertEqual(
+            [
+                snapshot_services.PLAYER_STATUSES[i]
+                if i != snapshot_services.NO_STATUS
+                else ""
+                for i in snapshot.statuses[live]
+            ],
+            [row[3] for row in rows],
+        )
+        self.assertEqual(snapshot.prices[live].tolist(), [row[4] for row in rows])
+        self.assertEqual(
+            snapshot.attributes[live].tolist(), [list(row[5:]) for row in rows]
+        )
+        np.testing.assert_allclose(
+            snapshot.vectors[live] * snapshot_services.ATTRIBUTE_SCALE,
+            snapshot.attributes[live],
+            rtol=1e-6,
+        )
+
+    def test_build(self):
+        """Every player is written to compact memory-mapped columns."""
+
+        result = services.build_snapshot(self.__path, chunk_size=5)
+        snapshot = services.open_snapshot(self.__path)
+
+        self.assertEqual(result["rows"], 12)
+        self.assertEqual(len(snapshot), 12)
+        self.assertIsInstance(snapshot.attributes, np.memmap)
+        self.assertEqual(snapshot.attributes.dtype, np.uint16)
+        self.assertEqual(snapshot.positions.dtype, np.uint8)
+        self.assertFalse(snapshot.attributes.flags.writeable)
+        self.__assert_matches(snapshot)
+
+    def test_refresh(self):
+        """Updates, inserts and deletions are applied to a new generation."""
+
+        services.build_snapshot(self.__path)
+        before = services.open_snapshot(self.__path)
+        attributes = np.array(before.attributes)
+        # pylint: disable=no-member
+        players = list(models.Player.objects.order_by("id"))
+        players[0].pace = 99
+        players[0].save()
+        models.Player.objects.create(
+            first_name="New",
+            team_id=self.__world.team_ids[1],
+            position=players[0].position,
+            join_date=players[0].join_date,
+            salary=1,
+        )
+        players[1].delete()
+
+        result = services.refresh_snapshot(self.__path)
+        snapshot = services.open_snapshot(self.__path)
+
+        self.assertFalse(result["rebuilt"])
+        self.assertEqual(result["generation"], 2)
+        self.assertEqual(result["deleted"], 1)
+        self.assertEqual(len(snapshot), 13)
+        self.assertEqual(len(snapshot.live()), 12)
+        self.__assert_matches(snapshot)
+        # Readers of the previous generation see it unchanged.
+        np.testing.assert_array_equal(before.attributes, attributes)
+        self.assertEqual(len(before.live()), 12)
+
+        self.assertEqual(services.refresh_snapshot(self.__path)["deleted"], 0)
+        self.assertEqual(
+            sorted(path.name for path in self.__path.glob("players-*")),
+            ["players-2", "players-3"],
+        )
+
+    def test_lock(self):
+        """A writer waits until the snapshot lock is released."""
+
+        entered = threading.Event()
+
+        def write():
+            with snapshot_services.snapshot_lock(self.__path):
+                entered.set()
+
+        with snapshot_services.snapshot_lock(self.__path):
+            thread = threading.Thread(target=write)
+            thread.start()
+            self.assertFalse(entered.wait(0.2))
+        thread.join()
+        self.assertTrue(entered.is_set())
+
+    def test_without_fcntl(self):
+        """The module imports where fcntl is missing, as on Windows."""
+
+        self.addCleanup(importlib.reload, snapshot_services)
+        with mock.patch.dict(sys.modules, {"fcntl": None}):
+            importlib.reload(snapshot_services)
+
+    def test_deleted_team(self):
+        """Players of a deleted team become free agents."""
+
+        # pylint: disable=no-member
+        models.Player.objects.update(
+            updated_at=timezone.now() - datetime.timedelta(hours=1)
+        )
+        services.build_snapshot(self.__path)
+        models.Team.objects.get(id=self.__world.team_ids[0]).delete()
+
+        with mock.patch.object(
+            snapshot_services, "SNAPSHOT_OVERLAP", datetime.timedelta(0)
+        ):
+            result = services.refresh_snapshot(self.__path)
+
+        self.assertEqual(result["upserted"], 0)
+        self.__assert_matches(services.open_snapshot(self.__path))
+
+    def test_compaction(self):
+        """Too many dead rows trigger a new generation."""
+
+        services.build_snapshot(self.__path)
+        # pylint: disable=no-member
+        for player in models.Player.objects.order_by("id")[:4]:
+            player.delete()
+
+        result = services.refresh_snapshot(self.__path)
+        snapshot = services.open_snapshot(self.__path)
+
+        self.assertTrue(result["rebuilt"])
+        self.assertEqual(snapshot.generation, 2)
+        self.assertEqual(len(snapshot), 8)
+        self.__assert_matches(snapshot)
+
+    def test_attributes_changed(self):
+        """A snapshot of other attributes is rebuilt, not refreshed."""
+
+        services.build_snapshot(self.__path)
+        manifest = services.read_manifest(self.__path)
+        manifest["attributes"] = ATTRIBUTES[:-1]
+        (self.__path / snapshot_services.MANIFEST).write_text(json.dumps(manifest))
+
+        with self.assertRaises(services.SnapshotError):
+            services.open_snapshot(self.__path)
+        self.assertTrue(services.refresh_snapshot(self.__path)["rebuilt"])
+
+    def test_missing(self):
+        """Opening without a snapshot fails, refreshing builds one."""
+
+        with self.assertRaises(services.SnapshotError):
+            services.open_snapshot(self.__path)
+        self.assertTrue(services.refresh_snapshot(self.__path)["rebuilt"])
+
+    def test_workers(self):
+        """Worker processes map the same files."""
+
+        services.build_snapshot(self.__path)
+        snapshot = services.open_snapshot(self.__path)
+
+        with ProcessPoolExecutor(
+            2, mp_context=multiprocessing.get_context("fork")
+        ) as pool:
+            sums = list(pool.map(_attribute_sums, [self.__path] * 2))
+
+        expected = snapshot.attributes.sum(axis=0).tolist()
+        self.assertEqual(sums, [expected, expected])
+
+    def test_rate_snapshot(self):
+        """Ratings from the snapshot match ratings from the database."""
+
+        services.build_snapshot(self.__path)
+
+        ratings = services.rate_snapshot(services.open_snapshot(self.__path))
+        expected = services.rate_league()
+
+        np.testing.assert_array_equal(ratings.player_ids, expected.player_ids)
+        np.testing.assert_allclose(ratings.overall, expected.overall)
+
+    def test_command(self):
+        """The command rebuilds or refreshes the snapshot."""
+
+        stdout = io.StringIO()
+        management.call_command(
+            "snapshot_players", directory=self.__path, rebuild=True, stdout=stdout
+        )
+        management.call_command(
+            "snapshot_players", directory=self.__path, stdout=stdout
+        )
+
+        self.assertIn("Rebuilt generation 1", stdout.getvalue())
+        self.assertIn("Refreshed generation 2", stdout.getvalue())
@@ -0,0 +1,162 @@
+"""UnitTest for the delta sync feed."""
+
+import datetime
+import io
+
+from django.contrib.auth import get_user_model
+from django.core import management
+from django.db import connection
+from django.db.models.deletion import Collector
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from rest_framework import status, test
+
+from manager import models, services
+
+
+UserModel = get_user_model()
+
+
+class TestSync(test.APITestCase):
+    """Sync countries with upserts and tombstones."""
+
+    def setUp(self) -> None:
+        password = get_random_string(length=12)
+        user = UserModel.objects.create_user(
+            email="admin@test.com", password=password, is_staff=True
+        )
+        self.client.login(email=user.email, password=password)
+        self.__url = reverse("sync", args=["country"])
+        self.__countries = [
+            models.Country.objects.create(name=f"Country {i}") for i in range(5)
+        ]
+
+    def __sync(self, **params):
+        """Follow next links and return all changes."""
+
+        changes = []
+        response = self.client.get(self.__url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            page = response.json()
+            changes.extend(page["results"])
+            if page["next"] is None:
+                return changes
+            response = self.client.get(page["next"])
+
+    def test_full_sync(self):
+        """Without since every row is an upsert, in update order."""
+
+        changes = self.__sync(page_size=2)
+        self.assertEqual(
+            [change["id"] for change in changes],
+            [country.id for country in self.__countries],
+        )
+        self.assertEqual({change["operation"] for change in changes}, {"upsert"})
+        self.assertEqual(changes[0]["row"]["name"], "Country 0")
+
+    def test_delta(self):
+        """Only rows changed after since and tombstones are sent."""
+
+        since = timezone.now()
+        updated, deleted = self.__countries[1], self.__countries[3]
+        updated.name = "Updated"
+        updated.save()
+        deleted_id = deleted.id
+        deleted.delete()
+        created = models.Country.objects.create(name="Created")
+        changes = self.__sync(since=since.isoformat(), page_size=1)
+        self.assertEqual(
+            [(change["operation"], change["id"]) for change in changes],
+            [("upsert", updated.id), ("delete", deleted_id), ("upsert", created.id)],
+        )
+        self.assertEqual(changes[0]["row"]["name"], "Updated")
+
+    def test_tombstones(self):
+        """Only synced models leave tombstones, cascades included."""
+
+        country = self.__countries[0]
+        league = models.League.objects.create(country=country, division=1)
+        country_id, league_id = country.id, league.id
+        country.delete()
+        self.assertEqual(
+            set(models.DeletionLog.objects.values_list("model_name", "object_id")),
+            {("country", country_id), ("league", league_id)},
+        )
+        UserModel.objects.create_user(email="x@test.com", password="x").delete()
+        self.assertEqual(models.DeletionLog.objects.count(), 2)
+        collector = Collector(using="default")
+        self.assertTrue(collector.can_fast_delete(models.ShortlistEntry.objects.all()))
+        self.assertFalse(collector.can_fast_delete(models.Standing.objects.all()))
+        changes = services.sync_feed("league")
+        self.assertEqual(
+            [change for _, change in changes],
+            [{"operation": "delete", "id": league.id}],
+        )
+
+    def test_bulk_deletions(self):
+        """Queryset deletes in bulk_deletions write their tombstones at once."""
+
+        ids = {country.id for country in self.__countries}
+        leagues = {
+            models.League.objects.create(country=country, division=1).id
+            for country in self.__countries
+        }
+        with CaptureQueriesContext(connection) as queries:
+            with services.bulk_deletions():
+                models.Country.objects.filter(id__in=ids).delete()
+                self.assertFalse(models.DeletionLog.objects.exists())
+
+        inserts = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('INSERT INTO "manager_deletionlog"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            set(models.DeletionLog.objects.values_list("model_name", "object_id")),
+            {("country", pk) for pk in ids} | {("league", pk) for pk in leagues},
+        )
+
+    def test_prune(self):
+        """Old tombstones are pruned and feeds cannot start before them."""
+
+        deleted_ids = [country.id for country in self.__countries[:2]]
+        for country in self.__countries[:2]:
+            country.delete()
+        old = timezone.now() - datetime.timedelta(days=31)
+        models.DeletionLog.objects.filter(object_id=deleted_ids[0]).update(
+            deleted_at=old
+        )
+        out = io.StringIO()
+        management.call_command("prune_deletions", stdout=out)
+        self.assertIn("Pruned 1 tombstones", out.getvalue())
+        self.assertEqual(
+            list(models.DeletionLog.objects.values_list("object_id", flat=True)),
+            deleted_ids[1:],
+        )
+        self.assertEqual(services.prune_deletions(days=0), 1)
+
+        response = self.client.get(self.__url, {"since": old.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_invalid(self):
+        """Unknown models and malformed parameters are rejected."""
+
+        response = self.client.get(reverse("sync", args=["user"]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(self.__url, {"cursor": "bad"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(self.__url, {"since": "later"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_admin_only(self):
+        """Users who are not admins cannot read the feeds."""
+
+        password = get_random_string(length=12)
+        user = UserModel.objects.create_user(email="user@test.com", password=password)
+        self.client.login(email=user.email, password=password)
+        response = self.client.get(self.__url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
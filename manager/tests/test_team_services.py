@@ -0,0 +1,237 @@
+"""Test incremental team totals."""
+
+import datetime
+import io
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import management
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import crypto
+from rest_framework.test import APIClient
+
+from manager import models, services
+from manager.subservices import team_services, transfer_services
+
+
+UserModel = get_user_model()
+
+
+class TestTeamServices(TestCase):
+    """Keep num_players and value in step with players."""
+
+    def setUp(self):
+        owner = UserModel.objects.create_user(
+            email="owner@test.com",
+            password=crypto.get_random_string(length=12),
+        )
+        country = models.Country.objects.create(name="Country")
+        league = models.League.objects.create(country=country, division=1)
+        self.__teams = [
+            models.Team.objects.create(
+                name=f"Team {i}",
+                league=league,
+                owner=owner,
+            )
+            for i in range(2)
+        ]
+
+    def __create_player(self, team, price):
+        return models.Player.objects.create(
+            team=team,
+            status=settings.STATUS["player"][0],
+            salary=1000,
+            position=settings.PLAYER_POSITIONS[0],
+            join_date=datetime.date.today(),
+            price=price,
+        )
+
+    def __assert_totals(self, team, players, value):
+        team.refresh_from_db()
+        self.assertEqual((team.num_players, team.value), (players, value))
+
+    def test_delta(self):
+        """Deltas cancel out and skip players without a team."""
+
+        changes = [
+            (None, (1, 100)),
+            ((1, 100), (2, 100)),
+            ((2, 50), (2, 80)),
+            ((None, 10), None),
+        ]
+        self.assertEqual(services.team_totals_delta(changes), {2: (1, 130)})
+
+    def test_signals(self):
+        """Joining, leaving, repricing and deleting update both teams."""
+
+        first, second = self.__teams
+        player = self.__create_player(first, 100)
+        self.__create_player(first, 50)
+        self.__assert_totals(first, 2, 150)
+
+        player.price = 300
+        player.save()
+        self.__assert_totals(first, 2, 350)
+
+        player = models.Player.objects.get(pk=player.pk)
+        player.team = second
+        player.save()
+        self.__assert_totals(first, 1, 50)
+        self.__assert_totals(second, 1, 300)
+
+        player.price = 10
+        player.save(update_fields=["first_name"])
+        self.__assert_totals(second, 1, 300)
+        player.save(update_fields=["price"])
+        self.__assert_totals(second, 1, 10)
+
+        player = models.Player.objects.only("id", "first_name").get(pk=player.pk)
+        player.team = None
+        player.save()
+        self.__assert_totals(second, 0, 0)
+
+        models.Player.objects.filter(team=first).get().delete()
+        self.__assert_totals(first, 0, 0)
+
+    def test_created_through_api(self):
+        """A team created through the API starts without players."""
+
+        client = APIClient()
+        client.force_authenticate(UserModel.objects.get(email="owner@test.com"))
+        response = client.post(
+            reverse("team-list"),
+            {"name": "New", "league": self.__teams[0].league_id},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            (response.json()["num_players"], response.json()["value"]), (0, 0)
+        )
+        team = models.Team.objects.get(pk=response.json()["id"])
+        self.__create_player(team, 100)
+        self.__assert_totals(team, 1, 100)
+        self.assertEqual(services.reconcile_teams(), {"checked": 3, "updated": 0})
+
+    def test_reconcile(self):
+        """Drifted totals are recounted and correct ones are left alone."""
+
+        for team in self.__teams:
+            self.__create_player(team, 100)
+        models.Team.objects.filter(pk=self.__teams[0].pk).update(num_players=7, value=1)
+        out = io.StringIO()
+        management.call_command("reconcile_teams", chunk_size=1, stdout=out)
+        self.assertIn("checked 2, updated 1", out.getvalue())
+        for team in self.__teams:
+            self.__assert_totals(team, 1, 100)
+        self.assertEqual(services.reconcile_teams(), {"checked": 2, "updated": 0})
+
+    def test_reconcile_locked(self):
+        """Totals are read after the teams are locked, so saves are not lost."""
+
+        player = self.__create_player(self.__teams[0], 100)
+        lock = transfer_services.lock_teams
+
+        def lock_teams(team_ids):
+            # A save committed while reconcile waited for the lock.
+            player.price = 150
+            player.save()
+            lock(team_ids)
+
+        with mock.patch.object(transfer_services, "lock_teams", side_effect=lock_teams):
+            result = services.reconcile_teams()
+
+        self.assertEqual(result, {"checked": 2, "updated": 0})
+        self.__assert_totals(self.__teams[0], 1, 150)
+
+    def test_deferred(self):
+        """Bulk deletes recount only the touched teams, once, after the block."""
+
+        for team in self.__teams:
+            for price in [100, 200]:
+                self.__create_player(team, price)
+        with mock.patch.object(
+            team_services,
+            "reconcile_teams",
+            wraps=team_services.reconcile_teams,
+        ) as reconcile:
+            with services.deferred_team_totals():
+                with services.deferred_team_totals():
+                    models.Player.objects.filter(team=self.__teams[0]).delete()
+                self.__assert_totals(self.__teams[0], 2, 300)
+
+        reconcile.assert_called_once_with(team_ids=[self.__teams[0].pk])
+        self.__assert_totals(self.__teams[0], 0, 0)
+        self.__assert_totals(self.__teams[1], 2, 300)
+
+
+class TestSquads(TestCase):
+    """Load squads with a number of queries independent of their size."""
+
+    def setUp(self):
+        self.__client = APIClient()
+
+    def __world(self, teams):
+        world = services.generate_world(
+            countries=1,
+            leagues_per_country=1,
+            teams_per_league=teams,
+            players_per_team=3,
+            transfers=0,
+        )
+        owner = UserModel.objects.get(pk=world.owner_id)
+        # pylint: disable=no-member
+        manager = models.Manager.objects.create(
+            user=owner, first_name="Coach", country_id=world.country_ids[0]
+        )
+        models.Team.objects.filter(id=world.team_ids[0]).update(manager=manager)
+        self.__client.force_authenticate(owner)
+
+        return world
+
+    def test_team_squad(self):
+        """A team comes with its league, country, manager, owner and players."""
+
+        world = self.__world(2)
+        team_id = int(world.team_ids[0])
+
+        with self.assertNumQueries(2):
+            response = self.__client.get(reverse("team-squad", kwargs={"pk": team_id}))
+
+        self.assertEqual(response.status_code, 200)
+        squad = response.json()
+        self.assertEqual(squad["league"]["id"], world.league_ids[0])
+        self.assertEqual(squad["league"]["country"]["id"], world.country_ids[0])
+        self.assertEqual(squad["manager"]["first_name"], "Coach")
+        self.assertEqual(squad["owner"], world.owner_id)
+        # pylint: disable=no-member
+        self.assertEqual(
+            [player["id"] for player in squad["players"]],
+            list(
+                models.Player.objects.filter(team_id=team_id)
+                .order_by("id")
+                .values_list("id", flat=True)
+            ),
+        )
+
+        response = self.__client.get(reverse("team-squad", kwargs={"pk": 0}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_league_squads(self):
+        """A full league loads in three queries at 20, 200 and 2000 teams."""
+
+        for teams in [20, 200, 2000]:
+            with self.subTest(teams=teams):
+                world = self.__world(teams)
+                url = reverse("league-squads", kwargs={"pk": world.league_ids[0]})
+
+                with self.assertNumQueries(3):
+                    response = self.__client.get(url)
+
+                self.assertEqual(response.status_code, 200)
+                league = response.json()
+                self.assertEqual(len(league["teams"]), teams)
+                self.assertEqual(
+                    sum(len(team["players"]) for team in league["teams"]), teams * 3
+                )
+                self.assertEqual(league["teams"][0]["manager"]["first_name"], "Coach")
@@ -0,0 +1,229 @@
+"""Test transfer completion."""
+
+from concurrent import futures
+import datetime
+import random
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F, Sum
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import crypto
+from rest_framework import status, test
+
+from manager import models, services
+
+
+UserModel = get_user_model()
+BUDGET = 1000
+
+
+def create_world(num_teams, players_per_team):
+    """Create teams with a fixed budget, each owning a few players."""
+
+    owner = UserModel.objects.create_user(
+        email="owner@test.com",
+        password=crypto.get_random_string(length=12),
+    )
+    country = models.Country.objects.create(name="Country")
+    league = models.League.objects.create(country=country, division=1)
+    teams = [
+        models.Team.objects.create(
+            name=f"Team {i}",
+            league=league,
+            owner=owner,
+            budget=BUDGET,
+        )
+        for i in range(num_teams)
+    ]
+    players = [
+        models.Player.objects.create(
+            team=team,
+            status=settings.STATUS["player"][0],
+            salary=1000,
+            position=settings.PLAYER_POSITIONS[0],
+            join_date=datetime.date(2020, 1, 1),
+            price=100,
+        )
+        for team in teams
+        for _ in range(players_per_team)
+    ]
+
+    return owner, teams, players
+
+
+class TestTransferServices(test.APITestCase):
+    """Complete transfers one at a time."""
+
+    def setUp(self):
+        self.__owner, self.__teams, self.__players = create_world(3, 1)
+
+    def test_complete(self):
+        """The player, the fee and team totals move and rival bids close."""
+
+        seller, buyer, rival = self.__teams
+        player = self.__players[0]
+        transfer = services.make_bid(player, buyer, 300)
+        rival_bid = services.make_bid(player, rival, 200)
+        offer = models.CounterOffer.objects.create(
+            player=player,
+            buyer=rival,
+            seller=seller,
+            asking_price=100,
+            offered_price=150,
+            status="STALLED",
+            type="BUY",
+        )
+        services.complete_transfer(transfer.pk)
+
+        player.refresh_from_db()
+        self.assertEqual(player.team_id, buyer.id)
+        self.assertEqual(player.join_date, datetime.date.today())
+        for team, budget, earning, num_players in [
+            (seller, BUDGET + 300, 300, 0),
+            (buyer, BUDGET - 300, 0, 2),
+            (rival, BUDGET, 0, 1),
+        ]:
+            team.refresh_from_db()
+            self.assertEqual(
+                (team.budget, team.earning, team.num_players),
+                (budget, earning, num_players),
+            )
+        for obj, expected in [
+            (transfer, "CLOSE"),
+            (rival_bid, "CLOSE"),
+            (offer, "REJECTED"),
+        ]:
+            obj.refresh_from_db()
+            self.assertEqual(obj.status, expected)
+        self.assertRaisesRegex(
+            services.TransferError, "closed", services.complete_transfer, rival_bid.pk
+        )
+
+    def test_errors(self):
+        """Unaffordable, stale and invalid transfers change nothing."""
+
+        seller, buyer, _ = self.__teams
+        player = self.__players[0]
+        transfer = services.make_bid(player, buyer, BUDGET + 1)
+        self.assertRaisesRegex(
+            services.TransferError, "afford", services.complete_transfer, transfer.pk
+        )
+        player.refresh_from_db()
+        self.assertEqual(player.team_id, seller.id)
+        transfer.refresh_from_db()
+        self.assertEqual(transfer.status, "OPEN")
+
+        stale = services.make_bid(player, buyer, 1)
+        player.team = self.__teams[2]
+        player.save()
+        self.assertRaisesRegex(
+            services.TransferError, "left", services.complete_transfer, stale.pk
+        )
+        self.assertRaises(services.TransferError, services.complete_transfer, 0)
+        self.assertRaisesRegex(
+            services.TransferError, "Loans", services.make_bid, player, buyer, 1, "LOAN"
+        )
+        loan = models.Transfer.objects.create(
+            player=player,
+            buyer=buyer,
+            seller=player.team,
+            asking_price=1,
+            offered_price=1,
+            status="OPEN",
+            contract="LOAN",
+        )
+        self.assertRaisesRegex(
+            services.TransferError, "LOAN", services.complete_transfer, loan.pk
+        )
+        self.assertRaises(
+            services.TransferError, services.make_bid, player, player.team, 1
+        )
+
+    def test_views(self):
+        """Bids are listed to both sides and completed by the seller."""
+
+        seller, buyer, _ = self.__teams
+        self.client.force_authenticate(self.__owner)
+        data = {
+            "player": self.__players[0].id,
+            "buyer": buyer.id,
+            "offered_price": 300,
+            "contract": "BUY",
+        }
+        response = self.client.post(reverse("transfer-list"), data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        transfer = response.json()
+        self.assertEqual(transfer["seller"], seller.id)
+        self.assertEqual(transfer["status"], "OPEN")
+        response = self.client.get(reverse("transfer-list"))
+        self.assertEqual(len(response.json()["results"]), 1)
+
+        url = reverse("transfer-complete", args=[transfer["id"]])
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["status"], "CLOSE")
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        stranger = UserModel.objects.create_user(
+            email="stranger@test.com",
+            password=crypto.get_random_string(length=12),
+        )
+        self.client.force_authenticate(stranger)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post(reverse("transfer-list"), data)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TestTransferConcurrency(TransactionTestCase):
+    """Complete competing transfers from many threads at once."""
+
+    def test_deadline_day(self):
+        """Every player is sold once and no money is created or lost."""
+
+        _, teams, players = create_world(20, 3)
+        rng = random.Random(0)
+        bids = [
+            services.make_bid(player, buyer, rng.randint(50, 400)).pk
+            for player in players
+            for buyer in rng.sample(
+                [team for team in teams if team.id != player.team_id], 5
+            )
+        ]
+        rng.shuffle(bids)
+
+        def complete(transfer_id):
+            try:
+                services.complete_transfer(transfer_id)
+            except services.TransferError:
+                return False
+            finally:
+                connection.close()
+
+            return True
+
+        with futures.ThreadPoolExecutor(max_workers=16) as executor:
+            completed = sum(executor.map(complete, bids))
+
+        fees = models.Transfer.objects.filter(
+            pk__in=bids, player__team_id=F("buyer_id")
+        )
+        self.assertLessEqual(completed, len(players))
+        self.assertEqual(fees.count(), completed)
+        self.assertFalse(
+            models.Transfer.objects.filter(
+                status="OPEN", player__in=fees.values("player")
+            ).exists()
+        )
+        totals = models.Team.objects.aggregate(
+            budget=Sum("budget"), earning=Sum("earning"), num_players=Sum("num_players")
+        )
+        self.assertEqual(totals["budget"], BUDGET * len(teams))
+        self.assertEqual(totals["num_players"], len(players))
+        paid = fees.aggregate(paid=Sum("offered_price"))["paid"] or 0
+        self.assertEqual(totals["earning"], paid)
+        self.assertEqual(services.reconcile_teams()["updated"], 0)
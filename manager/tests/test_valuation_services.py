@@ -0,0 +1,261 @@
+"""Test vectorized player valuation and bulk revaluation."""
+
+import io
+from unittest import mock
+
+from django.conf import settings
+from django.core import management
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+import numpy as np
+
+from manager import models, services
+from manager.subservices import (
+    rating_services,
+    transfer_services,
+    valuation_services,
+)
+
+
+ATTRIBUTES = rating_services.ATTRIBUTES
+CATEGORIES = settings.CATEGORIES
+DEFAULT = settings.DEFAULT_ATTRIBUTE_VALUE
+
+
+class TestValuationServices(TestCase):
+    """Price players as array math and write back only the changes."""
+
+    def setUp(self):
+        for i, attribute in enumerate(ATTRIBUTES):
+            models.AttributeCategory.objects.create(
+                attribute=attribute,
+                category=CATEGORIES[i % len(CATEGORIES)],
+            )
+        self.__world = services.generate_world(
+            countries=1,
+            leagues_per_country=1,
+            teams_per_league=3,
+            players_per_team=8,
+            transfers=0,
+            seed=4,
+        )
+
+    def __price(self, player, valuation):
+        """Price one player with plain Python arithmetic."""
+
+        ratings = services.rate_players([player])
+        rating = ratings.own_overall[0]
+        position = settings.PLAYER_POSITIONS.index(player.position)
+        condition = min(
+            max(
+                1
+                + settings.VALUATION_FORM_WEIGHT * (player.form - DEFAULT)
+                + settings.VALUATION_MORALE_WEIGHT * (player.morale - DEFAULT),
+                0.5,
+            ),
+            1.5,
+        )
+        price = (
+            settings.DEFAULT_PLAYER_VALUE
+            * (rating / DEFAULT) ** settings.VALUATION_EXPONENT
+            * settings.VALUATION_POSITION_FACTORS[player.position]
+            * condition
+            * valuation.market_index[position]
+        )
+        fees = dict(
+            zip(
+                valuation.transferred_ids.tolist(),
+                valuation.fees.tolist(),
+                strict=True,
+            )
+        )
+        if player.id in fees:
+            price += settings.VALUATION_TRANSFER_WEIGHT * (fees[player.id] - price)
+
+        return max(round(price / 1000) * 1000, 1000)
+
+    def __assert_team_values(self):
+        """Team values are the sums of the prices of their players."""
+
+        # pylint: disable=no-member
+        for team in models.Team.objects.annotate(total=Sum("players__price")):
+            self.assertEqual(team.value, team.total or 0)
+
+    def test_default_player(self):
+        """An average midfielder is worth DEFAULT_PLAYER_VALUE."""
+
+        valuation = services.load_valuation()
+        position = settings.PLAYER_POSITIONS.index("MIDFIELDER")
+
+        prices = services.price_players(
+            valuation,
+            np.array([1]),
+            np.array([position]),
+            np.full((1, len(ATTRIBUTES)), DEFAULT, dtype=np.float64),
+            np.array([DEFAULT]),
+            np.array([DEFAULT]),
+        )
+
+        self.assertEqual(prices.tolist(), [settings.DEFAULT_PLAYER_VALUE])
+
+    def test_revalue(self):
+        """Every price matches the per-player formula and team values follow."""
+
+        # pylint: disable=no-member
+        players = list(models.Player.objects.order_by("id"))
+        players[0].form, players[1].morale = 95, 10
+        players[0].save()
+        players[1].save()
+        self.__assert_team_values()
+
+        progress = []
+        result = services.revalue_players(
+            chunk_size=7, progress=lambda *counts: progress.append(counts)
+        )
+
+        valuation = services.load_valuation()
+        for player in models.Player.objects.order_by("id"):
+            self.assertEqual(player.price, self.__price(player, valuation))
+        self.assertEqual(result["checked"], 24)
+        self.assertEqual(len(progress), 4)
+        self.__assert_team_values()
+
+    def test_only_changes(self):
+        """A run writes only the players whose price changed."""
+
+        services.revalue_players()
+        # pylint: disable=no-member
+        player = models.Player.objects.order_by("id").first()
+        player.form = 100
+        player.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            result = services.revalue_players(chunk_size=10)
+
+        self.assertEqual((result["updated"], result["teams"]), (1, 1))
+        updates = [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len([sql for sql in updates if "manager_player" in sql]), 1)
+        self.assertEqual(len([sql for sql in updates if '"value"' in sql]), 1)
+        self.__assert_team_values()
+
+    def test_free_agents(self):
+        """Players without a team are priced without any team update."""
+
+        # pylint: disable=no-member
+        models.Player.objects.update(team=None)
+        models.Team.objects.update(value=0, num_players=0)
+
+        result = services.revalue_players()
+
+        self.assertEqual(result["teams"], 0)
+        self.assertGreater(result["updated"], 0)
+        self.assertFalse(models.Team.objects.exclude(value=0).exists())
+
+    def test_market(self):
+        """Recent fees raise their position and weigh in the player's price."""
+
+        # pylint: disable=no-member
+        sold = list(
+            models.Player.objects.filter(position="ATTACKER").order_by("id")[:3]
+        )
+        seller = models.Team.objects.exclude(id=sold[0].team_id).first()
+        before = services.load_valuation()
+        for player in sold:
+            models.Transfer.objects.create(
+                player=player,
+                buyer_id=player.team_id,
+                seller=seller,
+                asking_price=player.price,
+                offered_price=player.price * 3,
+                status=valuation_services.CLOSED,
+                contract="BUY",
+            )
+        models.Transfer.objects.create(
+            player=sold[0],
+            buyer_id=sold[0].team_id,
+            seller=seller,
+            asking_price=1,
+            offered_price=1,
+            status=valuation_services.CLOSED,
+            contract="LOAN",
+        )
+
+        valuation = services.load_valuation()
+
+        attacker = settings.PLAYER_POSITIONS.index("ATTACKER")
+        self.assertEqual(valuation.transferred_ids.tolist(), [p.id for p in sold])
+        self.assertEqual(valuation.fees.tolist(), [p.price * 3 for p in sold])
+        self.assertGreater(
+            valuation.market_index[attacker], before.market_index[attacker]
+        )
+        self.assertLessEqual(
+            valuation.market_index[attacker], settings.VALUATION_MARKET_RANGE[1]
+        )
+        np.testing.assert_array_equal(np.delete(valuation.market_index, attacker), 1)
+
+        services.revalue_players()
+        for player in models.Player.objects.order_by("id"):
+            self.assertEqual(player.price, self.__price(player, valuation))
+        self.__assert_team_values()
+
+    def test_missing_category(self):
+        """Without a category for every attribute nothing is repriced."""
+
+        # pylint: disable=no-member
+        prices = list(models.Player.objects.order_by("id").values_list("price"))
+        models.AttributeCategory.objects.filter(attribute=ATTRIBUTES[0]).delete()
+
+        with self.assertRaises(services.ValuationError):
+            services.revalue_players()
+        with self.assertRaises(management.CommandError):
+            management.call_command("revalue_players", stdout=io.StringIO())
+        self.assertEqual(
+            list(models.Player.objects.order_by("id").values_list("price")), prices
+        )
+
+    def test_moved_player(self):
+        """A chunk whose player moved to an unlocked team is locked again."""
+
+        # pylint: disable=no-member
+        first = models.Player.objects.order_by("id").first()
+        other = models.Team.objects.exclude(id=first.team_id).order_by("-id").first()
+        calls = []
+        lock = transfer_services.lock_teams
+
+        def lock_teams(team_ids):
+            calls.append(set(team_ids))
+            if len(calls) == 1:
+                models.Player.objects.filter(id=first.id).update(team=other)
+            lock(team_ids)
+
+        with mock.patch.object(
+            valuation_services.transfer_services, "lock_teams", side_effect=lock_teams
+        ):
+            result = services.revalue_players(chunk_size=8)
+
+        self.assertEqual(result["checked"], 24)
+        self.assertNotIn(other.id, calls[0])
+        self.assertIn(other.id, calls[1])
+
+    def test_deltas(self):
+        """Price changes are summed by team, skipping free agents."""
+
+        deltas = services.value_deltas(
+            np.array([2, 0, 1, 2, 3]), np.array([5, 7, -3, 4, 0])
+        )
+
+        self.assertEqual(deltas, {1: (0, -3), 2: (0, 9)})
+
+    def test_command(self):
+        """The command revalues players, or benchmarks the pricing."""
+
+        stdout = io.StringIO()
+        management.call_command("revalue_players", stdout=stdout)
+        management.call_command(
+            "revalue_players", benchmark=True, players=1000, stdout=stdout
+        )
+
+        self.assertIn("Done: checked 24", stdout.getvalue())
+        self.assertIn('"players": 1000', stdout.getvalue())
@@ -1,5 +1,6 @@
 """UnitTest for Views."""
 
+import datetime
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -7,6 +8,8 @@ from django.urls import reverse
 from django.utils.crypto import get_random_string
 from rest_framework import status, test
 
+from manager import models
+
 
 UserModel = get_user_model()
 
@@ -50,7 +53,7 @@ class TestViews(test.APITestCase):
         url = reverse("manager-list")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        managers = response.json()
+        managers = response.json()["results"]
         self.assertIsInstance(managers, list)
         self.assertEqual(len(managers), 1)
 
@@ -67,7 +70,7 @@ class TestViews(test.APITestCase):
         url = reverse("attribute-categories")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        data = response.json()
+        data = response.json()["results"]
         self.assertIsInstance(data, list)
         self.assertEqual(len(data), 0)
         data = {
@@ -78,7 +81,7 @@ class TestViews(test.APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        data = response.json()
+        data = response.json()["results"]
         self.assertIsInstance(data, list)
         for attribute_category in data:
             self.assertIsInstance(attribute_category, dict)
@@ -108,7 +111,7 @@ class TestViews(test.APITestCase):
         # self.__country = country
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        data = response.json()
+        data = response.json()["results"]
         self.assertIsInstance(data, list)
         self.assertEqual(len(data), 1)
         for country in data:
@@ -134,7 +137,7 @@ class TestViews(test.APITestCase):
         league = response.json()
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        data = response.json()
+        data = response.json()["results"]
         self.assertIsInstance(data, list)
         fields = list(params.keys())
         fields.extend(["created_at", "updated_at"])
@@ -162,7 +165,7 @@ class TestViews(test.APITestCase):
         team = response.json()
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        teams = response.json()
+        teams = response.json()["results"]
         fields = list(params.keys())
         fields.extend(
             [
@@ -185,3 +188,37 @@ class TestViews(test.APITestCase):
             self.assertEqual(_team["manager"], manager)
 
         return team
+
+    def test_player_ratings(self):
+        """Test /player-ratings/."""
+
+        url = reverse("player-ratings")
+        team = self.test_team()
+        models.AttributeCategory.objects.create(
+            attribute=settings.ATTRIBUTES[0],
+            category=settings.CATEGORIES[0],
+        )
+        for position in settings.PLAYER_POSITIONS:
+            models.Player.objects.create(
+                team_id=team["id"],
+                status=settings.STATUS["player"][0],
+                salary=1000,
+                position=position,
+                join_date=datetime.date.today(),
+            )
+        response = self.client.get(url, {"league": team["league"]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ratings = response.json()["results"]
+        self.assertEqual(len(ratings), len(settings.PLAYER_POSITIONS))
+        for rating in ratings:
+            for field in ["player", "position", "overall", "categories"]:
+                self.assertIn(field, rating)
+            self.assertEqual(
+                rating["categories"][settings.CATEGORIES[0]],
+                settings.DEFAULT_ATTRIBUTE_VALUE,
+            )
+        response = self.client.get(url, {"team": team["id"] + 1})
+        self.assertEqual(response.json()["results"], [])
+        response = self.client.get(url, {"team": "first"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("team", response.json())
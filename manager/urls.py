@@ -16,5 +16,40 @@ urlpatterns = [
     path("managers/", views.ManagerListView.as_view(), name="manager-list"),
     path("countries/", views.CountryListView.as_view(), name="countries"),
     path("leagues/", views.LeagueListView.as_view(), name="league-list"),
+    path(
+        "leagues/<int:pk>/standings/",
+        views.LeagueStandingView.as_view(),
+        name="league-standings",
+    ),
+    path(
+        "leagues/<int:pk>/squads/",
+        views.LeagueSquadsView.as_view(),
+        name="league-squads",
+    ),
     path("teams/", views.TeamListView.as_view(), name="team-list"),
+    path("teams/<int:pk>/squad/", views.TeamSquadView.as_view(), name="team-squad"),
+    path(
+        "teams/<int:pk>/shortlist/",
+        views.TeamShortlistView.as_view(),
+        name="team-shortlist",
+    ),
+    path("sync/<str:model>/", views.SyncView.as_view(), name="sync"),
+    path("export/<str:model>/", views.ExportView.as_view(), name="export"),
+    path("transfers/", views.TransferListView.as_view(), name="transfer-list"),
+    path(
+        "transfers/<int:pk>/complete/",
+        views.TransferCompleteView.as_view(),
+        name="transfer-complete",
+    ),
+    path(
+        "players/similar/",
+        views.SimilarPlayersView.as_view(),
+        name="similar-players",
+    ),
+    path(
+        "player-ratings/",
+        views.PlayerRatingListView.as_view(),
+        name="player-ratings",
+    ),
+    path("metrics", views.export_metrics, name="metrics"),
 ]
@@ -1,80 +1,445 @@
 """Define views for exposing API endpoints."""
 
 
+import datetime
+
+from django import http
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework import authentication, generics, permissions
+from django.db.models import Q
+from django.utils import dateparse, timezone
+from rest_framework import authentication as rest_authentication
+from rest_framework import exceptions, generics, permissions, response, views
 
-from manager import models, serializers
+from manager import (
+    authentication,
+    cache,
+    conditional,
+    encoders,
+    metrics,
+    models,
+    pagination,
+    serializers,
+    services,
+)
 
 
 UserModel = get_user_model()
 AUTHENTICATIONS = [
     authentication.BasicAuthentication,
-    authentication.SessionAuthentication,
+    rest_authentication.SessionAuthentication,
     authentication.TokenAuthentication,
 ]
 
 PERMISSIONS: list = [permissions.IsAuthenticated]
 
 
+def parse_datetime(request, param):
+    """Read an ISO 8601 date or datetime query parameter."""
+
+    value = request.query_params.get(param)
+    if not value:
+        return None
+    try:
+        parsed = dateparse.parse_datetime(value)
+        if parsed is None:
+            date = dateparse.parse_date(value)
+            if date is None:
+                raise ValueError(value)
+            parsed = datetime.datetime.combine(date, datetime.time())
+    except ValueError as exc:
+        # Well formed values out of range, like February 30, raise too.
+        raise exceptions.ValidationError({param: "Invalid date or datetime"}) from exc
+    if timezone.is_naive(parsed) and settings.USE_TZ:
+        parsed = timezone.make_aware(parsed, datetime.timezone.utc)
+
+    return parsed
+
+
+def parse_int(request, param):
+    """Read an integer query parameter."""
+
+    value = request.query_params.get(param)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise exceptions.ValidationError({param: "Expected an integer"}) from exc
+
+
+class SyncExpired(exceptions.APIException):
+    """A sync feed starts before the oldest kept tombstones."""
+
+    status_code = 410
+    default_detail = "Changes this old are not kept, sync again without since"
+    default_code = "sync_expired"
+
+
+class SnapshotUnavailable(exceptions.APIException):
+    """The player snapshot has not been built yet."""
+
+    status_code = 503
+    default_detail = "The player snapshot is not built yet"
+    default_code = "snapshot_unavailable"
+
+
 class UserRegisterView(generics.CreateAPIView):
     """
     Register using email and password.
     """
 
+    query_budget = 5
     model = UserModel
     permission_classes = [permissions.AllowAny]
     serializer_class = serializers.UserSerializer
 
 
-class ManagerListView(generics.ListAPIView):
+class ManagerListView(
+    conditional.ConditionalListMixin, encoders.ValuesListMixin, generics.ListAPIView
+):
     """View managers of current user."""
 
+    query_budget = 4
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = AUTHENTICATIONS
+    pagination_class = pagination.KeysetPagination
     serializer_class = serializers.ManagerSerializer
 
     def get_queryset(self):
         return models.Manager.objects.filter(user=self.request.user)
 
 
-class AttributeCategoryListView(generics.ListCreateAPIView):
+class AttributeCategoryListView(
+    conditional.ReferenceListMixin,
+    conditional.ConditionalListMixin,
+    encoders.ValuesListMixin,
+    generics.ListCreateAPIView,
+):
     """Get, Post, Put, Delete API for AttributeCategory."""
 
+    query_budget = {"GET": 4, "POST": 5}
     queryset = models.AttributeCategory.objects.all()
     serializer_class: serializers.AttributeCategorySerializer = (
         serializers.AttributeCategorySerializer
     )
     authentication_classes = AUTHENTICATIONS
+    pagination_class = pagination.KeysetPagination
     permission_classes = [permissions.IsAdminUser]
 
 
-class CountryListView(generics.ListCreateAPIView):
+class CountryListView(
+    conditional.ReferenceListMixin,
+    conditional.ConditionalListMixin,
+    encoders.ValuesListMixin,
+    generics.ListCreateAPIView,
+):
     """Get, Post, Put, Delete API for Country."""
 
+    query_budget = 4
     queryset = models.Country.objects.all()
     serializer_class = serializers.CountrySerializer
     authentication_classes = AUTHENTICATIONS
+    pagination_class = pagination.KeysetPagination
     permission_classes = [permissions.IsAdminUser]
 
 
-class LeagueListView(generics.ListCreateAPIView):
+class LeagueListView(
+    conditional.ReferenceListMixin,
+    conditional.ConditionalListMixin,
+    encoders.ValuesListMixin,
+    generics.ListCreateAPIView,
+):
     """Get, Post, Put, Delete API for League."""
 
+    query_budget = 4
     queryset = models.League.objects.all()
     serializer_class = serializers.LeagueSerializer
     authentication_classes = AUTHENTICATIONS
+    pagination_class = pagination.KeysetPagination
     permission_classes = [permissions.IsAdminUser]
 
 
-class TeamListView(generics.ListCreateAPIView):
+class TeamListView(
+    conditional.ConditionalListMixin,
+    encoders.ValuesListMixin,
+    generics.ListCreateAPIView,
+):
     """Get, Post, Put, Delete API for Team."""
 
+    query_budget = {"GET": 4, "POST": 6}
     queryset = models.Team.objects.all()
     serializer_class = serializers.TeamSerializer
     authentication_classes = AUTHENTICATIONS
+    pagination_class = pagination.KeysetPagination
     permission_classes = PERMISSIONS
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
         return super().perform_create(serializer)
+
+
+class TeamSquadView(generics.RetrieveAPIView):
+    """Get a team with its league, manager, owner and players."""
+
+    query_budget = 4
+    authentication_classes = AUTHENTICATIONS
+    permission_classes = PERMISSIONS
+    serializer_class = serializers.TeamSquadSerializer
+
+    def get_queryset(self):
+        return services.get_team_squads()
+
+
+class LeagueSquadsView(generics.RetrieveAPIView):
+    """Get a league with the squads of all its teams."""
+
+    query_budget = 5
+    authentication_classes = AUTHENTICATIONS
+    permission_classes = PERMISSIONS
+    serializer_class = serializers.LeagueSquadsSerializer
+
+    def get_queryset(self):
+        return services.get_league_squads()
+
+
+class PlayerRatingListView(conditional.ConditionalListMixin, generics.ListAPIView):
+    """Get category and overall ratings of players, optionally by league or team."""
+
+    query_budget = 5
+    authentication_classes = AUTHENTICATIONS
+    pagination_class = pagination.KeysetPagination
+    permission_classes = PERMISSIONS
+    serializer_class = serializers.PlayerRatingSerializer
+
+    def get_queryset(self):
+        filters = {"league": "team__league", "team": "team"}
+        queryset = models.Player.objects.all()
+        for param, lookup in filters.items():
+            value = parse_int(self.request, param)
+            if value is not None:
+                queryset = queryset.filter(**{lookup: value})
+
+        return queryset
+
+    def get_etag_extra(self):
+        return str(cache.reference_cache.get_version("attributecategory"))
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        ratings = services.rate_players(page)
+        serializer = self.get_serializer(ratings.as_dicts(), many=True)
+
+        return self.get_paginated_response(serializer.data)
+
+
+class LeagueStandingView(
+    conditional.ConditionalListMixin, encoders.ValuesListMixin, generics.ListAPIView
+):
+    """Get the precomputed table of a league."""
+
+    query_budget = 4
+    authentication_classes = AUTHENTICATIONS
+    pagination_class = None
+    permission_classes = PERMISSIONS
+    serializer_class = serializers.StandingSerializer
+
+    def get_queryset(self):
+        return services.get_standings(self.kwargs["pk"])
+
+
+class TeamShortlistView(
+    conditional.ConditionalListMixin, encoders.ValuesListMixin, generics.ListAPIView
+):
+    """Get the scouting shortlist of a team, rebuilt nightly by scout_teams."""
+
+    query_budget = 4
+    authentication_classes = AUTHENTICATIONS
+    pagination_class = None
+    permission_classes = PERMISSIONS
+    serializer_class = serializers.ShortlistEntrySerializer
+
+    def get_queryset(self):
+        return services.get_shortlist(self.kwargs["pk"])
+
+
+class ExportView(views.APIView):
+    """
+    Stream every row of players, teams or transfers as NDJSON or CSV.
+
+    ``output`` selects ``ndjson`` (default) or ``csv``. ``since`` and
+    ``until`` restrict the export to rows updated in ``[since, until)``.
+    """
+
+    query_budget = 2
+    authentication_classes = AUTHENTICATIONS
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, model):
+        """Stream the export of one model."""
+
+        if model not in services.EXPORT_MODELS:
+            raise exceptions.NotFound(f"Unknown export {model}")
+        data_format = request.query_params.get("output", "ndjson")
+        if data_format not in services.EXPORT_FORMATS:
+            raise exceptions.ValidationError({"output": "Expected ndjson or csv"})
+        content_type, lines = services.export_rows(
+            model,
+            data_format,
+            since=parse_datetime(request, "since"),
+            until=parse_datetime(request, "until"),
+        )
+        response = http.StreamingHttpResponse(lines, content_type=content_type)
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="{model}.{data_format}"'
+
+        return response
+
+
+class TransferListView(
+    conditional.ConditionalListMixin,
+    encoders.ValuesListMixin,
+    generics.ListCreateAPIView,
+):
+    """List transfers of the user's teams and bid for players."""
+
+    query_budget = {"GET": 4, "POST": 3}
+    authentication_classes = AUTHENTICATIONS
+    pagination_class = pagination.KeysetPagination
+    permission_classes = PERMISSIONS
+    serializer_class = serializers.TransferSerializer
+
+    def get_queryset(self):
+        queryset = models.Transfer.objects.all()
+        if self.request.user.is_staff:
+            return queryset
+
+        return queryset.filter(
+            Q(buyer__owner=self.request.user) | Q(seller__owner=self.request.user)
+        )
+
+    def perform_create(self, serializer):
+        buyer = serializer.validated_data["buyer"]
+        if buyer.owner_id != self.request.user.id and not self.request.user.is_staff:
+            raise exceptions.PermissionDenied("Bids are made for your own teams")
+        try:
+            serializer.instance = services.make_bid(
+                serializer.validated_data["player"],
+                buyer,
+                serializer.validated_data["offered_price"],
+                serializer.validated_data["contract"],
+            )
+        except services.TransferError as exc:
+            raise exceptions.ValidationError({"detail": str(exc)}) from exc
+
+
+class TransferCompleteView(generics.GenericAPIView):
+    """Accept a bid, moving the player to the buyer and the fee to the seller."""
+
+    query_budget = 15
+    authentication_classes = AUTHENTICATIONS
+    permission_classes = PERMISSIONS
+    serializer_class = serializers.TransferSerializer
+
+    def get_queryset(self):
+        queryset = models.Transfer.objects.all()
+        if self.request.user.is_staff:
+            return queryset
+
+        return queryset.filter(seller__owner=self.request.user)
+
+    def post(self, request, *args, **kwargs):
+        """Complete the transfer."""
+
+        transfer = self.get_object()
+        try:
+            transfer = services.complete_transfer(transfer.pk)
+        except services.TransferError as exc:
+            raise exceptions.ValidationError({"detail": str(exc)}) from exc
+
+        return response.Response(self.get_serializer(transfer).data)
+
+
+class SimilarPlayersView(views.APIView):
+    """
+    Find the players most similar to ``player`` or to an attribute profile.
+
+    A profile is given as attribute query parameters, like
+    ``?pace=90&finishing=85``. ``k`` sets the number of results and
+    ``position``, ``status`` and ``max_price`` restrict the candidates.
+    """
+
+    query_budget = 4
+    authentication_classes = AUTHENTICATIONS
+    permission_classes = PERMISSIONS
+
+    def get(self, request):
+        """Return the closest players, closest first."""
+
+        profile = {
+            attribute: parse_int(request, attribute)
+            for attribute in settings.ATTRIBUTES
+            if request.query_params.get(attribute)
+        }
+        try:
+            similar = services.find_similar(
+                player=parse_int(request, "player"),
+                profile=profile or None,
+                k=parse_int(request, "k") or 10,
+                position=request.query_params.get("position"),
+                status=request.query_params.get("status"),
+                max_price=parse_int(request, "max_price"),
+            )
+        except services.SnapshotError as exc:
+            raise SnapshotUnavailable() from exc
+        except services.ScoutingError as exc:
+            raise exceptions.ValidationError({"detail": str(exc)}) from exc
+
+        return response.Response(
+            {"results": serializers.SimilarPlayerSerializer(similar, many=True).data}
+        )
+
+
+class SyncView(views.APIView):
+    """
+    Feed rows of a model changed or deleted after ``since``.
+
+    Clients apply upserts and deletions in order, follow ``next`` until it
+    is null and keep the ``updated_at`` or deletion time of the last change
+    as ``since`` for the next sync. Like exports, feeds hold every row of a
+    model, so only admins can read them.
+    """
+
+    query_budget = 4
+    authentication_classes = AUTHENTICATIONS
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = pagination.SyncPagination
+
+    def get(self, request, model):
+        """Return one page of the change feed of a model."""
+
+        if model not in services.SYNC_MODELS:
+            raise exceptions.NotFound(f"Unknown model {model}")
+        since = parse_datetime(request, "since")
+        paginator = self.pagination_class()
+        try:
+            changes = paginator.paginate_feed(
+                lambda after, limit: services.sync_feed(model, since, after, limit),
+                request,
+            )
+        except services.SyncExpired as exc:
+            raise SyncExpired() from exc
+
+        return paginator.get_paginated_response(changes)
+
+
+def export_metrics(request):
+    """Serve the request metrics of all workers in Prometheus text format."""
+
+    if not metrics.is_scraper(request):
+        return http.HttpResponseForbidden()
+
+    return http.HttpResponse(
+        metrics.registry.render(), content_type=metrics.CONTENT_TYPE
+    )